@@ -0,0 +1,71 @@
+"""The benchmark command line.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks run [--receipts 1000] [--items 20] [--users 3]
+        [--people 20] [--seed 0] [--repeat 5] [--only NAME ...] [--output results.json]
+    PYTHONPATH=src python -m benchmarks compare base.json head.json [--threshold 0.1]
+
+`run` prints progress to stderr and the results as JSON to stdout (or `--output`). `compare` exits
+with 1 if any benchmark got more than `--threshold` slower, so it can gate CI.
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/__main__.py
+# imports
+import sys
+import json
+import argparse
+from typing import Any, Dict, List
+from .suite import run, compare, load
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the benchmark command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmark the receipt calculator.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser: argparse.ArgumentParser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-r", "--receipts", type=int, default=1000)
+    run_parser.add_argument("-i", "--items", type=int, default=20, help="items per receipt")
+    run_parser.add_argument("-u", "--users", type=int, default=3, help="most users per item")
+    run_parser.add_argument("-p", "--people", type=int, default=20, help="distinct people")
+    run_parser.add_argument("-s", "--seed", type=int, default=0)
+    run_parser.add_argument("-n", "--repeat", type=int, default=5, help="runs per benchmark")
+    run_parser.add_argument("--only", nargs="+", default=None, help="benchmarks to run")
+    run_parser.add_argument("-o", "--output", default=None, help="results file (default: stdout)")
+    compare_parser: argparse.ArgumentParser = commands.add_parser(
+        "compare", help="compare two results files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                                help="slowdown that counts as a regression (default: 0.1)")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return 1 if compare(load(args.base), load(args.head), args.threshold) else 0
+
+    results: Dict[str, Any] = run(args.receipts, args.items, args.users, args.people, args.seed,
+                                  args.repeat, args.only)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=4)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Times the float settlement engine in `utils/calculator.py` against the exact integer-cents engine
+in `utils/cents.py`, and measures how far the float shares, rounded to cents, drift from the
+rounded receipt totals.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.cents [--receipts 100] [--items 1000] [--repeat 5]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/cents.py
+# imports
+import sys
+import random
+import timeit
+import argparse
+from typing import Any, Dict, Iterable, List
+from utils import calculator, cents  # type: ignore
+from utils.models import Receipt, Item  # type: ignore
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def make_receipts(receipts: int = 100, items: int = 1000) -> List[Receipt]:
+    """Returns random receipts (seeded, so every run gets the same ones) shared between 20 people,
+    with a mix of tax and tip rates."""
+
+    rng: random.Random = random.Random(0)
+    people: List[str] = [f"Person {i}" for i in range(20)]
+    made: List[Receipt] = []
+    for n in range(receipts):
+        receipt: Receipt = Receipt(name=f"Receipt {n}", buyer=people[0], payee=None, date=None)
+        receipt.extend(Item(name="Item", users=rng.sample(people, rng.randint(1, 4)),
+                            cost=rng.randint(1, 10000) / 100, tax=rng.choice((0.0, 0.05, 0.13)),
+                            tip=rng.choice((0.0, 0.1, 0.15)), should_tax=rng.random() < 0.8)
+                       for _ in range(items))
+        made.append(receipt)
+    return made
+
+
+def benchmark(receipts: Iterable[Receipt] | None = None, repeat: int = 5) -> Dict[str, Any]:
+    """Times both engines and measures the float engine's drift.
+
+    Args:
+        receipts (Iterable[Receipt] | None, optional): the receipts to settle. Defaults to 100
+        random receipts of 1,000 items each, see `make_receipts()`.
+        repeat (int, optional): how many times to settle them per engine. Defaults to 5.
+
+    Returns:
+        Dict[str, Any]: the best time of each engine in seconds (the float engine both reading
+        its running totals and recalculating them from scratch), and the float engine's worst and
+        summed drift in cents.
+    """
+
+    receipts = list(receipts) if receipts is not None else make_receipts()
+
+    def run_float() -> None:
+        for receipt in receipts:    # type: ignore
+            calculator.total_per_person(receipt)
+            calculator.total_with_tax(receipt)
+
+    def run_float_recalculate() -> None:
+        for receipt in receipts:    # type: ignore
+            receipt.recalculate()
+            calculator.total_per_person(receipt)
+            calculator.total_with_tax(receipt)
+
+    def run_cents() -> None:
+        for receipt in receipts:    # type: ignore
+            cents.total_per_person_cents(receipt)
+
+    drift: List[int] = [abs(sum(cents.to_cents(owed) for owed in
+                                calculator.total_per_person(receipt).values()) -
+                            cents.to_cents(calculator.total_with_tax(receipt))) for receipt in receipts]
+    return {
+        "receipts": len(receipts),
+        "float_seconds": min(timeit.repeat(run_float, number=1, repeat=repeat)),
+        "float_recalculate_seconds": min(timeit.repeat(run_float_recalculate, number=1,
+                                                       repeat=repeat)),
+        "cents_seconds": min(timeit.repeat(run_cents, number=1, repeat=repeat)),
+        "float_max_drift": max(drift, default=0),
+        "float_total_drift": sum(drift)
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints the engine timings and drift.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.cents", description="Compare the float and cents engines.")
+    parser.add_argument("-r", "--receipts", type=int, default=100)
+    parser.add_argument("-i", "--items", type=int, default=1000, help="items per receipt")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    for key, value in benchmark(make_receipts(args.receipts, args.items), args.repeat).items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
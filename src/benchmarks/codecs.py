@@ -0,0 +1,128 @@
+"""Compares the JSON codecs (see `utils/codec.py`) on a large synthetic corpus.
+
+For every codec installed here, times decoding every receipt file to dictionaries, parsing every
+file straight into Receipt objects with `Receipt.from_json()`, and encoding every receipt back to a
+pretty-printed file. The standard library's `json.loads()` followed by `Receipt.from_dict()` is timed
+too, as the baseline the codecs replace. The files are held in memory so disk speed doesn't skew
+the comparison, unless `--directory` points at real receipts.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.codecs [--receipts 5000] [--items 20] [--repeat 5]
+        [--directory data/receipts/] [--output codecs.json]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/codecs.py
+# imports
+import os
+import sys
+import json
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+from utils import codec  # type: ignore
+from utils.models import Receipt  # type: ignore
+from .corpus import make_receipts
+from .suite import measure, _describe
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def load_corpus(directory: str | None = None, **kwargs: Any) -> List[bytes]:
+    """Returns the receipt files of a corpus, unparsed.
+
+    Args:
+        directory (str | None, optional): read every `.json` file in this directory. Defaults to
+        generating a synthetic corpus in memory with `corpus.make_receipts(**kwargs)`, laid out
+        byte for byte like the files `corpus.generate()` writes.
+
+    Returns:
+        List[bytes]: the files' contents.
+    """
+
+    if directory is None:
+        return [json.dumps(data, indent=4).encode("utf-8") for data in make_receipts(**kwargs)]
+    files: List[bytes] = []
+    with os.scandir(directory) as it:
+        for entry in sorted(it, key=lambda e: e.name):
+            if entry.name.endswith(".json") and entry.is_file():
+                with open(entry.path, "rb") as f:
+                    files.append(f.read())
+    return files
+
+
+def compare(files: List[bytes], repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Times every installed codec on the files.
+
+    Args:
+        files (List[bytes]): the receipt files, see `load_corpus()`.
+        repeat (int, optional): how many runs per benchmark. Defaults to 5.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: `measure()`'s timings by benchmark, e.g. `orjson.from_json`.
+    """
+
+    dicts: List[Dict[str, Any]] = [json.loads(data) for data in files]
+    benchmarks: List[Tuple[str, Callable[[], Any]]] = [
+        ("baseline.json_from_dict", lambda: [Receipt.from_dict(json.loads(data)) for data in files])
+    ]
+    for name in codec.available():
+        chosen: codec.Codec = codec.get_codec(name)
+        benchmarks += [
+            (f"{name}.decode", lambda chosen=chosen: [chosen.loads(data) for data in files]),
+            (f"{name}.from_json", lambda name=name: _from_json(name, files)),
+            (f"{name}.encode", lambda chosen=chosen: [chosen.dumps(data, pretty=True)
+                                                      for data in dicts])
+        ]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, fn in benchmarks:
+        results[name] = measure(fn, repeat)
+        print(f"{name}: {_describe(results[name])}", file=sys.stderr)
+    return results
+
+
+def _from_json(name: str, files: List[bytes]) -> List[Receipt]:
+    """Parses every file into a Receipt with the named codec selected."""
+
+    codec.set_codec(name)
+    try:
+        return [Receipt.from_json(data) for data in files]
+    finally:
+        codec.set_codec(None)
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the codec comparison from the command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.codecs", description="Compare the JSON codecs.")
+    parser.add_argument("-r", "--receipts", type=int, default=5000)
+    parser.add_argument("-i", "--items", type=int, default=20, help="items per receipt")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("-d", "--directory", help="time these receipt files instead")
+    parser.add_argument("-o", "--output", help="also write the timings to this JSON file")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    files: List[bytes] = load_corpus(args.directory, receipts=args.receipts, items=args.items,
+                                     seed=args.seed)
+    print(f"{len(files)} receipts, {sum(map(len, files)) / 2 ** 20:.1f} MiB, codecs: "
+          f"{', '.join(codec.available())}", file=sys.stderr)
+    results: Dict[str, Dict[str, Any]] = compare(files, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"receipts": len(files), "results": results}, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""A deterministic generator of synthetic receipt corpora, laid out like `data/receipts/`.
+
+The same parameters and seed always produce byte-for-byte the same files, so timings taken on
+different commits (or machines) are measured against identical data.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.corpus /tmp/corpus [--receipts 1000] [--items 20]
+        [--users 3] [--people 20] [--seed 0]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/corpus.py
+# imports
+import os
+import sys
+import json
+import random
+import argparse
+from typing import Any, Dict, Iterator, List, Tuple
+
+# vars
+TAX_MIX: Tuple[Tuple[float, float], ...] = ((0.13, 0.6), (0.05, 0.2), (0.0, 0.2))  # (rate, weight)
+TIP_MIX: Tuple[Tuple[float, float], ...] = ((0.0, 0.7), (0.1, 0.15), (0.15, 0.15))
+_payees: Tuple[str, ...] = ("Pet Smart", "Amazon Inc.", "Costco", "Loblaws", "Staples", "IKEA")
+_products: Tuple[str, ...] = ("Cat food", "Oranges", "Pencils", "Printer paper", "Dog treats",
+                              "Milk", "Batteries", "Notebook", "Bread", "Lamp")
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def make_receipts(receipts: int = 1000, items: int = 20, users: int = 3, people: int = 20,
+                  tax_mix: Tuple[Tuple[float, float], ...] = TAX_MIX,
+                  tip_mix: Tuple[Tuple[float, float], ...] = TIP_MIX,
+                  seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yields synthetic receipt dictionaries, as stored in `data/receipts/`, with ids 1 to
+    `receipts`.
+
+    Args:
+        receipts (int, optional): how many receipts. Defaults to 1000.
+        items (int, optional): how many items per receipt. Defaults to 20.
+        users (int, optional): the most users per item; each item gets 1 to `users`. Defaults
+        to 3.
+        people (int, optional): how many distinct people appear across the corpus. Defaults to 20.
+        tax_mix (Tuple[Tuple[float, float], ...], optional): (tax rate, weight) pairs items draw
+        their tax from; untaxed items have a rate of 0. Defaults to `TAX_MIX`.
+        tip_mix (Tuple[Tuple[float, float], ...], optional): (tip rate, weight) pairs items draw
+        their tip from. Defaults to `TIP_MIX`.
+        seed (int, optional): the random seed. Defaults to 0.
+
+    Yields:
+        Iterator[Dict[str, Any]]: the receipt dictionaries.
+    """
+
+    rng: random.Random = random.Random(seed)
+    names: List[str] = [f"Person {n}" for n in range(people)]
+    taxes, tax_weights = zip(*tax_mix)
+    tips, tip_weights = zip(*tip_mix)
+    for rid in range(1, receipts + 1):
+        tax_rates: List[float] = rng.choices(taxes, tax_weights, k=items)
+        tip_rates: List[float] = rng.choices(tips, tip_weights, k=items)
+        yield {
+            "name": f"{rng.choice(_payees)} #{rid}",
+            "id": rid,
+            "buyer": rng.choice(names),
+            "payee": rng.choice(_payees),
+            "date": f"{rng.randint(2015, 2025)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}_"
+                    f"{rng.randint(0, 23):02}:{rng.randint(0, 59):02}:{rng.randint(0, 59):02}",
+            "items": [{
+                "name": rng.choice(_products),
+                "users": rng.sample(names, rng.randint(1, min(users, people))),
+                "cost": rng.randint(1, 20000) / 100,
+                "tax": tax,
+                "tip": tip,
+                "shouldTax": tax > 0
+            } for tax, tip in zip(tax_rates, tip_rates)]
+        }
+
+
+def generate(directory: str, **kwargs: Any) -> List[str]:
+    """Writes a synthetic corpus to a directory, one pretty-printed JSON file per receipt like
+    `data/receipts/`. Takes the same keyword arguments as `make_receipts()`.
+
+    Args:
+        directory (str): where to write the receipts; created if missing.
+
+    Returns:
+        List[str]: the paths of the files written.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    paths: List[str] = []
+    for data in make_receipts(**kwargs):
+        path: str = os.path.join(directory, f"receipt_{data['id']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        paths.append(path)
+    return paths
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the corpus generator command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.corpus", description="Generate a synthetic receipt corpus.")
+    parser.add_argument("directory", help="where to write the receipt files")
+    parser.add_argument("-r", "--receipts", type=int, default=1000)
+    parser.add_argument("-i", "--items", type=int, default=20, help="items per receipt")
+    parser.add_argument("-u", "--users", type=int, default=3, help="most users per item")
+    parser.add_argument("-p", "--people", type=int, default=20, help="distinct people")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    paths: List[str] = generate(args.directory, receipts=args.receipts, items=args.items,
+                                users=args.users, people=args.people, seed=args.seed)
+    print(f"Wrote {len(paths)} receipts to {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Times Editor updates on large synthetic receipts, including Tk's own layout work: binding the
+first receipt, switching between receipts, refreshing after editing one item, refreshing when
+nothing changed, and destroying and rebuilding the whole page the way `Root.refresh_editor` used
+to. Needs a display.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.editor [--items 5000] [--repeat 10]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/editor.py
+# imports
+import sys
+import time
+import argparse
+import tkinter as tk
+from typing import Any, Callable, Dict, List
+from pages import Editor  # type: ignore
+from utils.models import Receipt, Item  # type: ignore
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def make_receipt(rid: int, items: int) -> Receipt:
+    """Returns a synthetic receipt with `items` items, each for one to three people."""
+
+    receipt: Receipt = Receipt(name=f"Large receipt {rid}", buyer="A", payee=None, date=None)
+    receipt.uid = rid
+    receipt.extend(Item(name=f"Item {i}", users=["A", "B", "C"][:1 + i % 3], cost=i % 100 + 0.99,
+                        tax=0.13, tip=0.0, should_tax=True) for i in range(items))
+    return receipt
+
+
+def measure_editor_latency(items: int = 5000, repeat: int = 10) -> Dict[str, float]:
+    """Times each kind of Editor update.
+
+    Args:
+        items (int, optional): how many items each receipt has. Defaults to 5000.
+        repeat (int, optional): how many times to time each update; the best time is kept.
+        Defaults to 10.
+
+    Returns:
+        Dict[str, float]: the best time of each kind of update, in milliseconds.
+    """
+
+    root: tk.Tk = tk.Tk()
+    root.geometry("400x600")
+    receipts: List[Receipt] = [make_receipt(1, items), make_receipt(2, items)]
+    callbacks: Dict[str, Callable] = {"save_func": lambda *_: None, "del_func": lambda *_: None,
+                                      "calc_func": lambda *_: None}
+    editor: Editor = Editor(master=root, **callbacks)
+    editor.pack(fill=tk.BOTH, expand=True)
+    root.update()
+
+    def time_update(update: Callable[[], Any]) -> float:
+        start: float = time.perf_counter()
+        update()
+        root.update_idletasks()
+        return (time.perf_counter() - start) * 1000
+
+    def edit() -> None:
+        item: Item = receipts[0][items // 2]   # type: ignore
+        item.cost += 1
+        editor.refresh()
+
+    def rebuild() -> None:
+        nonlocal editor
+        editor.destroy()
+        editor = Editor(master=root, receipt=receipts[0], **callbacks)
+        editor.pack(fill=tk.BOTH, expand=True)
+
+    results: Dict[str, float] = {"bind": time_update(lambda: editor.set_receipt(receipts[0]))}
+    results["switch"] = min(time_update(lambda i=i: editor.set_receipt(receipts[(i + 1) % 2]))
+                            for i in range(repeat))
+    editor.set_receipt(receipts[0])
+    results["edit_one_item"] = min(time_update(edit) for _ in range(repeat))
+    results["no_change"] = min(time_update(editor.refresh) for _ in range(repeat))
+    results["rebuild"] = min(time_update(rebuild) for _ in range(repeat))
+    root.destroy()
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints the Editor update timings.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.editor", description="Time Editor updates on large receipts.")
+    parser.add_argument("-i", "--items", type=int, default=5000, help="items per receipt")
+    parser.add_argument("-n", "--repeat", type=int, default=10)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    for update, milliseconds in measure_editor_latency(args.items, args.repeat).items():
+        print(f"{update}: {milliseconds:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Checks that the headless core imports quickly, without tkinter and without touching any data.
+
+Each module is imported in a fresh interpreter run with `python -X importtime`. The run happens
+inside an empty temporary project root, and an audit hook records every file the import opens or
+lists there. The check fails if any of these happen:
+- the import takes longer than the budget (the best of several runs);
+- anything under `tkinter` (or another GUI module) is loaded;
+- the import reads or lists anything relative to the project root.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.importtime [utils.core ...] [--budget-ms 40] [--repeat 5]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/importtime.py
+# imports
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, List
+
+# vars
+DEFAULT_MODULES: List[str] = ["utils.core"]
+DEFAULT_BUDGET_MS: float = 40.0
+_gui_modules: tuple = ("tkinter", "_tkinter", "utils.widgets", "pages")
+_probe: str = """
+import sys, json, os
+touched = []
+def hook(event, args):
+    if event not in ("open", "os.listdir", "os.scandir", "sqlite3.connect") or not args:
+        return
+    if not isinstance(args[0], (str, bytes, os.PathLike)):
+        return
+    path = os.path.abspath(os.fsdecode(args[0]))
+    if path.startswith(os.getcwd()):
+        touched.append(f"{{event}} {{path}}")
+sys.addaudithook(hook)
+import {module}
+sys.stdout.write(json.dumps({{"modules": sorted(sys.modules), "touched": touched}}))
+"""
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def probe(module: str, src: str) -> Dict[str, Any]:
+    """Imports a module in a fresh interpreter, inside an empty temporary project root.
+
+    Args:
+        module (str): the module to import, e.g. `utils.core`.
+        src (str): the directory holding the project's packages, put on the child's `PYTHONPATH`.
+
+    Raises:
+        RuntimeError: if the import fails.
+
+    Returns:
+        Dict[str, Any]: `milliseconds`, the import's cumulative time as reported by
+        `-X importtime`; `modules`, every module loaded afterwards; and `touched`, the project
+        files the import opened or listed.
+    """
+
+    env: Dict[str, str] = dict(os.environ, PYTHONPATH=src, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("RECEIPTS_INSTRUMENT", None)
+    with tempfile.TemporaryDirectory(prefix="receipt-import-") as root:
+        process: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _probe.format(module=module)],
+            cwd=root, env=env, capture_output=True, text=True, check=False, timeout=60)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+
+    milliseconds: float = 0.0
+    for line in process.stderr.splitlines():    # "import time: self | cumulative | name"
+        fields: List[str] = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            milliseconds = int(fields[1]) / 1000
+    result: Dict[str, Any] = json.loads(process.stdout)
+    result["milliseconds"] = milliseconds
+    return result
+
+
+def check(modules: List[str], budget_ms: float = DEFAULT_BUDGET_MS, repeat: int = 5,
+          src: str | None = None) -> List[str]:
+    """Checks each module against the budget, and that it loads no GUI and touches no data.
+
+    Args:
+        modules (List[str]): the modules to check.
+        budget_ms (float, optional): the most each import may take, in milliseconds. Defaults to
+        `DEFAULT_BUDGET_MS`.
+        repeat (int, optional): how many times to import each module; the fastest counts.
+        Defaults to 5.
+        src (str | None, optional): the directory holding the project's packages. Defaults to the
+        directory this package is in.
+
+    Returns:
+        List[str]: what failed, empty if everything passed.
+    """
+
+    src = src or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    failures: List[str] = []
+    for module in modules:
+        runs: List[Dict[str, Any]] = [probe(module, src) for _ in range(repeat)]
+        best: float = min(run["milliseconds"] for run in runs)
+        gui: List[str] = [name for name in runs[0]["modules"]
+                          if name.split(".")[0] in _gui_modules or name in _gui_modules]
+        touched: List[str] = sorted({path for run in runs for path in run["touched"]})
+        status: str = "ok" if best <= budget_ms and not gui and not touched else "FAIL"
+        print(f"{module}: {best:.1f}ms (budget {budget_ms:.0f}ms), "
+              f"{len(runs[0]['modules'])} modules loaded  {status}")
+        if best > budget_ms:
+            failures.append(f"{module} took {best:.1f}ms to import, over the {budget_ms:.0f}ms budget")
+        if gui:
+            failures.append(f"{module} imports GUI modules: {', '.join(gui)}")
+        if touched:
+            failures.append(f"{module} touches project files on import: {', '.join(touched)}")
+    return failures
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the import check from the command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code, 1 if any check failed.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.importtime",
+        description="Check the headless core imports within budget, without Tk or any I/O.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("-b", "--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    failures: List[str] = check(args.modules, args.budget_ms, args.repeat)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Measures how much memory parsed receipts hold, with `tracemalloc`, on a synthetic corpus.
+
+Every receipt is encoded to JSON up front, then parsed both into plain dictionaries with `json.loads()`
+and into Receipt objects with `Receipt.from_json()`, and the memory each set of parsed receipts still
+holds is reported per item (strings, lists and the receipts themselves included). The corpus is
+seeded, so runs on different commits measure the same receipts.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.memory [--receipts 1] [--items 100000] [--seed 0]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/memory.py
+# imports
+import gc
+import sys
+import json
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List
+from utils.models import Receipt  # type: ignore
+from utils.platform_specific import get_conf  # type: ignore
+from .corpus import make_receipts
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def held_bytes(parse: Callable[[bytes], Any], files: List[bytes]) -> int:
+    """Returns how many bytes the results of parsing every file hold once parsing has finished.
+
+    Args:
+        parse (Callable[[bytes], Any]): parses one file.
+        files (List[bytes]): the encoded receipts.
+
+    Returns:
+        int: the bytes still allocated while the parsed receipts are alive.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start: int = tracemalloc.get_traced_memory()[0]
+        parsed: List[Any] = [parse(data) for data in files]
+        held: int = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    del parsed
+    return held
+
+
+def measure_memory(receipts: int = 1, items: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+    """Measures the memory held by parsed receipts, as dictionaries and as Receipt objects.
+
+    Args:
+        receipts (int, optional): how many receipts. Defaults to 1.
+        items (int, optional): how many items per receipt. Defaults to 100,000.
+        seed (int, optional): the corpus's random seed. Defaults to 0.
+
+    Returns:
+        Dict[str, Any]: the item count, and the bytes held per item by each kind of parsed receipt.
+    """
+
+    get_conf()  # read the config (the default tax) before measuring, not while
+    files: List[bytes] = [json.dumps(data).encode("utf-8") for data in
+                          make_receipts(receipts=receipts, items=items, seed=seed)]
+    count: int = receipts * items
+    return {
+        "items": count,
+        "dict_bytes_per_item": held_bytes(json.loads, files) / count,
+        "receipt_bytes_per_item": held_bytes(Receipt.from_json, files) / count
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints the memory held per item.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.memory", description="Measure the memory held by parsed receipts.")
+    parser.add_argument("-r", "--receipts", type=int, default=1)
+    parser.add_argument("-i", "--items", type=int, default=100_000, help="items per receipt")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    for key, value in measure_memory(args.receipts, args.items, args.seed).items():
+        print(f"{key}: {value:.0f}" if isinstance(value, float) else f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
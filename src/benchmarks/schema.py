@@ -0,0 +1,129 @@
+"""Compares the generated schema functions from `utils/schema.py` with the same checks built from
+per-field closures, which is what `compile_schema()` would otherwise use, on a synthetic corpus.
+
+Each is timed both checking the decoded receipts and building Receipt objects from them, the way
+`Receipt.from_json()` does with the standard library's `json`.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m benchmarks.schema [--receipts 500] [--items 20] [--repeat 7]
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/schema.py
+# imports
+import sys
+import json
+import timeit
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+from utils.schema import ITEM, RECEIPT, Schema, compile_schema  # type: ignore
+from utils.models import Item, _make_item, _make_receipt  # type: ignore
+from .corpus import make_receipts
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def closure_schema(schema: Schema, make: Callable[..., Any] | None = None,
+                   each: Callable[[Any], Any] | None = None, built: type | Tuple[type, ...] = ()
+                   ) -> Callable[[Any], Any]:
+    """Builds the same function as `compile_schema()` from one closure per field instead of
+    generated code."""
+
+    built = built if isinstance(built, tuple) else (built,)
+
+    def type_check(types: Tuple[type, ...], nullable: bool = False) -> Callable[[Any], bool]:
+        if nullable:
+            return lambda value: value is None or type(value) in types
+        return lambda value: type(value) in types
+
+    def each_schema(check: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def convert(value: Any) -> Any:
+            if value is None:
+                return None
+            converted: List[Any] = [e if type(e) in built else check(e) for e in value]
+            return False if None in converted else converted
+        return convert
+
+    def each_type(check: Callable[[Any], bool]) -> Callable[[Any], Any]:
+        return lambda value: value if all(check(e) for e in value or ()) else False
+
+    fields: List[Tuple[str, Callable[[Any], bool], Callable[[Any], Any] | None]] = []
+    for field in schema.fields:
+        convert: Callable[[Any], Any] | None = None
+        if isinstance(field.each, Schema):
+            convert = each_schema(each or closure_schema(field.each))
+        elif field.each is not None:
+            convert = each_type(type_check(field.each))
+        fields.append((field.key, type_check(field.types, field.nullable), convert))
+
+    def check(data: Any) -> Any:
+        if type(data) is not dict:  # pylint: disable=unidiomatic-typecheck
+            return None
+        values: List[Any] = []
+        for key, is_valid, convert in fields:
+            value: Any = data.get(key, check)
+            if value is check or not is_valid(value):
+                return None
+            if convert is not None:
+                value = convert(value)
+                if value is False:
+                    return None
+            values.append(value)
+        return make(*values) if make is not None else True
+
+    return check
+
+
+def compare(receipts: int = 500, items: int = 20, repeat: int = 7) -> Dict[str, float]:
+    """Times both kinds of function checking and building every receipt of a synthetic corpus.
+
+    Args:
+        receipts (int, optional): how many receipts. Defaults to 500.
+        items (int, optional): how many items per receipt. Defaults to 20.
+        repeat (int, optional): how many times to time each; the best time is kept. Defaults to 7.
+
+    Returns:
+        Dict[str, float]: the best time of each, in milliseconds.
+    """
+
+    decoded: List[Dict[str, Any]] = [json.loads(json.dumps(data)) for data in
+                                     make_receipts(receipts=receipts, items=items)]
+    generated_item: Callable[[Any], Any] = compile_schema(ITEM, _make_item)
+    closure_item: Callable[[Any], Any] = closure_schema(ITEM, _make_item)
+    functions: Dict[str, Callable[[Any], Any]] = {
+        "generated.check": compile_schema(RECEIPT),
+        "closures.check": closure_schema(RECEIPT),
+        "generated.build": compile_schema(RECEIPT, _make_receipt, each=generated_item, built=Item),
+        "closures.build": closure_schema(RECEIPT, _make_receipt, each=closure_item, built=Item)
+    }
+    return {name: min(timeit.repeat(lambda function=function: [function(data) for data in decoded],
+                                    number=1, repeat=repeat)) * 1000
+            for name, function in functions.items()}
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints the timings.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.schema", description="Compare generated and closure schemas.")
+    parser.add_argument("-r", "--receipts", type=int, default=500)
+    parser.add_argument("-i", "--items", type=int, default=20, help="items per receipt")
+    parser.add_argument("-n", "--repeat", type=int, default=7)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    for name, milliseconds in compare(args.receipts, args.items, args.repeat).items():
+        print(f"{name}: {milliseconds:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
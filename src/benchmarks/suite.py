@@ -0,0 +1,298 @@
+"""The benchmark suite: times loading, id allocation, per-person splitting and Overview
+construction against a synthetic corpus, and compares result files between commits.
+
+Every benchmark runs inside a temporary project root (`data/receipts/` holding the corpus, plus a
+copy of `etc/`), so the real receipts and config are never touched. Results are plain JSON: the
+best and median time of each benchmark in seconds, the corpus parameters, and the commit, Python
+and platform they were measured on.
+
+Returns:
+    None: N/A
+"""
+#src/benchmarks/suite.py
+# imports
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+from utils import receipt_index, calculator, cents, vectorised  # type: ignore
+from utils.models import Receipt  # type: ignore
+from utils.codec import get_codec  # type: ignore
+from utils.persistence import writer  # type: ignore
+from utils.receipts import get_receipts, get_receipt_headers, last_id, repository  # type: ignore
+from utils.date_index import DateIndex  # type: ignore
+from utils.search_index import SearchIndex  # type: ignore
+from utils.schema import check_files  # type: ignore
+from utils.batch import find_receipts  # type: ignore
+from utils.date_parser import normalise_date, parse_date  # type: ignore
+from .corpus import make_receipts, generate
+
+# vars
+RESULTS_VERSION: int = 1
+_query_words: List[str] = ["cat", "o", "ikea", "bat", "printer pa", "zz"]     # type-ahead prefixes
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Skip(Exception):
+    """Raised by a benchmark that can't run here, e.g. without a display or NumPy."""
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def measure(fn: Callable[[], Any], repeat: int = 5, setup: Callable[[], Any] | None = None
+            ) -> Dict[str, Any]:
+    """Times a function several times, running `setup` untimed before each run.
+
+    Args:
+        fn (Callable[[], Any]): the code to time.
+        repeat (int, optional): how many runs. Defaults to 5.
+        setup (Callable[[], Any] | None, optional): resets state before each run, e.g. to time a
+        cold start. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: the `best` and `median` times in seconds, and how many `runs`.
+    """
+
+    times: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "median": statistics.median(times), "runs": repeat}
+
+
+def run(receipts: int = 1000, items: int = 20, users: int = 3, people: int = 20, seed: int = 0,
+        repeat: int = 5, only: List[str] | None = None) -> Dict[str, Any]:
+    """Generates a corpus in a temporary project root and runs the benchmarks against it.
+
+    Args:
+        receipts (int, optional): how many receipts in the corpus. Defaults to 1000.
+        items (int, optional): how many items per receipt. Defaults to 20.
+        users (int, optional): the most users per item. Defaults to 3.
+        people (int, optional): how many distinct people. Defaults to 20.
+        seed (int, optional): the corpus seed. Defaults to 0.
+        repeat (int, optional): how many runs per benchmark. Defaults to 5.
+        only (List[str] | None, optional): run only the benchmarks with these names. Defaults to
+        every benchmark.
+
+    Returns:
+        Dict[str, Any]: the results, as written by `main()`.
+    """
+
+    params: Dict[str, Any] = {"receipts": receipts, "items": items, "users": users,
+                              "people": people, "seed": seed, "repeat": repeat}
+    meta: Dict[str, Any] = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "codec": get_codec().name,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+    etc: str = os.path.abspath("etc")
+    cwd: str = os.getcwd()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    with tempfile.TemporaryDirectory(prefix="receipt-bench-") as root:
+        generate(os.path.join(root, "data", "receipts"), receipts=receipts, items=items,
+                 users=users, people=people, seed=seed)
+        if os.path.isdir(etc):
+            shutil.copytree(etc, os.path.join(root, "etc"))
+        os.chdir(root)
+        try:
+            for name, (fn, setup) in _benchmarks(params).items():
+                if only and name not in only:
+                    continue
+                try:
+                    results[name] = measure(fn, repeat, setup)
+                except Skip as e:
+                    results[name] = {"skipped": str(e)}
+                print(f"{name}: {_describe(results[name])}", file=sys.stderr)
+        finally:
+            writer.flush()
+            receipt_index.reset()
+            repository.clear()
+            os.chdir(cwd)
+
+    return {"version": RESULTS_VERSION, "meta": meta, "params": params, "results": results}
+
+
+def _benchmarks(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns each benchmark as name -> (timed function, untimed setup or None). Runs with the
+    temporary project root as the working directory."""
+
+    dicts: List[Dict[str, Any]] = list(make_receipts(params["receipts"], params["items"],
+                                                     params["users"], params["people"],
+                                                     seed=params["seed"]))
+    parsed: List[Receipt] = [Receipt.from_dict(data) for data in dicts]   # type: ignore
+    files: List[bytes] = [json.dumps(data, indent=4).encode("utf-8") for data in dicts]
+
+    def cold() -> None:     # no index on disk or in memory, nothing hydrated
+        writer.flush()
+        if os.path.exists("data/index.json"):
+            os.remove("data/index.json")
+        receipt_index.reset()
+        repository.clear()
+
+    def warm() -> None:     # the index is on disk but hasn't been read yet, like a fresh start
+        receipt_index.get_index()
+        writer.flush()
+        receipt_index.reset()
+        repository.clear()
+
+    def split_float() -> None:
+        for receipt in parsed:
+            calculator.total_per_person(receipt)
+            calculator.total_with_tax(receipt)
+
+    def split_recalculate() -> None:
+        for receipt in parsed:
+            receipt.recalculate()
+            calculator.total_per_person(receipt)
+            calculator.total_with_tax(receipt)
+
+    def split_cents() -> None:
+        for receipt in parsed:
+            cents.total_per_person_cents(receipt)
+
+    def split_numpy() -> None:
+        if not vectorised.HAS_NUMPY:
+            raise Skip("NumPy isn't installed")
+        vectorised.total_per_person_batch(parsed)
+
+    def last_id_x1000() -> None:
+        for _ in range(1000):
+            last_id()
+
+    def dates_cold() -> None:   # nothing parsed yet
+        normalise_date.cache_clear()
+        parse_date.cache_clear()
+
+    def dates_between_x1000() -> None:
+        index: DateIndex = repository.dates()
+        for n in range(1000):
+            index.between(f"{2015 + n % 11}-03", f"{2015 + n % 11}-05")
+
+    searching: Dict[str, SearchIndex] = {}
+
+    def search_built() -> None:     # untimed, so only the queries are timed
+        if "index" not in searching:
+            searching["index"] = SearchIndex(dicts)
+
+    def search_x100() -> None:
+        index: SearchIndex = searching["index"]
+        for n in range(100):
+            index.search(f"person {n % params['people']} {_query_words[n % len(_query_words)]}")
+
+    def people_saved() -> None:     # data/people.json is up to date, like a fresh start
+        repository.people()
+        warm()
+
+    def overview_tk() -> None:
+        try:
+            import tkinter as tk    # pylint: disable=import-outside-toplevel
+            from pages import Overview  # pylint: disable=import-outside-toplevel
+            root: tk.Tk = tk.Tk()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            raise Skip(f"no display: {e}") from e
+        try:
+            root.withdraw()
+            overview: Overview = Overview(master=root, calc_func=lambda *_: None,
+                                          del_func=lambda *_: None)
+            overview.pack()
+            root.update_idletasks()
+        finally:
+            root.destroy()
+
+    return {
+        "from_dict": (lambda: [Receipt.from_dict(data) for data in dicts], None),
+        "from_json": (lambda: [Receipt.from_json(data) for data in files], None),
+        "validate_dir": (lambda: list(check_files(find_receipts(["data/receipts/"]), workers=1)), None),
+        "load_cold": (get_receipts, cold),
+        "load_warm": (get_receipts, warm),
+        "index_cold": (get_receipt_headers, cold),
+        "index_warm": (get_receipt_headers, warm),
+        "last_id_cold": (last_id, cold),
+        "last_id_x1000": (last_id_x1000, None),
+        "split_float": (split_float, None),
+        "split_recalculate": (split_recalculate, None),
+        "split_cents": (split_cents, None),
+        "split_numpy": (split_numpy, None),
+        "overview_headers": (get_receipt_headers, None),
+        "dates_build": (lambda: DateIndex(get_receipt_headers()), dates_cold),
+        "dates_between_x1000": (dates_between_x1000, None),
+        "search_build": (lambda: SearchIndex(dicts), None),
+        "search_x100": (search_x100, search_built),
+        "people_rebuild": (lambda: repository.people(rebuild=True), None),
+        "people_reopen": (repository.people, people_saved),
+        "overview_tk": (overview_tk, warm)
+    }
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.1) -> List[str]:
+    """Compares two result files benchmark by benchmark.
+
+    Args:
+        base (Dict[str, Any]): the results to compare against, e.g. from the main branch.
+        head (Dict[str, Any]): the new results.
+        threshold (float, optional): how much slower (as a fraction) counts as a regression.
+        Defaults to 0.1.
+
+    Returns:
+        List[str]: the names of the benchmarks that regressed.
+    """
+
+    if base.get("params") != head.get("params"):
+        print("Warning: the results were measured with different parameters", file=sys.stderr)
+    regressions: List[str] = []
+    print(f"{'benchmark':<20} {'base':>12} {'head':>12} {'change':>8}")
+    for name, result in head["results"].items():
+        before: Dict[str, Any] | None = base["results"].get(name)
+        if before is None or "best" not in before or "best" not in result:
+            print(f"{name:<20} {'-':>12} {'-':>12} {'n/a':>8}")
+            continue
+        change: float = result["best"] / before["best"] - 1 if before["best"] else 0.0
+        flag: str = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20} {before['best'] * 1000:>10.2f}ms {result['best'] * 1000:>10.2f}ms "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def _describe(result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"skipped ({result['skipped']})"
+    return f"best {result['best'] * 1000:.2f}ms, median {result['median'] * 1000:.2f}ms"
+
+
+def _commit() -> str | None:
+    """Returns the current git commit, or None outside a git checkout."""
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load(path: str) -> Dict[str, Any]:
+    """Reads a results file written by `main()`."""
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
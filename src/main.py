@@ -7,11 +7,13 @@ Returns:
 # imports
 import tkinter as tk
 from tkinter.filedialog import askopenfile
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Tuple
 from utils.models import Receipt
 from utils.platform_specific import get_version, get_conf, update_conf, popup
-from utils.receipts import get_receipt_by_id, get_last_receipt # type: ignore
-from utils.calculator import total_with_tax, total_per_person
+from utils.receipts import get_receipt_by_id, get_last_receipt, save_receipt # type: ignore
+from utils.tasks import runner
+from utils.watcher import DirectoryWatcher
+from utils import instrumentation
 from pages import Overview, Editor
 
 
@@ -22,6 +24,7 @@ class Root(tk.Tk):
         tk (tk.Tk): _description_
     """
 
+    @instrumentation.timed("main.Root.startup")
     def __init__(self, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
 
@@ -30,6 +33,8 @@ class Root(tk.Tk):
         self.current_rid: int | None = get_conf()["lastReceipt"]
         self.current_receipt: Receipt | None = None
         self.callback: Any = None   # I hate pylint sometimes
+        self.watcher: DirectoryWatcher = DirectoryWatcher(interval=get_conf().get("watchInterval",
+                                                                                  1000))
 
         self.setup()
         self.layout()
@@ -70,9 +75,13 @@ class Root(tk.Tk):
         menubar.add_cascade(menu=filemenu, label="Receipt")
 
         # receipt overview
-        overview_frame: tk.Frame = Overview(master=self, calc_func=self.calc_receipt,
+        overview_frame: Overview = Overview(master=self, calc_func=self.calc_receipt,
                                             del_func=self.del_current_receipt)
         self.frames["overview"] = overview_frame
+        if get_conf().get("storage", "directory") == "directory" and self.watcher.interval > 0:
+            # pick up receipts added, edited or removed outside the app
+            self.watcher.subscribe(overview_frame.apply_changes)
+            self.watcher.start(self)
 
         # receipt editor
         # editor_frame: tk.Frame = tk.Frame(self) # <== placeholder for the Editor page
@@ -90,8 +99,11 @@ class Root(tk.Tk):
         """
 
         print(f"SHOWING FRAME: {key}")
-        _ = [frame.pack_forget() for frame in self.frames.values()]
-        self.frames[key].pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        with instrumentation.span(f"main.Root.show_frame.{key}"):
+            _ = [frame.pack_forget() for frame in self.frames.values()]
+            self.frames[key].pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+            if instrumentation.enabled():
+                self.update_idletasks()     # so the time includes laying the frame out
         hidden_frames = self.frames.copy()
         hidden_frames.pop(key)
         return hidden_frames
@@ -126,47 +138,61 @@ class Root(tk.Tk):
         """_summary_"""
         return callback
 
-    # NOTE: COMING SOON...
     def save_current_receipt(self, callback: Any = None) -> None:
-        """_summary_"""
-        return callback
+        """Saves the receipt open in the Editor. The write itself happens in the background."""
+        self.callback = callback
+        if self.current_receipt is None:
+            return
+        save_receipt(self.current_receipt)
+        self.current_rid = self.current_receipt.id
+        update_conf("lastReceipt", self.current_rid)
 
     # NOTE: COMING SOON...
-    def del_current_receipt(self, filename: str) -> str:
+    def del_current_receipt(self, rid: int | None = None) -> int | None:
         """_summary_"""
-        return filename
+        return rid
 
-    def calc_receipt(self, receipt: Receipt) -> None:
-        """_summary_"""
+    def calc_receipt(self, receipt: Receipt, result: Tuple[float, Dict[str, float]]) -> None:
+        """Shows the split of a receipt calculated in the background. Called on the main thread by
+        the pages, see `Page.request_calc`."""
+        _total_with_tax, _total_per_person = result
         message: str = f"For receipt: {receipt.name}\n" \
-                f"Total amount: {total_with_tax(receipt)}\n" \
-                f"Average amount per person: {total_with_tax(receipt) / len(receipt.people)}\n" \
+                f"Total amount: {_total_with_tax}\n" \
+                f"Average amount per person: {_total_with_tax / len(_total_per_person)}\n" \
                 f"Total amount per person:\n"
 
-        _total_per_person: Dict[str, float] = total_per_person(receipt)
-        for person in receipt.people:
-            message += f"{person} owes: {_total_per_person[person]}\n"
+        for person, owed in _total_per_person.items():
+            message += f"{person} owes: {owed}\n"
         popup(title=f"Bill split for receipt '{receipt.name}'", message=message)
 
     def refresh_editor(self) -> None:
         """Updates the Editor view for the window with the relevant information
-            if the `self.current_receipt` is set."""
+            if the `self.current_receipt` is set. The Editor is only built the first time; after
+            that it is rebound to the current receipt and only the changed widgets are updated."""
 
-        if self.current_receipt is not None:
-            self.frames["editor"].pack_forget() # remove the old editor frame
-            self.frames["editor"].destroy()
+        if self.current_receipt is None:
+            return
+        editor: Editor | None = self.frames.get("editor")  # type: ignore
+        if editor is None:
             self.frames["editor"] = Editor(master=self, receipt=self.current_receipt,
                                            save_func=self.save_current_receipt,
                                            del_func=self.del_current_receipt,
                                            calc_func=self.calc_receipt)
+        else:
+            editor.set_receipt(self.current_receipt)
 
     def quit(self, callback: Any = None) -> None:
         """Quits the application."""
         self.callback = callback
+        self.watcher.stop()
+        runner.shutdown()   # don't wait on calculations nobody will see
         self.destroy()
         self.quit()
 
 
 if __name__ == "__main__":
-    root = Root()
+    instrumentation.configure(get_conf())
+    with instrumentation.startup_profile(get_conf()):   # no-op unless asked for
+        root = Root()
+        root.update_idletasks()
     root.mainloop()
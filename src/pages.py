@@ -2,12 +2,16 @@
 """
 #src/pages.py
 # imports
+import time
 import tkinter as tk
-from threading import Thread
-from typing import Union, Any, Callable
-from utils.models import Receipt
-from utils.widgets import ScrollableFrame, ReceiptPreview, PlaceholderEntry
-from utils.receipts import get_receipts
+from typing import Union, Any, Callable, Dict, Iterable, List, Tuple
+from utils.models import Receipt, Item
+from utils.widgets import ScrollableFrame, ReceiptPreview, PlaceholderEntry, ItemRow
+from utils.receipts import get_receipt_headers_by_date, get_receipt_by_id, search_receipts
+from utils.receipt_index import Changes
+from utils.calculator import settle, total, total_with_tax
+from utils.tasks import runner
+from utils.instrumentation import timed
 
 
 class Page(tk.Frame):
@@ -19,7 +23,7 @@ class Page(tk.Frame):
     def __init__(self, master: Union[tk.Widget, Any], scrollable: bool, *args, **kwargs):
         super().__init__(master=master, *args, **kwargs)
 
-        self.threads: list[Thread] = []
+        self.calc_func: Callable | None = None
         self.title_label: tk.Label = tk.Label(self, font=("Helvetica", 24))
         if scrollable:
             self.body_frame: ScrollableFrame = ScrollableFrame(self) # type: ignore
@@ -32,39 +36,156 @@ class Page(tk.Frame):
         self.body_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True, side=tk.BOTTOM,
                              anchor=tk.S)
 
+    def request_calc(self, receipt: Receipt | int) -> None:
+        """Calculates a receipt on the shared background executor, then hands the receipt and its
+        `settle()` result to `self.calc_func` on the Tk main thread. Clicking again while the same
+        receipt is still being calculated doesn't start another calculation.
+
+        A receipt is snapshotted with `to_dict()` first and the snapshot is settled, since the Tk
+        main thread may keep editing the receipt while the calculation runs; `calc_func` is still
+        handed the receipt itself. The receipt's `version` is part of the task, so a click after
+        an edit starts a new calculation, and a result for an older version is calculated again
+        rather than shown with the edited receipt.
+
+        Args:
+            receipt (Receipt | int): The receipt to calculate, or its id to load it in the
+            background too.
+        """
+        if isinstance(receipt, int):
+            runner.submit(("calc", receipt), settle_receipt, receipt, owner=self,
+                          on_done=lambda result: self.calc_func(*result))  # type: ignore
+            return
+        version: int = receipt.version
+        snapshot: Dict[str, Any] = receipt.to_dict()
+
+        def done(result: Tuple[Receipt, Tuple[float, Dict[str, float]]]) -> None:
+            if receipt.version == version:
+                self.calc_func(receipt, result[1])
+            elif not runner.in_flight(("calc", snapshot["id"], receipt.version)):  # else a later
+                self.request_calc(receipt)  # click's calculation will show it
+
+        runner.submit(("calc", snapshot["id"], version), settle_receipt, snapshot, owner=self,
+                      on_done=done)
+
+    def destroy(self) -> None:
+        """Drops this page's pending calculations before destroying it."""
+        runner.cancel(self)
+        super().destroy()
+
 
 class Editor(Page):
     """A page that edits and views receipt objects.
 
+    The page is built once and then bound to whichever receipt is open with `set_receipt()`.
+    `refresh()` diffs what is on screen against the receipt and only reconfigures the rows, labels
+    and totals that changed; the item rows are a virtualised list, so a receipt with thousands of
+    items only has a screenful of row widgets.
+
     Args:
         Page (tk.Frame): _description_
     """
-    def __init__(self, master: Union[tk.Widget, Any], receipt: Receipt, save_func: Callable,
-                 del_func: Callable, calc_func: Callable, *args, **kwargs):
+    @timed()
+    def __init__(self, master: Union[tk.Widget, Any], save_func: Callable, del_func: Callable,
+                 calc_func: Callable, receipt: Receipt | None = None, *args, **kwargs):
         super().__init__(master=master, scrollable=False, *args, **kwargs)
 
-        self.title_label.config(text=receipt.name)
+        self.calc_func = calc_func
+        self.receipt: Receipt | None = None
+        self.shown: Dict[str, str] = {}     # widget -> the text it shows
+        self.shown_items: List[Tuple[str, str, str]] = []   # what each item row shows
 
         # body frame
-        self.name_label: tk.Label = tk.Label(self.body_frame, text="Name:")
+        name_frame: tk.Frame = tk.Frame(self.body_frame)
+        name_frame.pack(side=tk.TOP, fill=tk.X)
+        self.name_label: tk.Label = tk.Label(name_frame, text="Name:")
         self.name_label.pack(side=tk.LEFT, padx=5, pady=5)
-        self.name_entry: PlaceholderEntry = PlaceholderEntry(self.body_frame,
-                                                             placeholder=receipt.name)
+        self.name_entry: PlaceholderEntry = PlaceholderEntry(master=name_frame)
         self.name_entry.pack(padx=5, pady=5, side=tk.LEFT, fill=tk.X, expand=True)
 
         control_frame: tk.Frame = tk.Frame(self.body_frame)
-        control_frame.pack(side=tk.BOTTOM, fill=tk.X, expand=True, padx=10, pady=10)
+        control_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=10)
         save_button: tk.Button = tk.Button(control_frame, text="Save", bg="#00FF00",
                                            command=save_func)
         save_button.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.BOTH)
         del_button: tk.Button = tk.Button(control_frame, text="Delete", bg="#FF0000",
-                                          command=del_func)
+                                          command=lambda: del_func(self.receipt.id)    # type: ignore
+                                          if self.receipt is not None else None)
         del_button.pack(side=tk.RIGHT, padx=5, pady=5, fill=tk.BOTH)
         calc_button: tk.Button = tk.Button(control_frame, text="CALCULATE!", bg="#0000FF",
-                                           command=calc_func)
+                                           command=lambda: self.request_calc(self.receipt)   # type: ignore
+                                           if self.receipt is not None else None)
         calc_button.pack(side=tk.BOTTOM, padx=5, pady=5, fill=tk.BOTH, expand=True)
 
+        self.totals_label: tk.Label = tk.Label(self.body_frame, font=("Arial", 12), anchor=tk.E)
+        self.totals_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        self.items_frame: ScrollableFrame = ScrollableFrame(self.body_frame)
+        self.items_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+
         self.draw()
+        if receipt is not None:
+            self.set_receipt(receipt)
+
+    @timed()
+    def set_receipt(self, receipt: Receipt) -> float:
+        """Shows a different receipt, reusing the page's widgets.
+
+        Args:
+            receipt (Receipt): The receipt to edit.
+
+        Returns:
+            float: how long updating the widgets took, in seconds, see `refresh()`.
+        """
+        self.receipt = receipt
+        return self.refresh()
+
+    def refresh(self) -> float:
+        """Brings the page up to date with the bound receipt, reconfiguring only what changed:
+        labels whose text differs, item rows whose item differs (if they are in view), and the
+        list itself only if the number of items changed. Call it after editing the receipt.
+
+        Returns:
+            float: how long updating the widgets took, in seconds.
+        """
+        start: float = time.perf_counter()
+        receipt: Receipt | None = self.receipt
+        if receipt is None:
+            return 0.0
+
+        self._set_text(self.title_label, receipt.name)
+        if self.shown.get("name_entry") != receipt.name:
+            self.name_entry.delete(0, tk.END)
+            self.name_entry.insert(0, receipt.name)
+            self.shown["name_entry"] = receipt.name
+
+        items: List[Tuple[str, str, str]] = [ItemRow.describe(item) for item in receipt
+                                             if isinstance(item, Item)]
+        if len(items) != len(self.shown_items):
+            self.shown_items = items
+            self.items_frame.set_rows(len(items), create=self.create_row, bind=self.bind_row)
+        else:
+            changed: List[int] = [index for index, (old, new) in
+                                  enumerate(zip(self.shown_items, items)) if old != new]
+            self.shown_items = items
+            for index in changed:
+                self.items_frame.refresh_row(index)
+
+        self._set_text(self.totals_label, f"Subtotal: ${total(receipt):.2f}    "
+                                          f"Total: ${total_with_tax(receipt):.2f}")
+        return time.perf_counter() - start
+
+    def _set_text(self, widget: tk.Widget, text: str) -> None:
+        """Configures a widget's text, unless it already shows that text."""
+        if self.shown.get(str(widget)) != text:
+            widget.config(text=text)    # type: ignore
+            self.shown[str(widget)] = text
+
+    def create_row(self, master: tk.Widget, index: int) -> ItemRow:
+        """Creates an item row for the list's pool. It is given its item by `bind_row()`."""
+        return ItemRow(master)
+
+    def bind_row(self, row: ItemRow, index: int) -> None:
+        """Recycles an item row to show the item at an index of the bound receipt."""
+        row.set_item(self.receipt[index])   # type: ignore
 
 
 class Overview(Page):
@@ -73,32 +194,135 @@ class Overview(Page):
     Args:
         Page (tk.Frame): _description_
     """
+    @timed()
     def __init__(self, master: Union[tk.Widget, Any], calc_func: Callable, del_func: Callable,
                  *args, **kwargs):
         super().__init__(master=master, scrollable=True, *args, **kwargs)
 
-        self.calc_func: Callable = calc_func
+        self.calc_func = calc_func
         self.del_func: Callable = del_func
 
         self.title_label.config(text="Receipts")
 
-        for receipt in get_receipts():
-            if isinstance(receipt, Receipt):
-                receipt_frame: tk.Frame = ReceiptPreview(receipt=receipt, calc_func=lambda
-                                                         r=receipt: self.spawn_calc_thread(r),
-                                                         del_func=lambda r=receipt: del_func(r),
-                                                         master=self.body_frame.viewport) # type: ignore
-                receipt_frame.pack(padx=10, pady=10, side=tk.TOP, anchor=tk.N, fill=tk.X,
-                                   expand=True)
+        self.headers: List[Dict[str, Any]] = []
+        self.query: str = ""    # the search the list is showing, "" for every receipt
+        self._search_after: str | None = None
+        self.show(get_receipt_headers_by_date())    # newest first; only the index is read,
+        # receipts are loaded when they are calculated
 
         self.draw()
+        search_frame: tk.Frame = tk.Frame(self)
+        search_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
+        search_label: tk.Label = tk.Label(search_frame, text="Search:")
+        search_label.pack(side=tk.LEFT, padx=5, pady=5)
+        self.search_entry: PlaceholderEntry = PlaceholderEntry(master=search_frame)
+        self.search_entry.pack(padx=5, pady=5, side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
 
-    def spawn_calc_thread(self, receipt: Receipt) -> None:
-        """Spawns a new thread to calculate the specified receipt.
+    @timed()
+    def show(self, headers: Iterable[Dict[str, Any]]) -> None:
+        """Lists receipts by their headers. The list is virtualised, so only the previews in view
+        exist as widgets, however many receipts there are.
 
         Args:
-            receipt (Receipt): The receipt to calculate.
+            headers (Iterable[Dict[str, Any]]): the headers of the receipts to list, in order.
         """
-        thread: Thread = Thread(target=self.calc_func, args=(receipt,))
-        self.threads.append(thread)
-        thread.start()
+
+        self.headers = list(headers)
+        self.body_frame.set_rows(len(self.headers), create=self.create_preview,  # type: ignore
+                                 bind=self.bind_preview)
+
+    def on_search_key(self, _event: Any = None) -> None:
+        """Searches once typing pauses for 150ms, so fast typing doesn't search on every key."""
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(150, self.search)
+
+    def search(self, query: str | None = None) -> None:
+        """Lists only the receipts matching a search, see `receipts.search_receipts()`. The search
+        runs on the background executor (the first one builds the search index), and the list is
+        only updated if the query is still the latest one when it finishes.
+
+        Args:
+            query (str | None, optional): the search. Defaults to what is in the search box.
+        """
+
+        self._search_after = None
+        query = (self.search_entry.get() if query is None else query).strip()
+        if query == self.query:
+            return
+        self.query = query
+        self.refresh_list()
+
+    def refresh_list(self) -> None:
+        """Lists every receipt newest first, or re-runs the current search."""
+
+        if not self.query:
+            self.show(get_receipt_headers_by_date())
+            return
+        runner.submit(("search", self.query), search_receipts, self.query, owner=self,
+                      on_done=lambda headers, query=self.query: self.show(headers)
+                      if query == self.query else None)
+
+    def apply_changes(self, changes: Changes) -> None:
+        """Updates the list with receipts added, changed or removed on disk, see
+        `watcher.DirectoryWatcher`, which has already applied them to the date index. If only
+        receipts in the list changed, and none of their dates did, just their previews are updated
+        (if they are in view); otherwise the list is re-read from the date index, or the current
+        search is run again. Either way, the list keeps its scroll position.
+
+        Args:
+            changes (Changes): what changed.
+        """
+
+        if self.query:  # any change may change what matches
+            self.refresh_list()
+            return
+        positions: Dict[int, int] = {header["id"]: index for index, header in
+                                     enumerate(self.headers)}
+        updated: List[int] = []
+        for header in changes.changed:
+            index: int | None = positions.get(header["id"])
+            if index is None or self.headers[index]["date"] != header["date"]:
+                break
+            self.headers[index] = header
+            updated.append(index)
+        else:
+            if not changes.added and not changes.removed:
+                for index in updated:
+                    self.body_frame.refresh_row(index)  # type: ignore
+                return
+        self.refresh_list()
+
+    def create_preview(self, master: tk.Widget, index: int) -> ReceiptPreview:
+        """Creates a preview for the list's pool. Its buttons are wired up when the list binds it to
+        a receipt with `bind_preview()`."""
+
+        return ReceiptPreview(receipt=self.headers[index], master=master, calc_func=None,
+                              del_func=None)
+
+    def bind_preview(self, preview: ReceiptPreview, index: int) -> None:
+        """Recycles a preview to show the receipt at an index of `self.headers`."""
+
+        header: Dict[str, Any] = self.headers[index]
+        preview.set_receipt(header, calc_func=lambda rid=header["id"]: self.request_calc(rid),
+                            del_func=lambda rid=header["id"]: self.del_func(rid))
+
+
+def settle_receipt(receipt: Receipt | Dict[str, Any] | int
+                   ) -> Tuple[Receipt, Tuple[float, Dict[str, float]]]:
+    """Loads (if given an id) or rebuilds (if given a snapshot) and settles a receipt. Runs on the
+    background executor, so it must not touch any widgets.
+
+    Args:
+        receipt (Receipt | Dict[str, Any] | int): The receipt, a snapshot of it from `to_dict()`,
+        or the id of the stored receipt, to settle.
+
+    Returns:
+        Tuple[Receipt, Tuple[float, Dict[str, float]]]: The receipt and its `settle()` result.
+    """
+    if isinstance(receipt, int):
+        receipt = get_receipt_by_id(receipt)
+    elif isinstance(receipt, dict):
+        receipt = Receipt.from_dict(receipt)    # type: ignore
+    return receipt, settle(receipt)     # type: ignore
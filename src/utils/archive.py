@@ -0,0 +1,417 @@
+"""An immutable, packed binary archive of receipts for cold history, read through `mmap`.
+
+Old receipts are only ever read, and parsing their JSON dominates batch runs over years of
+history. An archive is written once, with `pack()`, and holds:
+    a header: magic, version, and the count and offset of every section below.
+    a string table: every distinct name, user, buyer, payee and date, stored once, as UTF-8.
+    a directory: one fixed-width record per receipt, sorted by id, so lookups are a binary search.
+    item records: one fixed-width record per item, holding its cost, tax and tip as doubles, its
+    name, its users (a run in the user table) and its flags.
+    a user table: the string index of every user of every item.
+
+The file is memory-mapped when opened and nothing else is read up front; a receipt's records are
+only decoded when that receipt is asked for, so touching a handful of receipts in a huge archive
+costs a handful of page faults. `data/archive.rca` is served by `receipts.py` as a read-only tier
+underneath the configured storage backend: a receipt saved to the backend shadows its archived copy.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m utils.archive pack data/receipts/ [--archive data/archive.rca]
+    PYTHONPATH=src python -m utils.archive stats [--archive data/archive.rca]
+
+Raises:
+    ValueError: when a file isn't an archive or is a newer version.
+
+Returns:
+    None: N/A
+"""
+#src/utils/archive.py
+# imports
+import os
+import sys
+import mmap
+import struct
+import bisect
+from threading import RLock
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from .models import Receipt  # type: ignore
+from .codec import get_codec
+from .persistence import atomic_open
+from .platform_specific import get_conf
+
+# vars
+MAGIC: bytes = b"RCPTARC\0"
+VERSION: int = 1
+NONE: int = 0xFFFFFFFF     # the string index of a missing payee / date
+SHOULD_TAX: int = 1         # item flags
+
+_header: struct.Struct = struct.Struct("<8sIIIIIQQQQQ")  # magic, version, receipts, items, users,
+# strings, then the offsets of the string offsets, string data, directory, items and users
+_receipt: struct.Struct = struct.Struct("<qIIIIII")     # id, name, buyer, payee, date, first item,
+# item count
+_item: struct.Struct = struct.Struct("<dddIIHH4x")      # cost, tax, tip, name, first user, user
+# count, flags, padded to keep the doubles 8-byte aligned
+_u32: struct.Struct = struct.Struct("<I")
+_u64: struct.Struct = struct.Struct("<Q")
+_default_path: str = "data/archive.rca"
+_archives: Dict[str, Tuple[Tuple[int, int], "Archive"]] = {}
+_archives_lock: RLock = RLock()
+
+
+# ********************
+# CLASSES
+# ********************
+
+class _Ids:
+    """A read-only sequence view of the directory's ids, for `bisect`."""
+
+    def __init__(self, archive: "Archive"):
+        self.archive: "Archive" = archive
+
+    def __len__(self) -> int:
+        return self.archive.receipts
+
+    def __getitem__(self, index: int) -> int:
+        return struct.unpack_from("<q", self.archive.view, self.archive._directory +
+                                  index * _receipt.size)[0]   # pylint: disable=protected-access
+
+
+class Archive:
+    """A read-only, memory-mapped receipt archive written by `pack()`.
+
+    Args:
+        path (str, optional): the archive file. Defaults to `data/archive.rca`.
+
+    Raises:
+        ValueError: if the file isn't an archive, or is from a newer version.
+    """
+
+    def __init__(self, path: str = _default_path):
+        self.path: str = path
+        self._ids: _Ids = _Ids(self)
+        self._decoded: Dict[int, str] = {}  # string index -> str, for the strings touched so far
+        with open(path, "rb") as f:
+            size: int = os.fstat(f.fileno()).st_size
+            # an empty file can't be mapped, and holds no receipts, e.g. one whose pack was cut short
+            self._map: mmap.mmap | None = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.view: memoryview = memoryview(self._map if self._map is not None else b"")
+        if not size:
+            self.receipts = self.items = self.users = self.strings = 0
+            return
+        if size < _header.size:
+            self.close()
+            raise ValueError(f"'{path}' isn't a receipt archive!")
+
+        magic, version, self.receipts, self.items, self.users, self.strings, \
+            self._string_offsets, self._string_data, self._directory, self._items, self._users = \
+            _header.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' isn't a receipt archive!")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is archive version {version}, newer than {VERSION}!")
+
+    def close(self) -> None:
+        """Unmaps the archive. It can't be read afterwards."""
+        self.view.release()
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def string(self, index: int) -> str | None:
+        """Returns the string at an index of the string table, or None for `NONE`."""
+
+        if index == NONE:
+            return None
+        string: str | None = self._decoded.get(index)
+        if string is None:
+            start, end = struct.unpack_from("<QQ", self.view, self._string_offsets + index * 8)
+            string = str(self.view[self._string_data + start:self._string_data + end], "utf-8")
+            self._decoded[index] = string
+        return string
+
+    def _find(self, rid: int) -> int:
+        """Returns the directory position of a receipt id, or raises KeyError."""
+
+        position: int = bisect.bisect_left(self._ids, rid)
+        if position == self.receipts or self._ids[position] != rid:
+            raise KeyError(rid)
+        return position
+
+    def _record(self, position: int) -> Tuple[int, int, int, int, int, int, int]:
+        return _receipt.unpack_from(self.view, self._directory + position * _receipt.size)
+
+    def ids(self) -> List[int]:
+        """Returns the id of every archived receipt, in ascending order."""
+        return [self._ids[position] for position in range(self.receipts)]
+
+    def last_id(self) -> int:
+        """Returns the greatest archived receipt id, or 0 if there are none."""
+        return self._ids[self.receipts - 1] if self.receipts else 0
+
+    def __contains__(self, rid: object) -> bool:
+        try:
+            return isinstance(rid, int) and self._find(rid) >= 0
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return self.receipts
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        """Returns the header of an archived receipt without touching its items, or None."""
+
+        try:
+            return self._header(self._find(rid))
+        except KeyError:
+            return None
+
+    def _header(self, position: int) -> Dict[str, Any]:
+        rid, name, buyer, payee, date, _, count = self._record(position)
+        return {"id": rid, "name": self.string(name), "date": self.string(date),
+                "buyer": self.string(buyer), "payee": self.string(payee), "items": count}
+
+    def headers(self) -> List[Dict[str, Any]]:
+        """Returns the header of every archived receipt, in ascending id order."""
+        return [self._header(position) for position in range(self.receipts)]
+
+    def _item_rows(self, first: int, count: int) -> Iterator[Tuple[float, float, float, int,
+                                                                    List[str], int]]:
+        """Yields (cost, tax, tip, name, users, flags) for a run of item records, unpacking the
+        records and their users in one call each rather than one per item."""
+
+        if not count:
+            return
+        rows: List[Tuple[float, float, float, int, int, int, int]] = list(_item.iter_unpack(
+            self.view[self._items + first * _item.size:self._items + (first + count) * _item.size]))
+        first_user: int = rows[0][4]
+        user_count: int = rows[-1][4] + rows[-1][5] - first_user
+        decoded: Dict[int, str] = self._decoded
+        users: List[str] = [decoded[index] if index in decoded else self.string(index)  # type: ignore
+                            for index in struct.unpack_from(f"<{user_count}I", self.view,
+                                                            self._users + first_user * 4)]
+        for cost, tax, tip, name, start, length, flags in rows:
+            start -= first_user
+            yield cost, tax, tip, name, users[start:start + length], flags
+
+    def item_records(self, rid: int) -> Iterator[Tuple[float, float, float, bool, List[str]]]:
+        """Yields the (cost, tax, tip, should tax, users) of each item on an archived receipt
+        straight from the mapped records, without building Item objects or decoding item names.
+
+        Raises:
+            KeyError: if no receipt has that id.
+        """
+
+        _, _, _, _, _, first, count = self._record(self._find(rid))
+        for cost, tax, tip, _, users, flags in self._item_rows(first, count):
+            yield cost, tax, tip, bool(flags & SHOULD_TAX), users
+
+    def get_dict(self, rid: int) -> Dict[str, Any]:
+        """Returns an archived receipt as the same dictionary `Receipt.to_dict()` produces.
+
+        Raises:
+            KeyError: if no receipt has that id.
+        """
+
+        return self._dict(self._find(rid))
+
+    def _dict(self, position: int) -> Dict[str, Any]:
+        rid, name, buyer, payee, date, first, count = self._record(position)
+        string = self.string
+        return {"name": string(name), "id": rid, "buyer": string(buyer), "payee": string(payee),
+                "date": string(date), "items": [{
+                    "name": string(item_name),
+                    "users": users,
+                    "cost": cost,
+                    "tax": tax,
+                    "tip": tip,
+                    "shouldTax": bool(flags & SHOULD_TAX)
+                } for cost, tax, tip, item_name, users, flags in self._item_rows(first, count)]}
+
+    def get(self, rid: int) -> Receipt:
+        """Returns an archived receipt as a Receipt, see `get_dict()`."""
+        return Receipt.from_dict(self.get_dict(rid))    # type: ignore
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yields every archived receipt's dictionary, one at a time, in ascending id order."""
+
+        for position in range(self.receipts):
+            yield self._dict(position)
+
+    def __iter__(self) -> Iterator[Receipt]:
+        for data in self.iter_dicts():
+            yield Receipt.from_dict(data)    # type: ignore
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def pack(receipts: Iterable[Dict[str, Any]], path: str = _default_path) -> int:
+    """Writes receipt dictionaries to a new archive, atomically replacing any archive at `path`.
+    Receipts with the same id as an earlier one replace it. The old archive's mapping from
+    `get_archive()` is closed just before it is replaced.
+
+    Args:
+        receipts (Iterable[Dict[str, Any]]): the receipt dictionaries, as from `to_dict()`.
+        path (str, optional): the archive file. Defaults to `data/archive.rca`.
+
+    Returns:
+        int: how many receipts were archived.
+    """
+
+    strings: Dict[str, int] = {}
+
+    def intern(string: str | None) -> int:
+        if string is None:
+            return NONE
+        return strings.setdefault(string, len(strings))
+
+    by_id: Dict[int, Dict[str, Any]] = {data["id"]: data for data in receipts}
+    default_tax: float = get_conf()["defaultTax"]
+    directory: bytearray = bytearray()
+    items: bytearray = bytearray()
+    users: bytearray = bytearray()
+    item_count: int = 0
+    user_count: int = 0
+    for rid in sorted(by_id):
+        data: Dict[str, Any] = by_id[rid]
+        directory += _receipt.pack(rid, intern(data["name"]), intern(data["buyer"]),
+                                   intern(data["payee"]), intern(data["date"]), item_count,
+                                   len(data["items"]))
+        for item in data["items"]:
+            # a null tax or tip in a file means the default, as for `Item`
+            items += _item.pack(item["cost"], item["tax"] if item["tax"] is not None else default_tax,
+                                item["tip"] if item["tip"] is not None else 0.0, intern(item["name"]),
+                                user_count, len(item["users"]),
+                                SHOULD_TAX if item["shouldTax"] else 0)
+            for user in item["users"]:
+                users += _u32.pack(intern(user))
+            user_count += len(item["users"])
+        item_count += len(data["items"])
+
+    encoded: List[bytes] = [string.encode("utf-8") for string in strings]
+    offsets: bytearray = bytearray(_u64.pack(0))
+    end: int = 0
+    for string in encoded:
+        end += len(string)
+        offsets += _u64.pack(end)
+    data_blob: bytes = b"".join(encoded)
+
+    string_offsets: int = _header.size
+    string_data: int = string_offsets + len(offsets)
+    directory_at: int = _align(string_data + len(data_blob))
+    items_at: int = directory_at + len(directory)
+    users_at: int = items_at + len(items)
+    # held until the new file is in place, so the old one isn't mapped again in between
+    with _archives_lock, atomic_open(path, "wb") as f:
+        f.write(_header.pack(MAGIC, VERSION, len(by_id), item_count, user_count, len(strings),
+                             string_offsets, string_data, directory_at, items_at, users_at))
+        f.write(offsets)
+        f.write(data_blob)
+        f.write(bytes(directory_at - string_data - len(data_blob)))
+        f.write(directory)
+        f.write(items)
+        f.write(users)
+        _release(path)  # a file that is still mapped can't be replaced on Windows
+    return len(by_id)
+
+
+def _align(offset: int) -> int:
+    """Rounds an offset up to a multiple of 8, so the fixed-width records stay aligned."""
+    return (offset + 7) & ~7
+
+
+def pack_directory(directory: str = "data/receipts/", path: str = _default_path) -> int:
+    """Archives every receipt file in a per-file receipts directory. The files themselves are left
+    in place; delete them once the archive is in place to move them to the cold tier.
+
+    Args:
+        directory (str, optional): the receipts directory. Defaults to `data/receipts/`.
+        path (str, optional): the archive file. Defaults to `data/archive.rca`.
+
+    Returns:
+        int: how many receipts were archived.
+    """
+
+    def read() -> Iterator[Dict[str, Any]]:
+        with os.scandir(directory) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.name.endswith(".json") and entry.is_file():
+                    with open(entry.path, "rb") as f:
+                        yield get_codec().load(f)
+
+    return pack(read(), path)
+
+
+def _release(path: str) -> None:
+    """Closes and forgets the cached mapping of the archive at `path`, if there is one. Anything
+    still reading it fails rather than reading a file that is being replaced."""
+
+    with _archives_lock:
+        cached: Tuple[Tuple[int, int], Archive] | None = _archives.pop(path, None)
+        if cached is not None:
+            cached[1].close()
+
+
+def get_archive(path: str = _default_path) -> Archive | None:
+    """Returns the archive at `path`, or None if there isn't one. The mapping is opened once and
+    reused until the file is replaced, e.g. by a repack.
+
+    Args:
+        path (str, optional): the archive file. Defaults to `data/archive.rca`.
+
+    Returns:
+        Archive | None: the archive.
+    """
+
+    try:
+        stat: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key: Tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+    with _archives_lock:
+        cached: Tuple[Tuple[int, int], Archive] | None = _archives.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        archive: Archive = Archive(path)
+        _archives[path] = (key, archive)   # the old mapping is released once nothing uses it
+        return archive
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the archive command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    import argparse  # pylint: disable=import-outside-toplevel
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.archive", description="Manage the cold receipt archive.")
+    parser.add_argument("command", choices=("pack", "stats"))
+    parser.add_argument("directory", nargs="?", default="data/receipts/",
+                        help="receipts directory to pack (default: data/receipts/)")
+    parser.add_argument("-a", "--archive", default=_default_path,
+                        help=f"the archive file (default: {_default_path})")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if args.command == "pack":
+        print(f"Archived {pack_directory(args.directory, args.archive)} receipts to {args.archive}")
+    else:
+        with Archive(args.archive) as archive:
+            print(f"{archive.receipts} receipts, {archive.items} items and {archive.strings} "
+                  f"distinct strings in {args.archive} ({os.path.getsize(args.archive)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Headless batch settlement of whole receipt directories on a process pool.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m utils.batch data/receipts/ [more dirs / files / globs...]
+        [--workers N] [--chunk-size N] [--format jsonl|csv] [--engine float|cents|numpy]
+        [--output FILE]
+
+Every receipt file is parsed and settled with `calculator.settle()` on a worker process, and the
+results are streamed out in input order as they complete: one JSON object per receipt for JSON
+Lines, or one row per person per receipt for CSV.
+
+Returns:
+    None: N/A
+"""
+#src/utils/batch.py
+# imports
+import os
+import sys
+import csv
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+from .models import Receipt  # type: ignore
+from .calculator import settle
+from .codec import get_codec
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def find_receipts(patterns: Iterable[str]) -> List[str]:
+    """Expands directories, globs and plain paths into a sorted list of receipt files.
+
+    Args:
+        patterns (Iterable[str]): directories (every `.json` file in them), globs or files.
+
+    Returns:
+        List[str]: the receipt file paths, without duplicates.
+    """
+
+    paths: set[str] = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            with os.scandir(pattern) as it:
+                paths.update(entry.path for entry in it if entry.name.endswith(".json") and
+                             entry.is_file())
+        else:
+            paths.update(glob.glob(pattern, recursive=True) or [pattern])
+    return sorted(paths)
+
+
+def settle_file(path: str, engine: str | None = None) -> Dict[str, Any]:
+    """Parses and settles a single receipt file. Runs on the worker processes.
+
+    Args:
+        path (str): the receipt file.
+        engine (str | None, optional): the engine to settle with, see `calculator.settle()`.
+
+    Returns:
+        Dict[str, Any]: the receipt's details, total and per-person amounts, or an `error`.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            receipt: Receipt = Receipt.from_json(f.read())
+        total, per_person = settle(receipt, engine)
+    except (OSError, ValueError, TypeError) as e:
+        return {"file": path, "error": str(e)}
+    return {
+        "file": path,
+        "id": receipt.id,
+        "name": receipt.name,
+        "buyer": receipt.buyer,
+        "payee": receipt.payee,
+        "date": receipt.date,
+        "total": total,
+        "per_person": per_person
+    }
+
+
+def settle_files(paths: List[str], workers: int | None = None, chunk_size: int = 16,
+                 engine: str | None = None) -> Iterator[Dict[str, Any]]:
+    """Settles receipt files across a process pool, yielding results in input order as soon as
+    they are ready.
+
+    Args:
+        paths (List[str]): the receipt files.
+        workers (int | None, optional): how many processes. Defaults to one per core.
+        chunk_size (int, optional): how many files to hand a worker at a time. Defaults to 16.
+        engine (str | None, optional): the engine to settle with, see `calculator.settle()`.
+
+    Yields:
+        Iterator[Dict[str, Any]]: the result of `settle_file()` for each path.
+    """
+
+    if workers == 1:    # no point paying for a pool
+        yield from (settle_file(path, engine) for path in paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(settle_file, paths, [engine] * len(paths), chunksize=chunk_size)
+
+
+def write_jsonl(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Writes one JSON object per receipt and returns how many receipts failed."""
+
+    errors: int = 0
+    for result in results:
+        errors += "error" in result
+        out.write(get_codec().dumps(result) + "\n")
+    return errors
+
+
+def write_csv(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Writes one row per person per receipt and returns how many receipts failed."""
+
+    errors: int = 0
+    writer = csv.writer(out)
+    writer.writerow(["file", "id", "name", "buyer", "person", "owed", "total", "error"])
+    for result in results:
+        if "error" in result:
+            errors += 1
+            writer.writerow([result["file"], "", "", "", "", "", "", result["error"]])
+            continue
+        for person, owed in result["per_person"].items():
+            writer.writerow([result["file"], result["id"], result["name"], result["buyer"],
+                             person, owed, result["total"], ""])
+    return errors
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the batch command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code, 1 if any receipt couldn't be settled.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.batch", description="Settle receipt files in parallel.")
+    parser.add_argument("paths", nargs="+", help="receipt directories, files or globs")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=16,
+                        help="files handed to a worker at a time (default: 16)")
+    parser.add_argument("-f", "--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("-e", "--engine", choices=("float", "cents", "numpy"), default=None,
+                        help="settlement engine (default: `engine` in etc/conf.json)")
+    parser.add_argument("-o", "--output", default=None, help="output file (default: stdout)")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    results: Iterator[Dict[str, Any]] = settle_files(find_receipts(args.paths), args.workers,
+                                                     args.chunk_size, args.engine)
+    write = write_csv if args.format == "csv" else write_jsonl
+    if args.output is None:
+        errors: int = write(results, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            errors = write(results, out)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""An exact settlement engine that works in integer cents.
+
+Costs are converted to integer cents and tax / tip rates to integers in millionths, so every
+intermediate value is an exact Python int and nothing drifts across large batches. Each person's
+exact share is kept as an integer numerator over a common denominator, and the leftover pennies
+after rounding everyone down are handed out with the largest-remainder method, so the per-person
+amounts always sum to exactly the receipt total.
+
+Raises:
+    ValueError: when there are 0 people to calculate with.
+
+Returns:
+    None: N/A
+"""
+#src/utils/cents.py
+# imports
+import math
+from typing import Dict, List
+from .models import Receipt, Item  # type: ignore
+
+# vars
+RATE_SCALE: int = 1_000_000     # rates are fixed point with 6 decimal places
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def to_cents(amount: float) -> int:
+    """Converts a dollar amount to integer cents, e.g. 16.99 -> 1699."""
+    return round(amount * 100)
+
+
+def to_rate(rate: float) -> int:
+    """Converts a tax / tip rate to integer millionths, e.g. 0.13 -> 130000."""
+    return round(rate * RATE_SCALE)
+
+
+def divide(numerator: int, denominator: int) -> int:
+    """Divides two ints, rounding half away from zero like a till would."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def item_numerator(item: Item) -> int:
+    """Returns the item's cost including tax (if it is taxed) and tip, in millionths of a cent."""
+    multiplier: int = RATE_SCALE + to_rate(item.tip)
+    if item.should_tax:
+        multiplier += to_rate(item.tax)
+    return to_cents(item.cost) * multiplier
+
+
+def total_cents(receipt: Receipt) -> int:
+    """Calculates the total amount of money owed on the receipt excluding taxes or tips, in cents.
+
+    Args:
+        receipt (Receipt): The receipt object to calculate.
+
+    Returns:
+        int: the total in cents.
+    """
+
+    return sum(to_cents(item.cost) for item in receipt if isinstance(item, Item))
+
+
+def total_with_tax_cents(receipt: Receipt) -> int:
+    """Calculates the total amount of money owed on the receipt including tax + tip, in cents.
+    The receipt is rounded once, as a whole, rather than item by item.
+
+    Args:
+        receipt (Receipt): The receipt object to calculate.
+
+    Returns:
+        int: the total in cents.
+    """
+
+    return divide(sum(item_numerator(item) for item in receipt if isinstance(item, Item)),
+                  RATE_SCALE)
+
+
+def total_per_person_cents(receipt: Receipt) -> Dict[str, int]:
+    """Calculates the amount of money owed per person on the receipt in cents, such that the
+    amounts sum to exactly `total_with_tax_cents(receipt)` (given every item has users).
+
+    Args:
+        receipt (Receipt): The receipt object to calculate.
+
+    Raises:
+        ValueError: if there are no people on the receipt.
+
+    Returns:
+        Dict[str, int]: A dictionary of each user and how many cents they owe as the values.
+    """
+
+    items: List[Item] = [item for item in receipt if isinstance(item, Item) and item.users]
+    if not items:
+        raise ValueError("Cannot calculate average with no people!")
+
+    # every share is an exact int over a common denominator: the lcm of how many ways the items
+    # are split (usually tiny, e.g. lcm(1, 2, 3) = 6) times RATE_SCALE
+    ways: int = math.lcm(*{len(item.users) for item in items})
+    denominator: int = RATE_SCALE * ways
+    exact: Dict[str, int] = {}
+    grand: int = 0
+    for item in items:
+        numerator: int = item_numerator(item)
+        grand += numerator
+        share: int = numerator * (ways // len(item.users))
+        for user in item.users:
+            exact[user] = exact.get(user, 0) + share
+
+    return largest_remainder(exact, denominator, divide(grand, RATE_SCALE))
+
+
+def largest_remainder(exact: Dict[str, int], denominator: int, total: int) -> Dict[str, int]:
+    """Rounds exact shares down to whole cents, then gives the pennies left over to the people
+    with the largest remainders until the shares sum to `total`.
+
+    Args:
+        exact (Dict[str, int]): each person's exact share, as a numerator over `denominator`.
+        denominator (int): the common denominator of the shares.
+        total (int): what the rounded shares must sum to, in cents.
+
+    Returns:
+        Dict[str, int]: each person's share in cents.
+    """
+
+    owed: Dict[str, int] = {}
+    remainders: Dict[str, int] = {}
+    for person, numerator in exact.items():
+        owed[person], remainders[person] = divmod(numerator, denominator)
+    leftover: int = total - sum(owed.values())
+    # ties go to the first person alphabetically so results don't depend on item order
+    for person in sorted(remainders, key=lambda p: (-remainders[p], p))[:leftover]:
+        owed[person] += 1
+    return owed
+
+
+def total_per_person(receipt: Receipt) -> Dict[str, float]:
+    """`total_per_person_cents` in dollars, for use in place of `calculator.total_per_person`.
+
+    Args:
+        receipt (Receipt): The receipt object to calculate.
+
+    Returns:
+        Dict[str, float]: A dictionary of each user and how much they owe as the values.
+    """
+
+    return {person: owed / 100 for person, owed in total_per_person_cents(receipt).items()}
+
@@ -0,0 +1,202 @@
+"""A pluggable JSON codec for receipt, index and config files.
+
+Every stored file is read and written through `get_codec()`, which picks the fastest JSON library
+installed: orjson if it is importable, otherwise the standard library's `json`. Set
+`RECEIPTS_JSON_CODEC` to "json" or "orjson" to choose one explicitly, e.g. to compare them (see
+`python -m benchmarks.codecs`). Both read the same files and write valid JSON, but orjson writes
+non-ASCII characters as UTF-8 rather than `\\u` escapes and indents pretty-printed files by 2
+spaces rather than 4.
+
+`loads()` takes an `object_hook` like `json.loads()`, called with every JSON object from the
+innermost out, which is how receipts are parsed straight into Item and Receipt objects (see
+`models.Receipt.from_json()`). The standard library calls it while parsing (`native_hooks`).
+orjson has no hook, so its codec applies it in a generic pass over the parsed objects afterwards;
+callers that know the document's shape can skip that and convert just the objects they need.
+
+Returns:
+    None: N/A
+"""
+#src/utils/codec.py
+# imports
+import os
+import json
+from functools import lru_cache
+from typing import IO, Any, Callable, Dict, List
+
+# vars
+Hook = Callable[[Dict[str, Any]], Any]
+_codecs: Dict[str, "Codec"] = {}
+_selected: str | None = None    # set by `set_codec()`, else `RECEIPTS_JSON_CODEC`, else "auto"
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Codec:
+    """Encodes and decodes JSON with the standard library's `json`."""
+
+    name: str = "json"
+    native_hooks: bool = True  # whether `object_hook` is called while parsing, at no extra cost
+
+    def __init__(self):
+        self._decoders: Dict[Hook | None, json.JSONDecoder] = {}    # reused, one per hook
+
+    def loads(self, data: bytes | str, object_hook: Hook | None = None) -> Any:
+        """Parses a JSON document.
+
+        Args:
+            data (bytes | str): the document, as read from a file in binary or text mode.
+            object_hook (Hook | None, optional): called with every parsed object (innermost
+            first), whose return value replaces it. Defaults to None.
+
+        Raises:
+            ValueError: if the document isn't valid JSON.
+
+        Returns:
+            Any: the parsed value.
+        """
+
+        decoder: json.JSONDecoder | None = self._decoders.get(object_hook)
+        if decoder is None:
+            decoder = self._decoders[object_hook] = json.JSONDecoder(object_hook=object_hook)
+        return decoder.decode(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+    def load(self, file: IO, object_hook: Hook | None = None) -> Any:
+        """Parses a JSON file opened in binary or text mode, see `loads()`."""
+        return self.loads(file.read(), object_hook)
+
+    def dumps(self, value: Any, pretty: bool = False,
+              default: Callable[[Any], Any] | None = None) -> str:
+        """Serialises a value as JSON.
+
+        Args:
+            value (Any): the value to serialise.
+            pretty (bool, optional): whether to indent it, for files people read. Otherwise it is
+            written compactly on one line. Defaults to False.
+            default (Callable[[Any], Any] | None, optional): converts values JSON can't represent,
+            e.g. `dict` for read-only config snapshots. Defaults to None.
+
+        Raises:
+            TypeError: if the value can't be serialised.
+
+        Returns:
+            str: the JSON document.
+        """
+
+        if pretty:
+            return json.dumps(value, indent=4, default=default)
+        return json.dumps(value, separators=(",", ":"), default=default)
+
+
+class OrjsonCodec(Codec):
+    """Encodes and decodes JSON with orjson, several times faster than the standard library."""
+
+    name: str = "orjson"
+    native_hooks: bool = False
+
+    def __init__(self):
+        super().__init__()
+        self.orjson: Any = _orjson()
+        if self.orjson is None:
+            raise ValueError("The orjson codec needs orjson: pip install orjson")
+
+    def loads(self, data: bytes | str, object_hook: Hook | None = None) -> Any:
+        try:
+            value: Any = self.orjson.loads(data)
+        except self.orjson.JSONDecodeError as e:
+            raise ValueError(str(e)) from e
+        return value if object_hook is None else _apply_hook(value, object_hook)
+
+    def dumps(self, value: Any, pretty: bool = False,
+              default: Callable[[Any], Any] | None = None) -> str:
+        option: int = self.orjson.OPT_INDENT_2 if pretty else 0
+        try:
+            return self.orjson.dumps(value, default=default, option=option).decode("utf-8")
+        except self.orjson.JSONEncodeError as e:
+            raise TypeError(str(e)) from e
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _apply_hook(value: Any, object_hook: Hook) -> Any:
+    """Replaces every object in a parsed value by what the hook returns for it, innermost first,
+    like `json.loads(object_hook=...)` does while parsing."""
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                value[key] = _apply_hook(item, object_hook)
+        return object_hook(value)
+    if isinstance(value, list):
+        for index, item in enumerate(value):
+            if isinstance(item, (dict, list)):
+                value[index] = _apply_hook(item, object_hook)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _orjson() -> Any:
+    """Returns the orjson module, or None if it isn't installed. Imported on first use rather than
+    with this module, as importing it takes ~8ms (it loads uuid, zoneinfo and more)."""
+
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+    except ImportError:     # orjson is optional, everything falls back to the standard library
+        return None
+    return orjson
+
+
+def available() -> List[str]:
+    """Returns the names of the codecs that can be used here, fastest last."""
+    return ["json", "orjson"] if _orjson() is not None else ["json"]
+
+
+def get_codec(name: str | None = None) -> Codec:
+    """Returns a codec. Codecs are created once and reused.
+
+    Args:
+        name (str | None, optional): "json", "orjson", or "auto" for orjson if it is installed
+        and `json` otherwise. Defaults to the codec chosen with `set_codec()`, else the
+        `RECEIPTS_JSON_CODEC` environment variable, else "auto".
+
+    Raises:
+        ValueError: if the codec is unknown, or orjson was asked for but isn't installed.
+
+    Returns:
+        Codec: the codec.
+    """
+
+    name = name or _selected or os.environ.get("RECEIPTS_JSON_CODEC") or "auto"
+    codec: Codec | None = _codecs.get(name)
+    if codec is not None:
+        return codec
+    if name == "auto":
+        codec = get_codec("orjson" if _orjson() is not None else "json")
+    elif name == "json":
+        codec = Codec()
+    elif name == "orjson":
+        codec = OrjsonCodec()
+    else:
+        raise ValueError(f"Unknown JSON codec '{name}'!")
+    _codecs[name] = codec
+    return codec
+
+
+def set_codec(name: str | None) -> Codec:
+    """Chooses the codec `get_codec()` returns from now on, e.g. to benchmark one.
+
+    Args:
+        name (str | None): the codec, see `get_codec()`; None to go back to the default.
+
+    Returns:
+        Codec: the codec now in use.
+    """
+
+    global _selected    # pylint: disable=global-statement
+
+    codec: Codec = get_codec(name or os.environ.get("RECEIPTS_JSON_CODEC") or "auto")
+    _selected = name or None
+    return codec
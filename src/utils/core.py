@@ -0,0 +1,56 @@
+"""The headless core of the application: the models, storage and calculator, without any GUI.
+
+Importing this (or any module it re-exports from) performs no I/O and never imports tkinter, so
+scripts and servers without a display can use it directly, e.g.
+    from utils.core import get_receipt_by_id, total_per_person
+
+Nothing is read from disk until it is first asked for: the config on the first `get_conf()`, the
+storage backend on the first receipt access, and the archive on the first lookup; the archive,
+search index and per-person ledger modules aren't even imported until then. Only the GUI
+modules (`main.py`, `pages.py` and `utils/widgets.py`) import tkinter, and `popup()` imports it
+when it is first called. `python -m benchmarks.importtime` checks this stays true and that
+importing the core stays within its time budget.
+
+Returns:
+    None: N/A
+"""
+#src/utils/core.py
+# imports
+from typing import TYPE_CHECKING, Any
+from .models import Receipt, Item  # type: ignore
+from .schema import SchemaError, validate
+from .calculator import average, total, total_with_tax, total_per_person, settle
+from .cents import total_with_tax_cents, total_per_person_cents
+from .storage import Backend, get_backend
+from .receipts import (ReceiptRepository, repository, get_receipt_by_id, get_receipt_headers,
+                       get_receipts, iter_receipts, find_receipts, save_receipt, delete_receipt,
+                       last_id, get_person_totals)
+from .platform_specific import get_conf, update_conf
+
+if TYPE_CHECKING:
+    from .person_ledger import PersonLedger, PersonTotal
+
+# vars
+__all__ = [
+    "Receipt", "Item", "SchemaError", "validate",
+    "average", "total", "total_with_tax", "total_per_person", "settle",
+    "total_with_tax_cents", "total_per_person_cents",
+    "Backend", "get_backend",
+    "ReceiptRepository", "repository", "get_receipt_by_id", "get_receipt_headers", "get_receipts",
+    "iter_receipts", "find_receipts", "save_receipt", "delete_receipt", "last_id",
+    "get_person_totals", "PersonLedger", "PersonTotal",
+    "get_conf", "update_conf"
+]
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def __getattr__(name: str) -> Any:
+    """Imports `PersonLedger` and `PersonTotal` from `person_ledger` when they are first used."""
+
+    if name in ("PersonLedger", "PersonTotal"):
+        from . import person_ledger  # pylint: disable=import-outside-toplevel
+        return getattr(person_ledger, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
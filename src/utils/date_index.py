@@ -0,0 +1,132 @@
+"""A sorted index of receipt headers by date, answering "receipts between X and Y" by bisection.
+
+Each receipt's date is normalised once with `date_parser.normalise_date()` and kept in a sorted
+list of (date, id) pairs, so a range query is two bisections plus the receipts it returns, and
+listing everything in date order is just reading the list. Receipts without a valid date (e.g.
+"Oranges") can't be placed on the timeline; they are kept separately, never match a range, and are
+listed after the dated ones. Receipts are added, replaced and removed one at a time as they are
+saved, deleted or changed on disk, see `receipts.ReceiptRepository.dates()`.
+
+Returns:
+    None: N/A
+"""
+#src/utils/date_index.py
+# imports
+import bisect
+from datetime import datetime
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Tuple
+from .date_parser import normalise_date, date_to_str
+
+# vars
+_after_prefix: str = "\uffff"   # sorts after any normalised date, so a prefix bound is inclusive
+
+
+# ********************
+# CLASSES
+# ********************
+
+class DateIndex:
+    """Receipt headers sorted by date.
+
+    Args:
+        headers (Iterable[Dict[str, Any]], optional): the headers to index, each with at least `id`
+        and `date`. Defaults to none.
+    """
+
+    def __init__(self, headers: Iterable[Dict[str, Any]] = ()):
+        self._lock: RLock = RLock()
+        self._headers: Dict[int, Dict[str, Any]] = {}   # id -> header, dated or not
+        self._dates: Dict[int, str] = {}   # id -> normalised date, for the dated ones
+        self._keys: List[Tuple[str, int]] = []  # (normalised date, id), sorted
+        for header in headers:
+            self._headers[header["id"]] = header
+            date: str | None = normalise_date(header.get("date"))
+            if date is not None:
+                self._dates[header["id"]] = date
+                self._keys.append((date, header["id"]))
+        self._keys.sort()
+
+    def put(self, header: Dict[str, Any]) -> None:
+        """Adds a receipt's header, replacing any header with the same id."""
+
+        with self._lock:
+            self.remove(header["id"])
+            self._headers[header["id"]] = header
+            date: str | None = normalise_date(header.get("date"))
+            if date is not None:
+                self._dates[header["id"]] = date
+                bisect.insort(self._keys, (date, header["id"]))
+
+    def remove(self, rid: int) -> Dict[str, Any] | None:
+        """Removes a receipt's header, if it is indexed.
+
+        Returns:
+            Dict[str, Any] | None: the header that was removed, if any.
+        """
+
+        with self._lock:
+            header: Dict[str, Any] | None = self._headers.pop(rid, None)
+            date: str | None = self._dates.pop(rid, None)
+            if date is not None:
+                index: int = bisect.bisect_left(self._keys, (date, rid))
+                del self._keys[index]
+            return header
+
+    def between(self, start: str | datetime | None = None,
+                end: str | datetime | None = None) -> List[Dict[str, Any]]:
+        """Returns the headers of the receipts dated between start and end, oldest first.
+
+        Args:
+            start (str | datetime | None, optional): the earliest date, inclusive: a datetime, a
+            `%Y-%m-%d_%H:%M:%S` date or any prefix of one, such as "2025-06". Defaults to no limit.
+            end (str | datetime | None, optional): the latest date, inclusive, in the same forms;
+            "2025-06" includes all of June. Defaults to no limit.
+
+        Returns:
+            List[Dict[str, Any]]: the headers. Receipts without a valid date are never included.
+        """
+
+        with self._lock:
+            low: int = 0 if start is None else \
+                bisect.bisect_left(self._keys, (_bound(start),))
+            high: int = len(self._keys) if end is None else \
+                bisect.bisect_left(self._keys, (_bound(end) + _after_prefix,))
+            return [self._headers[rid] for _, rid in self._keys[low:high]]
+
+    def ordered(self, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Returns every header in date order, followed by those without a valid date.
+
+        Args:
+            newest_first (bool, optional): whether the newest receipts come first. Defaults to
+            True.
+
+        Returns:
+            List[Dict[str, Any]]: the headers.
+        """
+
+        with self._lock:
+            keys: Iterable[Tuple[str, int]] = reversed(self._keys) if newest_first else self._keys
+            dated: List[Dict[str, Any]] = [self._headers[rid] for _, rid in keys]
+            return dated + self.undated()
+
+    def undated(self) -> List[Dict[str, Any]]:
+        """Returns the headers of the receipts without a valid date."""
+
+        with self._lock:
+            return [header for rid, header in self._headers.items() if rid not in self._dates]
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self._headers
+
+    def __len__(self) -> int:
+        return len(self._headers)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _bound(value: str | datetime) -> str:
+    """Returns a range bound as a (prefix of a) normalised date."""
+    return date_to_str(value) if isinstance(value, datetime) else value.strip()
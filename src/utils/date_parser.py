@@ -1,11 +1,17 @@
 """Parse datetime objects to strings and vice-versa
 
+Receipt dates are stored as free-form strings, normally `%Y-%m-%d_%H:%M:%S`. `parse_date()` and
+`normalise_date()` read them without `strptime`: the usual format is sliced apart directly, a few
+ISO 8601 variants are accepted as a fallback, and anything else (e.g. "Oranges") is None rather
+than an error. Both are memoised, as the same receipt dates are parsed again on every sort.
+
 Returns:
     None: N/A
 """
 #src/utils/parser.py
 # imports
 from datetime import datetime
+from functools import lru_cache
 
 # vars
 _format: str = "%Y-%m-%d_%H:%M:%S"
@@ -28,10 +34,69 @@ def str_to_date(date: str) -> datetime:
     Args:
         date (str): the string to convert
 
+    Raises:
+        ValueError: if the string isn't a valid date in that format.
+
     Returns:
         datetime: the converted string
     """
-    return datetime.strptime(date, _format)
+    parsed: datetime | None = _parse_fixed(date)
+    return parsed if parsed is not None else datetime.strptime(date, _format)
+
+
+def _parse_fixed(date: str) -> datetime | None:
+    """Parses `%Y-%m-%d_%H:%M:%S` by slicing, or returns None if the string isn't in that format."""
+
+    if len(date) != 19 or date[4] != "-" or date[7] != "-" or date[10] != "_" or \
+            date[13] != ":" or date[16] != ":":
+        return None
+    try:
+        return datetime(int(date[0:4]), int(date[5:7]), int(date[8:10]), int(date[11:13]),
+                        int(date[14:16]), int(date[17:19]))
+    except ValueError:  # not digits, or out of range (e.g. month 13)
+        return None
+
+
+@lru_cache(maxsize=65536)
+def parse_date(date: str | None) -> datetime | None:
+    """Parses a receipt date, tolerating anything that isn't one.
+
+    Args:
+        date (str | None): the date, normally `%Y-%m-%d_%H:%M:%S`. ISO 8601 dates such as
+        "2025-06-07", "2025-06-07 18:15" or "2025-06-07T18:15:30" are accepted too.
+
+    Returns:
+        datetime | None: the (naive) date, or None if there is no date or it can't be parsed.
+    """
+
+    if not isinstance(date, str):
+        return None
+    text: str = date.strip()
+    parsed: datetime | None = _parse_fixed(text)
+    if parsed is not None:
+        return parsed
+    try:
+        return datetime.fromisoformat(text.replace("_", "T")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def normalise_date(date: str | None) -> str | None:
+    """Returns a receipt date in `%Y-%m-%d_%H:%M:%S`, so normalised dates sort chronologically as
+    plain strings.
+
+    Args:
+        date (str | None): the date, see `parse_date()`.
+
+    Returns:
+        str | None: the normalised date, or None if there is no date or it can't be parsed.
+    """
+
+    if isinstance(date, str) and _parse_fixed(date) is not None:
+        return date     # already normalised, skip the round trip
+    parsed: datetime | None = parse_date(date)
+    return None if parsed is None else date_to_str(parsed)
 
 
 def create_date(year: str, month: str, day: int, hour: int, minute: int,
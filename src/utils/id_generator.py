@@ -1,4 +1,4 @@
-"""A module specifically to fetch the last (greatest) id of the receipts in `data/receipts/`
+"""A module specifically to fetch the last (greatest) id of the stored receipts
 
 Raises:
     FileNotFoundError: When the receipts dir is missing
@@ -8,22 +8,14 @@ Returns:
 """
 #src/utils/id_generator.py
 # imports
-import os
-import json
 
 def last_id() -> int:
-    """Returns the last (greatest) receipt ID of the stored receipts in the `data/receipts/`
-        directory."""
+    """Returns the last (greatest) receipt ID of the stored receipts, as reported by the storage
+        backend selected in `etc/conf.json` (the receipt index of `data/receipts/` by default) and
+        the read-only archive at `data/archive.rca`, so new receipts never reuse an archived ID."""
 
-    receipts_dir = 'data/receipts/'
-    if not os.path.exists(receipts_dir):
-        raise FileNotFoundError(f"Directory {receipts_dir} does not exist!")
-
-    receipt_ids = []
-    for filename in os.listdir(receipts_dir):
-        if filename.endswith('.json'):
-            with open(os.path.join(receipts_dir, filename), 'r', encoding="utf-8") as file:
-                receipt = json.load(file)
-                receipt_ids.append(receipt['id'])
-
-    return max(receipt_ids, default=0)
+    # imported here as the backends import `models`, which imports this module
+    from .storage import get_backend    # pylint: disable=import-outside-toplevel
+    from .archive import get_archive    # pylint: disable=import-outside-toplevel
+    archive = get_archive()
+    return max(get_backend().last_id(), archive.last_id() if archive is not None else 0)
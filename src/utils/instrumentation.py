@@ -0,0 +1,287 @@
+"""Opt-in instrumentation: wall time and call counts for the hot paths, plus a cProfile capture of
+startup.
+
+Instrumentation is off unless the `RECEIPTS_INSTRUMENT` environment variable is set (to anything
+but "0" or "false"), or `"instrument": true` is set in `etc/conf.json` and `configure()` is called
+with it at startup, like `main.py` does. While it is off, each instrumented function costs one
+extra call and one flag check, and nothing is recorded. While it is on, the stats are written to
+`data/instrumentation.json` when the process exits, or whenever `dump()` is called, and can be
+printed with:
+    PYTHONPATH=src python -m utils.instrumentation data/instrumentation.json
+
+Setting `RECEIPTS_PROFILE_STARTUP` (or `"profileStartup": true` in `etc/conf.json`) also runs the
+app's startup under cProfile, see `startup_profile()`.
+
+Returns:
+    None: N/A
+"""
+#src/utils/instrumentation.py
+# imports
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+from threading import Lock
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Mapping, TypeVar
+
+if TYPE_CHECKING:
+    import cProfile
+
+# vars
+F = TypeVar("F", bound=Callable[..., Any])
+DUMP_PATH: str = "data/instrumentation.json"
+PROFILE_PATH: str = "data/startup.prof"
+_enabled: bool = False
+_stats: Dict[str, List[float]] = {}     # name -> [calls, total seconds, slowest call in seconds]
+_lock: Lock = Lock()
+_started: str | None = None     # when recording was enabled
+_dump_registered: bool = False
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def enabled() -> bool:
+    """Returns whether instrumentation is recording."""
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    """Turns recording on or off. Turning it on also writes the stats to `DUMP_PATH` at exit.
+
+    Args:
+        on (bool, optional): whether to record. Defaults to True.
+    """
+
+    global _enabled, _started, _dump_registered     # pylint: disable=global-statement
+    if on and not _enabled:
+        _started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _enabled = on
+    if on and not _dump_registered:
+        atexit.register(_dump_at_exit)
+        _dump_registered = True
+
+
+def configure(conf: Mapping[str, Any]) -> None:
+    """Turns recording on if `"instrument"` is set in the config. The environment variable takes
+    effect on import, so this only ever turns recording on.
+
+    Args:
+        conf (Mapping[str, Any]): the config, see `platform_specific.get_conf()`.
+    """
+
+    if conf.get("instrument", False):
+        enable()
+
+
+def record(name: str, seconds: float) -> None:
+    """Adds one call that took `seconds` to the stats under `name`."""
+
+    with _lock:
+        stat: List[float] | None = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            if seconds > stat[2]:
+                stat[2] = seconds
+
+
+def timed(name: str | None = None) -> Callable[[F], F]:
+    """Decorates a function so each call is recorded while instrumentation is on.
+
+    Args:
+        name (str | None, optional): the name to record the calls under. Defaults to the
+        function's module and qualified name, e.g. `utils.calculator.settle`.
+
+    Returns:
+        Callable[[F], F]: the decorator.
+    """
+
+    def decorator(fn: F) -> F:
+        label: str = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start: float = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper  # type: ignore
+    return decorator
+
+
+@contextmanager
+def _span(name: str) -> Iterator[None]:
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def _nothing() -> Iterator[None]:
+    yield
+
+
+def span(name: str) -> Any:
+    """Returns a context manager that records the time spent in its block under `name`, e.g.
+    `with span("frame.overview"): ...`. Records nothing while instrumentation is off.
+
+    Args:
+        name (str): the name to record the block under.
+
+    Returns:
+        Any: the context manager.
+    """
+
+    return _span(name) if _enabled else _nothing()
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Returns a snapshot of the stats: the calls, total, mean and slowest call (in seconds) of
+    everything recorded so far, slowest total first."""
+
+    with _lock:
+        rows: List[tuple] = sorted(_stats.items(), key=lambda row: row[1][1], reverse=True)
+    return {name: {"calls": int(calls), "total": total, "mean": total / calls, "max": slowest}
+            for name, (calls, total, slowest) in rows}
+
+
+def reset() -> None:
+    """Forgets everything recorded so far."""
+
+    with _lock:
+        _stats.clear()
+
+
+def dump(path: str = DUMP_PATH) -> Dict[str, Any]:
+    """Writes the stats to a JSON file.
+
+    Args:
+        path (str, optional): where to write them. Defaults to `DUMP_PATH`.
+
+    Returns:
+        Dict[str, Any]: what was written: when recording started, when it was dumped, the process
+        id and the stats, see `stats()`.
+    """
+
+    report: Dict[str, Any] = {
+        "started": _started,
+        "dumped": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "stats": stats()
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    return report
+
+
+def _dump_at_exit() -> None:
+    if not _stats:
+        return
+    try:
+        dump()
+        print(f"Wrote instrumentation to {DUMP_PATH}")
+    except OSError as e:
+        print(f"Couldn't write instrumentation to {DUMP_PATH}: {e}")
+
+
+@contextmanager
+def startup_profile(conf: Mapping[str, Any] | None = None, path: str = PROFILE_PATH,
+                    top: int = 20) -> Iterator["cProfile.Profile | None"]:
+    """Runs the block under cProfile if `RECEIPTS_PROFILE_STARTUP` is set or the config has
+    `"profileStartup": true`, then writes the profile to `path` (readable with `pstats` or
+    snakeviz) and prints the slowest functions. Does nothing otherwise.
+
+    Args:
+        conf (Mapping[str, Any] | None, optional): the config. Defaults to only checking the
+        environment variable.
+        path (str, optional): where to write the profile. Defaults to `PROFILE_PATH`.
+        top (int, optional): how many functions to print, by cumulative time. Defaults to 20.
+
+    Yields:
+        Iterator[cProfile.Profile | None]: the profiler, or None when not profiling.
+    """
+
+    if not (_flag("RECEIPTS_PROFILE_STARTUP") or (conf or {}).get("profileStartup", False)):
+        yield None
+        return
+    import cProfile  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    import pstats  # pylint: disable=import-outside-toplevel
+    profile: "cProfile.Profile" = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profile.dump_stats(path)
+        print(f"Wrote the startup profile to {path}")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(top)
+
+
+def report(data: Mapping[str, Any]) -> str:
+    """Formats dumped stats as a table, slowest total first.
+
+    Args:
+        data (Mapping[str, Any]): the stats, as written by `dump()`.
+
+    Returns:
+        str: the table.
+    """
+
+    lines: List[str] = [f"{'name':<48} {'calls':>8} {'total':>11} {'mean':>11} {'max':>11}"]
+    for name, stat in data["stats"].items():
+        lines.append(f"{name:<48} {stat['calls']:>8} {stat['total'] * 1000:>9.2f}ms "
+                     f"{stat['mean'] * 1000:>9.3f}ms {stat['max'] * 1000:>9.2f}ms")
+    return "\n".join(lines)
+
+
+def _flag(variable: str) -> bool:
+    """Returns whether an environment variable is set to something other than "", "0" or "false"."""
+    return os.environ.get(variable, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints a dumped stats file as a table.
+
+    Args:
+        argv (List[str] | None, optional): the arguments: the path of the stats file. Defaults to
+        `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    args: List[str] = sys.argv[1:] if argv is None else argv
+    path: str = args[0] if args else DUMP_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            print(report(json.load(f)))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Couldn't read instrumentation from {path}: {e}")
+        return 1
+    return 0
+
+
+# ********************
+# VARIABLES
+# ********************
+
+if _flag("RECEIPTS_INSTRUMENT"):
+    enable()
+
+if __name__ == "__main__":
+    sys.exit(main())
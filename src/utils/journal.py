@@ -0,0 +1,325 @@
+"""An append-only JSON Lines journal of receipts, as an alternative to one file per receipt in
+`data/receipts/`.
+
+Every save appends a `put` record holding the whole receipt and every delete appends a `delete`
+record, so writing never rewrites existing data. Reading keeps only an id -> byte offset table of
+the latest record per receipt and parses receipts one at a time as they are yielded, so streaming a
+huge archive uses constant memory per receipt. Superseded records are dropped by compaction, which
+runs automatically once they make up too much of the file.
+
+Usage (from the project root):
+    PYTHONPATH=src python -m utils.journal migrate [data/receipts/] [--journal data/receipts.jsonl]
+    PYTHONPATH=src python -m utils.journal compact [--journal data/receipts.jsonl]
+    PYTHONPATH=src python -m utils.journal stats [--journal data/receipts.jsonl]
+
+Returns:
+    None: N/A
+"""
+#src/utils/journal.py
+# imports
+import os
+import re
+import sys
+from threading import RLock
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, Union
+from .models import Receipt  # type: ignore
+from .persistence import atomic_open
+from .codec import Codec, get_codec
+
+# vars
+_default_path: str = "data/receipts.jsonl"
+_record_prefix: re.Pattern = re.compile(rb'^\{"op":"(put|delete)","id":(-?\d+)[,}]')  # lets a
+# scan find a record's id without parsing the whole receipt
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Journal:
+    """An append-only JSON Lines file of receipt records.
+
+    Args:
+        path (str, optional): the journal file. Defaults to `data/receipts.jsonl`.
+        compact_ratio (float, optional): compact automatically once more than this fraction of
+        the records are superseded or deleted. Defaults to 0.5.
+    """
+
+    def __init__(self, path: str = _default_path, compact_ratio: float = 0.5):
+        self.path: str = path
+        self.compact_ratio: float = compact_ratio
+        self._offsets: Dict[int, int] = {}  # receipt id -> offset of its latest put record
+        self._records: int = 0      # records scanned so far, live or not
+        self._scanned: int = 0      # how many bytes of the file have been scanned
+        self.generation: int = 0    # bumped whenever the file is rewritten, moving every record
+        self._lock: RLock = RLock()
+
+    def scan(self) -> Dict[int, int]:
+        """Brings the offset table up to date, only reading what was appended since the last scan.
+
+        Returns:
+            Dict[int, int]: the offset of the latest put record of each live receipt.
+        """
+
+        with self._lock:
+            try:
+                size: int = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            if size < self._scanned:    # rewritten behind our back (e.g. compacted elsewhere)
+                self._offsets, self._records, self._scanned = {}, 0, 0
+                self.generation += 1
+            if size == self._scanned:
+                return self._offsets
+
+            with open(self.path, "rb") as f:
+                f.seek(self._scanned)
+                offset: int = self._scanned
+                for line in f:
+                    if not line.endswith(b"\n"):    # a torn final write, ignore it
+                        break
+                    op, rid = _read_prefix(line)
+                    if op == "put":
+                        self._offsets[rid] = offset
+                    elif op == "delete":
+                        self._offsets.pop(rid, None)
+                    self._records += 1
+                    offset += len(line)
+                self._scanned = offset
+            return self._offsets
+
+    def ids(self) -> List[int]:
+        """Returns the ids of every live receipt."""
+        return list(self.scan())
+
+    def last_id(self) -> int:
+        """Returns the greatest live receipt id, or 0 if there are none."""
+        return max(self.scan(), default=0)
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self.scan()
+
+    def __len__(self) -> int:
+        return len(self.scan())
+
+    def get_dict(self, rid: int) -> Dict[str, Any]:
+        """Returns the stored dictionary of the receipt with the specified id.
+
+        Args:
+            rid (int): the id of the receipt.
+
+        Raises:
+            KeyError: if no live receipt has that id.
+
+        Returns:
+            Dict[str, Any]: the receipt dictionary.
+        """
+
+        return get_codec().loads(self._line(rid))["receipt"]
+
+    def get(self, rid: int) -> Receipt:
+        """Returns the Receipt with the specified id, parsed straight from its record, see
+        `Receipt.from_json()`.
+
+        Raises:
+            KeyError: if no live receipt has that id.
+        """
+        return Receipt.from_json(self._line(rid), key="receipt", source=f"{self.path} (receipt {rid})")
+
+    def _line(self, rid: int) -> bytes:
+        """Returns the put record of the receipt with the specified id, unparsed."""
+
+        offset: int = self.scan()[rid]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.readline()
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yields the dictionary of every live receipt, one at a time, in file order."""
+
+        for _, data in self.read_at(sorted(self.scan().values())):
+            yield data
+
+    def read_at(self, offsets: List[int]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yields the receipt dictionary of the put record at each offset, opening the file once.
+
+        Args:
+            offsets (List[int]): offsets of put records, as returned by `scan()`.
+
+        Yields:
+            Iterator[Tuple[int, Dict[str, Any]]]: each offset and its receipt dictionary.
+        """
+
+        codec: Codec = get_codec()
+        for offset, line in self._lines_at(offsets):
+            yield offset, codec.loads(line)["receipt"]
+
+    def _lines_at(self, offsets: List[int]) -> Iterator[Tuple[int, bytes]]:
+        """Yields each offset and the record there, unparsed, opening the file once."""
+
+        if not offsets:
+            return
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield offset, f.readline()
+
+    def __iter__(self) -> Iterator[Receipt]:
+        """Yields every live Receipt, one at a time, so only one is held in memory at once."""
+
+        for offset, line in self._lines_at(sorted(self.scan().values())):
+            yield Receipt.from_json(line, key="receipt", source=f"{self.path} (offset {offset})")
+
+    def put(self, receipt: Union[Receipt, Dict[str, Any]]) -> None:
+        """Appends a receipt, superseding any earlier record with the same id.
+
+        Args:
+            receipt (Union[Receipt, Dict[str, Any]]): the receipt or its dictionary.
+        """
+
+        data: Dict[str, Any] = receipt.to_dict() if isinstance(receipt, Receipt) else receipt
+        self._append({"op": "put", "id": data["id"], "receipt": data})
+
+    def delete(self, rid: int) -> None:
+        """Appends a delete record for the receipt with the specified id.
+
+        Args:
+            rid (int): the id of the receipt.
+        """
+
+        self._append({"op": "delete", "id": rid})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Appends and fsyncs a single record, then compacts if it is worth it."""
+
+        line: bytes = (get_codec().dumps(record) + "\n").encode("utf-8")
+        with self._lock:
+            self.scan()
+            with open(self.path, "ab") as f:
+                if f.tell() > self._scanned:    # a torn final write, which this record would extend
+                    f.truncate(self._scanned)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.scan()
+            if self._records > 16 and \
+                    len(self._offsets) < (1 - self.compact_ratio) * self._records:
+                self.compact()
+
+    def compact(self) -> int:
+        """Atomically rewrites the journal with only the latest record of each live receipt.
+
+        Returns:
+            int: how many records were dropped.
+        """
+
+        with self._lock:
+            offsets: List[int] = sorted(self.scan().values())
+            dropped: int = self._records - len(offsets)
+            with atomic_open(self.path) as target:
+                with open(self.path, "rb") as source:   # closed before the rename, for Windows
+                    for offset in offsets:
+                        source.seek(offset)
+                        target.write(source.readline().decode("utf-8"))
+            self._offsets, self._records, self._scanned = {}, 0, 0
+            self.generation += 1
+            self.scan()
+            return dropped
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _read_prefix(line: bytes) -> Tuple[str | None, int]:
+    """Returns the op and receipt id of a journal line, parsing the whole line only if it wasn't
+    written by `Journal` (and so doesn't start with `{"op":...,"id":...`)."""
+
+    match: re.Match | None = _record_prefix.match(line)
+    if match is not None:
+        return match.group(1).decode("ascii"), int(match.group(2))
+    try:
+        record: Dict[str, Any] = get_codec().loads(line)
+        return record.get("op"), record["id"]
+    except (ValueError, KeyError, TypeError):
+        return None, 0
+
+
+def _complete_length(f: BinaryIO) -> int:
+    """Returns how many bytes of an open journal are whole records, i.e. the offset just past its
+    last newline, reading backwards from the end."""
+
+    position: int = f.seek(0, os.SEEK_END)
+    while position > 0:
+        step: int = min(4096, position)
+        position -= step
+        f.seek(position)
+        newline: int = f.read(step).rfind(b"\n")
+        if newline != -1:
+            return position + newline + 1
+    return 0
+
+
+def migrate(directory: str = "data/receipts/", path: str = _default_path) -> int:
+    """Appends every receipt file in a per-file receipts directory to a journal. The files
+    themselves are left in place.
+
+    Args:
+        directory (str, optional): the receipts directory. Defaults to `data/receipts/`.
+        path (str, optional): the journal file. Defaults to `data/receipts.jsonl`.
+
+    Returns:
+        int: how many receipts were migrated.
+    """
+
+    migrated: int = 0
+    codec: Codec = get_codec()
+    with open(path, "a+b") as journal:
+        journal.truncate(_complete_length(journal))     # drop a torn final write rather than extend it
+        with os.scandir(directory) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                with open(entry.path, "rb") as f:
+                    data: Dict[str, Any] = codec.load(f)
+                journal.write((codec.dumps({"op": "put", "id": data["id"], "receipt": data}) + "\n").encode("utf-8"))
+                migrated += 1
+        journal.flush()
+        os.fsync(journal.fileno())
+    return migrated
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the journal command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    import argparse  # pylint: disable=import-outside-toplevel
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.journal", description="Manage the receipt journal.")
+    parser.add_argument("command", choices=("migrate", "compact", "stats"))
+    parser.add_argument("directory", nargs="?", default="data/receipts/",
+                        help="receipts directory to migrate from (default: data/receipts/)")
+    parser.add_argument("-j", "--journal", default=_default_path,
+                        help=f"the journal file (default: {_default_path})")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    journal: Journal = Journal(args.journal)
+    if args.command == "migrate":
+        print(f"Migrated {migrate(args.directory, args.journal)} receipts to {args.journal}")
+    elif args.command == "compact":
+        print(f"Dropped {journal.compact()} superseded records from {args.journal}")
+    else:
+        journal.scan()
+        print(f"{len(journal)} live receipts in {journal._records} records "  # pylint: disable=protected-access
+              f"({os.path.getsize(args.journal) if os.path.exists(args.journal) else 0} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Nets debts across many receipts and settles them with few transfers.
+
+Each receipt's `buyer` paid for everything on it, so they are owed every other person's share of
+it (as calculated exactly, in cents, by `cents.total_per_person_cents`). Summing that over any
+number of receipts gives each person a single net balance, which is then settled by repeatedly
+matching the largest debtor with the largest creditor off two heaps. That pairing is greedy: it
+usually needs far fewer transfers than there are people, but isn't guaranteed to find the fewest
+(which means finding every group of balances that sums to zero, a subset-sum problem).
+
+Returns:
+    None: N/A
+"""
+#src/utils/ledger.py
+# imports
+import heapq
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+from .models import Receipt  # type: ignore
+from . import cents
+
+# ********************
+# CLASSES
+# ********************
+
+class Transfer(NamedTuple):
+    """A single payment that settles (part of) a debt.
+
+    Args:
+        debtor (str): the person paying.
+        creditor (str): the person being paid.
+        amount (int): how much, in cents.
+    """
+
+    debtor: str
+    creditor: str
+    amount: int
+
+    @property
+    def dollars(self) -> float:
+        """Returns the amount in dollars."""
+        return self.amount / 100
+
+    def __str__(self) -> str:
+        return f"{self.debtor} pays {self.creditor} ${self.amount / 100:.2f}"
+
+
+class Ledger:
+    """Net balances across any number of receipts, in cents. Positive balances are owed money,
+    negative balances owe money, and all balances always sum to zero.
+
+    Args:
+        receipts (Iterable[Receipt], optional): receipts to add straight away. Defaults to ().
+    """
+
+    def __init__(self, receipts: Iterable[Receipt] = ()):
+        self.balances: Dict[str, int] = {}
+        self.receipts: int = 0
+        for receipt in receipts:
+            self.add(receipt)
+
+    def add(self, receipt: Receipt, sign: int = 1) -> None:
+        """Adds a receipt's debts to the balances: everyone on it owes the buyer their share.
+
+        Args:
+            receipt (Receipt): the receipt to add. Receipts with no people on them are ignored.
+            sign (int, optional): 1 to add the receipt, -1 to take it back out. Defaults to 1.
+        """
+
+        if not receipt.people:
+            return
+        for person, owed in cents.total_per_person_cents(receipt).items():
+            if person == receipt.buyer:  # nobody owes themselves
+                continue
+            self.balances[person] = self.balances.get(person, 0) - sign * owed
+            self.balances[receipt.buyer] = self.balances.get(receipt.buyer, 0) + sign * owed
+        self.receipts += sign
+
+    def remove(self, receipt: Receipt) -> None:
+        """Takes a previously added receipt's debts back out of the balances.
+
+        Args:
+            receipt (Receipt): the receipt to remove.
+        """
+
+        self.add(receipt, sign=-1)
+
+    def transfers(self) -> List[Transfer]:
+        """Returns a set of transfers that settles every balance, paired greedily, see `settle()`."""
+        return settle(self.balances)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def settle(balances: Dict[str, int]) -> List[Transfer]:
+    """Settles net balances greedily, with at most one fewer transfer than there are people with a
+    non-zero balance, usually far fewer, though not necessarily the fewest possible.
+
+    Debtors and creditors whose amounts match exactly are paired off first, since each such pair
+    is settled in a single transfer. Everyone else is settled greedily: the largest debtor pays the
+    largest creditor as much as they can, and whoever still has a balance goes back on their heap.
+    Each transfer clears at least one person, so this is O(n log n) in the number of people.
+
+    Args:
+        balances (Dict[str, int]): each person's net balance in cents; must sum to zero.
+
+    Raises:
+        ValueError: if the balances don't sum to zero.
+
+    Returns:
+        List[Transfer]: the transfers, largest first.
+    """
+
+    if sum(balances.values()) != 0:
+        raise ValueError("Balances must sum to zero to be settled!")
+
+    transfers: List[Transfer] = []
+    creditors_by_amount: Dict[int, List[str]] = {}
+    for person, balance in balances.items():
+        if balance > 0:
+            creditors_by_amount.setdefault(balance, []).append(person)
+
+    debtors: List[Tuple[int, str]] = []  # (negative owed, person) as a max-heap on owed
+    for person, balance in balances.items():
+        if balance >= 0:
+            continue
+        matches: List[str] | None = creditors_by_amount.get(-balance)
+        if matches:     # exact match, settled in one transfer
+            transfers.append(Transfer(person, matches.pop(), -balance))
+        else:
+            debtors.append((balance, person))
+    creditors: List[Tuple[int, str]] = [(-amount, person) for amount, people in
+                                        creditors_by_amount.items() for person in people]
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    while debtors and creditors:
+        owed, debtor = heapq.heappop(debtors)
+        due, creditor = heapq.heappop(creditors)
+        amount: int = min(-owed, -due)
+        transfers.append(Transfer(debtor, creditor, amount))
+        if -owed > amount:
+            heapq.heappush(debtors, (owed + amount, debtor))
+        if -due > amount:
+            heapq.heappush(creditors, (due + amount, creditor))
+
+    transfers.sort(key=lambda transfer: -transfer.amount)
+    return transfers
+
+
+def net_balances(receipts: Iterable[Receipt]) -> Dict[str, int]:
+    """Returns each person's net balance across the receipts in cents.
+
+    Args:
+        receipts (Iterable[Receipt]): the receipts to net.
+
+    Returns:
+        Dict[str, int]: positive balances are owed money, negative balances owe money.
+    """
+
+    return Ledger(receipts).balances
+
+
+def minimum_transfers(receipts: Iterable[Receipt]) -> List[Transfer]:
+    """Returns a set of transfers that settles every debt across the receipts, paired greedily, see
+    `settle()`. Despite the name, it isn't guaranteed to be the smallest such set.
+
+    Args:
+        receipts (Iterable[Receipt]): the receipts to settle.
+
+    Returns:
+        List[Transfer]: the transfers, largest first.
+    """
+
+    return Ledger(receipts).transfers()
@@ -2,20 +2,21 @@
 """Contains classes or 'models' for the datastructures / data types stored by the project
 
 Raises:
-    ValueError: if Item.from_dict() is ran with incompatible dictionary keys / values
-    TypeError: if Receipt.from_dict() is ran with incompatible dictionary keys / values
+    SchemaError: if Item.from_dict() or Receipt.from_dict() is ran with incompatible dictionary keys / values (a ValueError and a TypeError, see `schema.py`)
 
 Returns:
     None: N/A
 """
 # imports
-import json
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, List, SupportsIndex, Union
 from .id_generator import last_id   # type: ignore
 from .platform_specific import get_conf   # type: ignore
+from .instrumentation import timed
+from .codec import Codec, get_codec
+from .schema import ITEM, RECEIPT, SchemaError, compile_schema, validate
 
 
-class Item(Dict[str, Any]):
+class Item:
     """A purchased item to be tracked on a Receipt object.
 
         :param name: str, the name / description of the item that was purchased.
@@ -23,10 +24,19 @@ class Item(Dict[str, Any]):
         :param cost: float, the base cost of the item purchased *not* including taxes or fees.
         :param tax: float | None, OPTIONAL, the tax applied to the item purchased. If None, will use the default tax from the config file.
         :param should_tax: bool, whether this item has tax applied to it or not in calculations.
+
+        Assigning to `users`, `cost`, `tax`, `tip` or `should_tax` keeps the running totals of the Receipt holding the item up to date. Replace `users` rather than mutating it in place; a receipt may swap in a copy with its names interned, leaving the list passed in untouched.
         """
 
+    # slotted rather than a dict subclass with a __dict__, so each item holds just its fields instead of
+    # an empty dict plus a __dict__. With users interned per receipt, a parsed 100k-item receipt
+    # measured 767 -> 315 bytes per item (tracemalloc, strings included), see `python -m benchmarks.memory`
+    __slots__ = ("_receipt", "name", "users", "cost", "tax", "tip", "should_tax")
+    _tracked = frozenset(("users", "cost", "tax", "tip", "should_tax"))   # fields the running totals depend on
+
     def __init__(self, name: str, users: List[str], cost: float, tax: float | None = None, tip: float | None = None, should_tax: bool = True):
 
+        self._receipt: Receipt | None = None    # the receipt whose running totals include this item
         self.name: str = name
         self.users: List[str] = users
         self.cost: float = cost
@@ -34,38 +44,66 @@ class Item(Dict[str, Any]):
         self.tip: float = tip if tip is not None else 0.0
         self.should_tax: bool = should_tax
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        receipt: Receipt | None = getattr(self, "_receipt", None)
+        if receipt is None or name not in Item._tracked:
+            object.__setattr__(self, name, value)
+            return
+        receipt._retract(self)  # pylint: disable=protected-access
+        object.__setattr__(self, name, value)
+        receipt._account(self)  # pylint: disable=protected-access
+
+    def __reduce__(self) -> Any:
+        return (Item, (self.name, self.users, self.cost, self.tax, self.tip, self.should_tax))
+
+    @property
+    def total(self) -> float:
+        """Returns the cost of the item including tax (if it is taxed) and tip."""
+        return self.cost * (1 + self.tax + self.tip if self.should_tax else 1 + self.tip)
+
     @staticmethod
     def from_dict(data: dict[str, Any]) -> Union[Dict[str, Any], object]:
-        """Creates a new Receipt object with it's data fields derived from a custom dictionary
+        """Creates a new Item object with it's data fields derived from a custom dictionary, checked against `schema.ITEM`
 
         Args:
-            data (dict[str, Any]): the dictionary to pull receipt info from
+            data (dict[str, Any]): the dictionary to pull item info from
+
+        Raises:
+            SchemaError: listing every field that is missing or of the wrong type, e.g. `$.cost: expected a number, got a string ("12.50")`
 
         Returns:
               object: an Item object instantiated from the provided custom dictionary's values
         """
 
-        try:
-            item: Item = Item(data["name"], data["users"], data["cost"], data["tax"], data["tip"], data["shouldTax"])
-        except KeyError as e:
-            raise ValueError(f"Got unexpected item param: {e}\n - `data` should have `name`: str, `user`: str, `cost`: float, `tax`: float, `tip`: float, `should_tax`: bool!") from e
+        item: Item | None = _build_item(data)
+        if item is None:
+            raise SchemaError(validate(data, ITEM))
         return item
 
     def to_dict(self) -> Dict[str, Any]:
         """Returns the item object as a standard dictionary.
 
         Returns:
-              Dict[str, Any]: The item objects fields as a dictionary: `name`, `user`, `cost`, and `should_tax`.
+              Dict[str, Any]: The item objects fields as a dictionary: `name`, `users`, `cost`, `tax`, `tip` and `shouldTax`, as accepted by `Item.from_dict()`.
         """
 
         return {
             "name": self.name,
             "users": self.users,
             "cost": self.cost,
-            "should_tax": self.should_tax
+            "tax": self.tax,
+            "tip": self.tip,
+            "shouldTax": self.should_tax
         }
 
 
+# the slots' own setters and a bare allocation, so parsed items skip Item.__init__ and
+# Item.__setattr__ (which only matters once an item is on a receipt): 3x faster per item
+_new_item = object.__new__
+_set_receipt, _set_name, _set_users, _set_cost, _set_tax, _set_tip, _set_should_tax = \
+    (getattr(Item, slot).__set__ for slot in Item.__slots__)
+
+
 # NOTE: Added object as a type stored by Receipt to stop PyLint from complaining about appending Item.from_dict() which returns object
 class Receipt(List[Union[Item, object]]):
     """A receipt tracking all child Item objects.
@@ -74,9 +112,20 @@ class Receipt(List[Union[Item, object]]):
     :param buyer: str, the name of the person who paid for all items on the receipt.
     :param payee: str | None, OPTIONAL, the company / person the receipt is from.
     :param date: str | None, OPTIONAL, the date + time the receipt / purchase was made - used soley for end-user.
+
+    The receipt keeps running totals (subtotal, total with tax + tip, each person's debt and the set of people) that are updated as items are added, removed or edited, so reading them never walks the whole receipt.
     """
 
     def __init__(self, name: str, buyer: str, payee: str | None, date: str | None, new: bool = False):
+        super().__init__()
+
+        self.subtotal: float = 0.0      # sum of item costs, excluding taxes or tips
+        self.taxed_total: float = 0.0   # sum of item costs, including tax + tip
+        self.debts: Dict[str, float] = {}   # person -> their share of the taxed total
+        self._people: Dict[str, int] = {}   # person -> how many of the items they are on
+        self._counted: int = 0  # how many items the running totals include
+        self.persons: Dict[str, str] = {}   # interned user names, so each name is stored once
+        self.version: int = 0   # bumped whenever an item is added, removed or edited, so a snapshot can tell it is stale
 
         self.name: str = name
         self.buyer: str = buyer
@@ -94,38 +143,162 @@ class Receipt(List[Union[Item, object]]):
 
     @property
     def items(self) -> List[Union[Item, object]]:
-        """Returns the list of items in the receipt."""
-        return self.copy()
+        """Returns the list of items in the receipt (the receipt itself, not a copy)."""
+        return self
 
     @property
     def people(self) -> List[str]:
         """Returns a list of all people who are on the receipt."""
-        people = list({user for item in self if isinstance(item, Item) for user in item.users})
-        return people
+        return list(self._people)
+
+    def __reduce__(self) -> Any:
+        # rebuilt through __init__ + extend so the running totals are recomputed on unpickling
+        return (Receipt._restore, (self.name, self.buyer, self.payee, self.date, self.is_new,
+                                   getattr(self, "uid", None), list(self)))
 
     @staticmethod
-    def from_dict(data: Union[Dict[str, Any], Any]) -> Union[List[Item], object]:
-        """Instantiates a new Receipt object based on the custom dictionary provided.
+    def _restore(name: str, buyer: str, payee: str | None, date: str | None, new: bool,
+                 uid: int | None, items: List[Union[Item, object]]) -> "Receipt":
+        """Rebuilds a pickled / copied Receipt, see `__reduce__`."""
+        receipt: Receipt = Receipt(name=name, buyer=buyer, payee=payee, date=date, new=new)
+        if uid is not None:
+            receipt.uid = uid
+        receipt.extend(items)
+        return receipt
+
+    def _account(self, item: object) -> None:
+        """Adds an item to the running totals."""
+        if not isinstance(item, Item):
+            return
+        self.version += 1
+        object.__setattr__(item, "_receipt", self)
+        item_total: float = item.total
+        self._counted += 1
+        self.subtotal += item.cost
+        self.taxed_total += item_total
+        if not item.users:
+            return
+        share: float = item_total / len(item.users)
+        users: List[str] = item.users
+        copied: bool = False
+        for i, user in enumerate(users):
+            interned: str = self.persons.setdefault(user, user)
+            if interned is not user:    # share one str object per person across the receipt
+                if not copied:  # into a copy, the caller may still be using their list
+                    users = users[:]
+                    copied = True
+                users[i] = user = interned
+            self.debts[user] = self.debts.get(user, 0.0) + share
+            self._people[user] = self._people.get(user, 0) + 1
+        if copied:
+            object.__setattr__(item, "users", users)
+
+    def _retract(self, item: object) -> None:
+        """Removes an item from the running totals."""
+        if not isinstance(item, Item):
+            return
+        self.version += 1
+        item_total: float = item.total
+        self._counted -= 1
+        self.subtotal -= item.cost
+        self.taxed_total -= item_total
+        if item.users:
+            share: float = item_total / len(item.users)
+            for user in item.users:
+                self._people[user] -= 1
+                if self._people[user]:
+                    self.debts[user] -= share
+                else:   # they're on no other items, drop them rather than keep a rounding error
+                    del self._people[user]
+                    del self.debts[user]
+        if not self._counted:
+            self.subtotal = self.taxed_total = 0.0  # reset rather than keep a rounding error
+
+    def recalculate(self) -> None:
+        """Rebuilds the running totals from scratch, discarding any accumulated rounding error."""
+        self.subtotal = self.taxed_total = 0.0
+        self.debts = {}
+        self._people = {}
+        self._counted = 0
+        for item in self:
+            self._account(item)
+
+    def append(self, item: Union[Item, object]) -> None:
+        super().append(item)
+        self._account(item)
+
+    def extend(self, items: Iterable[Union[Item, object]]) -> None:
+        items = list(items)
+        super().extend(items)
+        for item in items:
+            self._account(item)
+
+    def __iadd__(self, items: Iterable[Union[Item, object]]):  # type: ignore
+        self.extend(items)
+        return self
+
+    def insert(self, index: SupportsIndex, item: Union[Item, object]) -> None:
+        super().insert(index, item)
+        self._account(item)
+
+    def remove(self, item: Union[Item, object]) -> None:
+        super().remove(item)
+        self._detach(item)
+
+    def pop(self, index: SupportsIndex = -1) -> Union[Item, object]:
+        item: Union[Item, object] = super().pop(index)
+        self._detach(item)
+        return item
+
+    def clear(self) -> None:
+        for item in self:
+            if isinstance(item, Item):
+                object.__setattr__(item, "_receipt", None)
+        super().clear()
+        self.recalculate()
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        old: List[Union[Item, object]] = self[index] if isinstance(index, slice) else [self[index]]
+        if isinstance(index, slice):
+            value = list(value)
+        super().__setitem__(index, value)
+        for item in old:
+            self._detach(item)
+        for item in value if isinstance(index, slice) else [value]:
+            self._account(item)
+
+    def __delitem__(self, index: Any) -> None:
+        old: List[Union[Item, object]] = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for item in old:
+            self._detach(item)
+
+    def _detach(self, item: object) -> None:
+        """Removes an item that has left the receipt from the running totals."""
+        self._retract(item)
+        if isinstance(item, Item):
+            object.__setattr__(item, "_receipt", None)
+
+    @staticmethod
+    @timed()
+    def from_dict(data: Union[Dict[str, Any], Any], source: str | None = None) -> Union[List[Item], object]:
+        """Instantiates a new Receipt object based on the custom dictionary provided, checked against `schema.RECEIPT` as it is built.
 
         Args:
             data (Dict[str, Any]): the dictionary with the custom receipt values.
+            source (str | None, optional): where the dictionary came from, e.g. its file, for the error message. Defaults to None.
 
         Raises:
-            TypeError: if the values do not follow: `name`: str, `buyer`: str, `payee`: str, `date`: datetime.datetime, and `items`: List[Item]!
+            SchemaError: listing every field that is missing or of the wrong type, on the receipt and on each of its items: `name`: str, `id`: int, `buyer`: str, `payee`: str | None, `date`: str | None, and `items`: a list of items, see `Item.from_dict()`!
 
         Returns:
             List[Item]: the Receipt object that is returned
         """
-        try:
-            receipt: Receipt = Receipt(name=data['name'], buyer=data['buyer'], payee=data['payee'], date=data['date'])
-            for item in data["items"]:
-                receipt.append(Item.from_dict(item))
-                receipt.uid = data["id"]
-        except KeyError as e:
-            raise TypeError(f'Got unexpected receipt param {e}\n - `data` should have `name`: str, `buyer`: str, `payee`: str, `date`: datetime.datetime, and `items`: List[Item]!') from e
-        return receipt
+
+        return _receipt_from(data, source)
 
     @staticmethod
+    @timed()
     def from_file(file: Any) -> List[Union[List, object]]:
         """Creates a new Receipt object based on file contents.
 
@@ -133,21 +306,40 @@ class Receipt(List[Union[Item, object]]):
             file (Union[SupportsRead[str | bytes], IO[Incomplete]]): the file contents to parse.
 
         Raises:
-            TypeError: _description_
+            SchemaError: if the file isn't valid JSON or isn't a valid receipt, see `from_json()`.
 
         Returns:
-            List[Item]: _description_
+            List[Item]: the parsed receipt.
         """
 
-        data = json.load(file)
-        try:
-            receipt: Receipt = Receipt(name=data["name"], buyer=data["buyer"], payee=data["payee"], date=data["date"])
-            for item in [_ for _ in data["items"] if isinstance(_, dict)]:
-                receipt.append(Item.from_dict(item))
-                receipt.uid = data["id"]
-        except KeyError as e:
-            raise TypeError(f"Got unexpected receipt param {e}\n - `data` should have `name`: str, `buyer`: str, `payee`: str, `date`: datetime.datetime, and `items`: List[Item]!") from e
-        return receipt
+        return Receipt.from_json(file.read(), source=getattr(file, "name", None))
+
+    @staticmethod
+    @timed()
+    def from_json(data: bytes | str, key: str | None = None, source: str | None = None) -> "Receipt":
+        """Parses a stored receipt straight into a Receipt and its Item objects as the JSON is decoded (see `receipt_hook()` and `codec.py`), rather than building the dictionaries `from_dict()` takes first. It is checked against the same schema as `from_dict()`.
+
+        Args:
+            data (bytes | str): the JSON document, as read from a receipt file.
+            key (str | None, optional): the field of the document holding the receipt, e.g. "receipt" for journal records. Defaults to the document itself.
+            source (str | None, optional): where the document came from, e.g. its file, for error messages. Defaults to None.
+
+        Raises:
+            ValueError: if the document isn't valid JSON.
+            SchemaError: if the document isn't a valid receipt, see `from_dict()`.
+
+        Returns:
+            Receipt: the parsed receipt.
+        """
+
+        codec: Codec = get_codec()
+        if codec.native_hooks:
+            receipt: Any = codec.loads(data, object_hook=receipt_hook)
+        else:   # the compiled schema converts the items along with the receipt, cheaper than the codec's generic pass
+            receipt = codec.loads(data)
+        if key is not None and isinstance(receipt, dict):
+            receipt = receipt.get(key)
+        return _receipt_from(receipt, source)
 
     def to_dict(self) -> Dict[str, Any]:
         """Returns a dictionary-like object containing the data from the receipt."""
@@ -157,8 +349,62 @@ class Receipt(List[Union[Item, object]]):
             "buyer": self.buyer,
             "payee": self.payee,
             "date": self.date,
-            "items": self.copy()    # <== should return Item objects which are stored in the list only
+            "items": [item.to_dict() for item in self if isinstance(item, Item)]
         }
 
     def __str__(self) -> str:
         return self.name
+
+
+def receipt_hook(data: Dict[str, Any]) -> Any:
+    """The `object_hook` that turns stored item JSON into Item objects as it is decoded, see `Receipt.from_json()`. Objects are passed innermost first, so a receipt's items are Items by the time its own object is decoded, and only the receipt is left to build. Any other object, or an item that doesn't match `schema.ITEM`, is returned as-is to be reported with its path when the receipt is built.
+
+    Args:
+        data (Dict[str, Any]): a decoded JSON object.
+
+    Returns:
+        Any: an Item for a valid item object, otherwise `data`.
+    """
+
+    if "shouldTax" in data:
+        item: Item | None = _build_item(data)
+        if item is not None:
+            return item
+    return data
+
+
+def _receipt_from(data: Any, source: str | None = None) -> "Receipt":
+    """Builds a Receipt from decoded JSON whose items may already be Items, see `Receipt.from_dict()`."""
+
+    receipt: Receipt | None = _build_receipt(data)
+    if receipt is None:
+        raise SchemaError(validate(data, RECEIPT, built=Item), source)
+    return receipt
+
+
+def _make_item(name: str, users: List[str], cost: float, tax: float | None, tip: float | None, should_tax: bool) -> Item:
+    """Builds an Item from checked values, see `_build_item`."""
+
+    item: Item = _new_item(Item)
+    _set_receipt(item, None)
+    _set_name(item, name)
+    _set_users(item, users)
+    _set_cost(item, cost)
+    _set_tax(item, tax if tax is not None else get_conf()["defaultTax"])
+    _set_tip(item, tip if tip is not None else 0.0)
+    _set_should_tax(item, should_tax)
+    return item
+
+
+def _make_receipt(name: str, rid: int, buyer: str, payee: str | None, date: str | None, items: List[Item]) -> Receipt:
+    """Builds a Receipt from checked values and built Items, see `_build_receipt`."""
+
+    receipt: Receipt = Receipt(name=name, buyer=buyer, payee=payee, date=date)
+    receipt.uid = rid   # set even when there are no items
+    receipt.extend(items)
+    return receipt
+
+
+# the schemas compiled into constructors, which return None rather than raise for invalid data (see `schema.validate()` for why)
+_build_item = compile_schema(ITEM, _make_item)
+_build_receipt = compile_schema(RECEIPT, _make_receipt, each=_build_item, built=Item)
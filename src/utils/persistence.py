@@ -0,0 +1,206 @@
+"""Atomic, coalesced write-behind persistence for config and receipt files.
+
+Writes are queued with `writer.schedule()` and performed on a background thread after a short
+coalescing window, so repeated updates to the same file only hit the disk once and the Tk main
+thread never waits on I/O. Every write goes to a temp file next to the target, is fsynced, and is
+then renamed over the original, so a crash mid-write can never leave a half-written file behind.
+
+Returns:
+    None: N/A
+"""
+#src/utils/persistence.py
+# imports
+import os
+import time
+import atexit
+from contextlib import contextmanager
+from threading import Condition, Thread, current_thread
+from typing import IO, Callable, Dict, Iterator, Tuple
+
+# vars
+_Write = Tuple[Callable[[], str], Callable[[], None] | None, Callable[[Exception], None] | None]
+# a queued write: render, on_written, on_failed, see `WriteBehind.schedule()`
+
+# ********************
+# FUNCTIONS
+# ********************
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w") -> Iterator[IO]:
+    """Opens a temp file next to `path` for writing, then fsyncs it and renames it over `path` once
+    the block exits. If the block raises, the temp file is removed and `path` is left untouched.
+
+    Args:
+        path (str): the file to write.
+        mode (str, optional): "w" to write text, "wb" to write bytes. Defaults to "w".
+
+    Yields:
+        Iterator[IO]: the temp file.
+    """
+
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    directory: str = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.",
+                                    suffix=".tmp")  # .tmp so receipt scans never pick it up
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if hasattr(os, "O_DIRECTORY"):  # make the rename itself durable where the platform allows it
+        dir_fd: int = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write(path: str, payload: str) -> None:
+    """Writes `payload` to `path` atomically: temp file in the same directory, fsync, then rename.
+
+    Args:
+        path (str): the file to write.
+        payload (str): the text to write to it.
+    """
+
+    with atomic_open(path) as f:
+        f.write(payload)
+
+
+# ********************
+# CLASSES
+# ********************
+
+class WriteBehind:
+    """Queues file writes and performs them on a background thread.
+
+    Scheduling a path that already has a pending write replaces it, so only the latest payload is
+    written. The background thread waits `delay` seconds after the first write is scheduled before
+    flushing, which coalesces bursts of updates into a single write per file.
+
+    Args:
+        delay (float, optional): the coalescing window in seconds. Defaults to 0.25.
+    """
+
+    def __init__(self, delay: float = 0.25):
+        self.delay: float = delay
+        self._pending: Dict[str, _Write] = {}
+        # the writes taken by the background thread that haven't started yet
+        self._batch: Dict[str, _Write] = {}
+        self._in_flight: str | None = None  # the path being written right now
+        self._writing: int = 0
+        self._flush_requested: bool = False
+        self._condition: Condition = Condition()
+        self._thread: Thread | None = None
+
+    def schedule(self, path: str, render: Callable[[], str],
+                 on_written: Callable[[], None] | None = None,
+                 on_failed: Callable[[Exception], None] | None = None) -> None:
+        """Queues a write of `path`, replacing any write of the same path that is still pending.
+
+        Args:
+            path (str): the file to write.
+            render (Callable[[], str]): returns the payload; called on the background thread.
+            on_written (Callable[[], None] | None, optional): called on the background thread
+            once the file has been written. Defaults to None.
+            on_failed (Callable[[Exception], None] | None, optional): called on the background
+            thread with the error if rendering or writing the file (or `on_written`) fails.
+            Defaults to None.
+        """
+
+        with self._condition:
+            self._pending[path] = (render, on_written, on_failed)
+            if self._thread is None:    # started on first use, so importing this is free
+                self._thread = Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def cancel(self, path: str) -> bool:
+        """Drops the pending write of `path`, if any, e.g. because the file is being deleted. If
+        `path` is being written right now, waits for that write (and its `on_written`) to finish,
+        so the caller can remove the file without the write re-creating it afterwards.
+
+        Args:
+            path (str): the file whose write to drop.
+
+        Returns:
+            bool: whether a write was dropped before it started.
+        """
+
+        with self._condition:
+            dropped: bool = self._pending.pop(path, None) is not None
+            dropped = self._batch.pop(path, None) is not None or dropped
+            if current_thread() is not self._thread:    # an on_written can't wait for itself
+                self._condition.wait_for(lambda: self._in_flight != path)
+            return dropped
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until every pending write has been performed.
+
+        Args:
+            timeout (float | None, optional): the longest to wait, in seconds. Defaults to None.
+
+        Returns:
+            bool: whether everything was written before the timeout.
+        """
+
+        with self._condition:
+            if self._pending:
+                self._flush_requested = True    # skip the rest of the coalescing window
+                self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._pending and not self._writing,
+                                            timeout=timeout)
+
+    def _run(self) -> None:
+        """The background thread: waits for writes, coalesces them and performs them."""
+
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: bool(self._pending))
+                deadline: float = time.monotonic() + self.delay
+                while not self._flush_requested and time.monotonic() < deadline:
+                    self._condition.wait(timeout=deadline - time.monotonic())   # let more
+                    # updates pile up
+                self._flush_requested = False
+                self._batch, self._pending = self._pending, {}
+                self._writing += 1
+
+            try:
+                while True:
+                    with self._condition:   # taken one at a time, so `cancel()` can drop the rest
+                        if not self._batch:
+                            break
+                        path: str = next(iter(self._batch))
+                        render, on_written, on_failed = self._batch.pop(path)
+                        self._in_flight = path
+                    try:
+                        atomic_write(path, render())
+                        if on_written is not None:
+                            on_written()
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        print(f"Failed to write {path}: {e}")
+                        if on_failed is not None:
+                            on_failed(e)
+                    finally:
+                        with self._condition:
+                            self._in_flight = None
+                            self._condition.notify_all()
+            finally:
+                with self._condition:
+                    self._writing -= 1
+                    self._condition.notify_all()
+
+
+# ********************
+# VARIABLES
+# ********************
+
+writer: WriteBehind = WriteBehind()
+atexit.register(writer.flush)   # never lose queued writes when the app exits
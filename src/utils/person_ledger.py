@@ -0,0 +1,329 @@
+"""A materialised per-person view over every stored receipt: how much each person owes and has
+paid in total, how many receipts they are on, and when they were last on one.
+
+Each receipt's contribution is worked out once, in exact cents with
+`cents.total_per_person_cents()`, and kept by receipt id alongside the running totals. Saving,
+changing or deleting a receipt takes its old contribution back out and adds the new one, so
+nothing else is recalculated (see `receipts.ReceiptRepository.reindex()`). Only a person's last
+activity can need a second look, when the receipt it came from changes or goes away.
+
+The view is persisted to `data/people.json` by the write-behind writer. On startup it is checked
+against the store's headers: only receipts whose header differs (for `data/receipts/`, the file's
+mtime / size) are read again, and receipts that are gone are taken out. The journal and SQLite
+headers carry no mtime, so edits to those outside the app that leave a receipt's name, date,
+buyer, payee and item count alone are only picked up by a rebuild:
+    PYTHONPATH=src python -m utils.person_ledger [--rebuild]
+
+Returns:
+    None: N/A
+"""
+#src/utils/person_ledger.py
+# imports
+import sys
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Set
+from .models import Receipt  # type: ignore
+from .date_parser import normalise_date
+from .persistence import writer
+from .codec import get_codec
+from . import cents
+
+if TYPE_CHECKING:
+    from .ledger import Transfer
+
+# vars
+_ledger_path: str = "data/people.json"
+_ledger_version: int = 1
+_stamp_fields: tuple = ("mtime", "size", "name", "date", "buyer", "payee", "items")
+
+
+# ********************
+# CLASSES
+# ********************
+
+class PersonTotal(NamedTuple):
+    """One person's totals across every stored receipt.
+
+    Args:
+        person (str): the person.
+        owed (int): the sum of their shares of every receipt they are on, in cents.
+        paid (int): the sum of the totals of every receipt they bought, in cents.
+        receipts (int): how many receipts they are on, as a buyer or on an item.
+        last_activity (str | None): the date of the latest of those receipts, normalised to
+        `%Y-%m-%d_%H:%M:%S`, or None if none of them has a valid date.
+    """
+
+    person: str
+    owed: int
+    paid: int
+    receipts: int
+    last_activity: str | None
+
+    @property
+    def balance(self) -> int:
+        """Returns the person's net balance in cents: positive if they are owed money, negative if
+        they owe money, see `ledger.Ledger`."""
+        return self.paid - self.owed
+
+    def __str__(self) -> str:
+        return f"{self.person}: owes ${self.owed / 100:.2f}, paid ${self.paid / 100:.2f} " \
+            f"across {self.receipts} receipts, last on {self.last_activity or 'no date'}"
+
+
+class PersonLedger:
+    """Per-person totals across receipts, updated one receipt at a time.
+
+    Args:
+        receipts (Iterable[Dict[str, Any]], optional): the receipt dictionaries (as stored) to add
+        straight away. Defaults to none.
+    """
+
+    def __init__(self, receipts: Iterable[Dict[str, Any]] = ()):
+        self._lock: RLock = RLock()
+        self._receipts: Dict[int, Dict[str, Any]] = {}  # id -> its contribution, see `contribution()`
+        self._totals: Dict[str, List[Any]] = {}     # person -> [owed, paid, last activity]
+        self._on: Dict[str, Set[int]] = {}  # person -> the ids of the receipts they are on
+        for data in receipts:
+            self.put(data)
+
+    def put(self, data: Dict[str, Any], stamp: List[Any] | None = None) -> None:
+        """Adds a receipt, replacing any receipt with the same id.
+
+        Args:
+            data (Dict[str, Any]): the receipt dictionary, as stored.
+            stamp (List[Any] | None, optional): the receipt's header stamp when it was added, see
+            `reconcile()`. Defaults to None.
+        """
+
+        self._put(data["id"], contribution(data, stamp))
+
+    def _put(self, rid: int, added: Dict[str, Any]) -> None:
+        with self._lock:
+            self.remove(rid)
+            self._receipts[rid] = added
+            date: str | None = added["date"]
+            for person in _people_on(added):
+                totals: List[Any] = self._totals.setdefault(person, [0, 0, None])
+                totals[0] += added["shares"].get(person, 0)
+                if person == added["buyer"]:
+                    totals[1] += added["total"]
+                if date is not None and (totals[2] is None or date > totals[2]):
+                    totals[2] = date
+                self._on.setdefault(person, set()).add(rid)
+
+    def remove(self, rid: int) -> None:
+        """Takes a receipt back out, if it was added."""
+
+        with self._lock:
+            removed: Dict[str, Any] | None = self._receipts.pop(rid, None)
+            if removed is None:
+                return
+            for person in _people_on(removed):
+                on: Set[int] = self._on[person]
+                on.discard(rid)
+                if not on:  # on no other receipt
+                    del self._on[person]
+                    del self._totals[person]
+                    continue
+                totals: List[Any] = self._totals[person]
+                totals[0] -= removed["shares"].get(person, 0)
+                if person == removed["buyer"]:
+                    totals[1] -= removed["total"]
+                if removed["date"] is not None and removed["date"] == totals[2]:   # was their latest
+                    totals[2] = max((self._receipts[other]["date"] for other in on
+                                     if self._receipts[other]["date"] is not None), default=None)
+
+    def reconcile(self, headers: Iterable[Dict[str, Any]],
+                  load: Callable[[int], Dict[str, Any]]) -> int:
+        """Brings the ledger up to date with a store, reading only the receipts whose header
+        changed since they were added, and taking out the receipts that are gone.
+
+        Args:
+            headers (Iterable[Dict[str, Any]]): the header of every stored receipt.
+            load (Callable[[int], Dict[str, Any]]): returns the stored dictionary of a receipt by id.
+
+        Returns:
+            int: how many receipts were added, replaced or taken out.
+        """
+
+        updated: int = 0
+        live: Set[int] = set()
+        for header in headers:
+            rid: int = header["id"]
+            live.add(rid)
+            stamp: List[Any] = make_stamp(header)
+            with self._lock:
+                known: Dict[str, Any] | None = self._receipts.get(rid)
+            if known is not None and known["stamp"] == stamp:
+                continue
+            try:
+                self.put(load(rid), stamp)
+            except (KeyError, OSError, ValueError, TypeError) as e:
+                print(f"Couldn't add receipt {rid} to the per-person totals: {e}")
+                self.remove(rid)
+            updated += 1
+        with self._lock:
+            for rid in [rid for rid in self._receipts if rid not in live]:
+                self.remove(rid)
+                updated += 1
+        return updated
+
+    def get(self, person: str) -> PersonTotal | None:
+        """Returns a person's totals, or None if they aren't on any receipt."""
+
+        with self._lock:
+            totals: List[Any] | None = self._totals.get(person)
+            if totals is None:
+                return None
+            return PersonTotal(person, totals[0], totals[1], len(self._on[person]), totals[2])
+
+    def totals(self) -> Dict[str, PersonTotal]:
+        """Returns everyone's totals, by person in alphabetical order."""
+
+        with self._lock:
+            return {person: PersonTotal(person, owed, paid, len(self._on[person]), last)
+                    for person, (owed, paid, last) in sorted(self._totals.items())}
+
+    def balances(self) -> Dict[str, int]:
+        """Returns everyone's net balance in cents, the same as `ledger.net_balances()` over every
+        receipt."""
+
+        with self._lock:
+            return {person: paid - owed for person, (owed, paid, _) in self._totals.items()}
+
+    def transfers(self) -> List["Transfer"]:
+        """Returns a set of transfers that settles every balance, paired greedily (so not
+        necessarily the fewest), see `ledger.settle()`. Only `python -m utils.person_ledger
+        --transfers` calls it."""
+
+        from .ledger import settle  # pylint: disable=import-outside-toplevel
+        return settle({person: balance for person, balance in self.balances().items() if balance})
+
+    def save(self, path: str = _ledger_path) -> None:
+        """Queues the ledger to be written to `path` by the write-behind writer."""
+
+        writer.schedule(path, self._render)
+
+    def _render(self) -> str:
+        """Serialises the ledger, called on the writer thread."""
+
+        with self._lock:
+            return get_codec().dumps({
+                "version": _ledger_version,
+                "people": {person: {"owed": total.owed, "paid": total.paid,
+                                    "receipts": total.receipts, "lastActivity": total.last_activity}
+                           for person, total in self.totals().items()},
+                "receipts": {str(rid): added for rid, added in self._receipts.items()}
+            })
+
+    @staticmethod
+    def load(path: str = _ledger_path) -> "PersonLedger":
+        """Reads a ledger written by `save()`. The running totals are summed again from the stored
+        contributions, which reads no receipts.
+
+        Args:
+            path (str, optional): the file to read. Defaults to `data/people.json`.
+
+        Returns:
+            PersonLedger: the ledger, empty if the file is missing, unreadable or from an older
+            version.
+        """
+
+        ledger: PersonLedger = PersonLedger()
+        try:
+            with open(path, "rb") as f:
+                stored: Dict[str, Any] = get_codec().load(f)
+        except (OSError, ValueError):
+            return ledger
+        if not isinstance(stored, dict) or stored.get("version") != _ledger_version:
+            return ledger
+        for rid, added in stored.get("receipts", {}).items():
+            ledger._put(int(rid), added)    # pylint: disable=protected-access
+        return ledger
+
+    def __contains__(self, person: object) -> bool:
+        return person in self._totals
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def contribution(data: Dict[str, Any], stamp: List[Any] | None = None) -> Dict[str, Any]:
+    """Works out what a receipt adds to the per-person totals.
+
+    Args:
+        data (Dict[str, Any]): the receipt dictionary, as stored.
+        stamp (List[Any] | None, optional): the receipt's header stamp, see `make_stamp()`.
+        Defaults to None.
+
+    Raises:
+        SchemaError: if the dictionary isn't a valid receipt, see `Receipt.from_dict()`.
+
+    Returns:
+        Dict[str, Any]: `shares`, each person's share in cents; `total`, their sum; `buyer`; the
+        normalised `date`; and the `stamp`.
+    """
+
+    receipt: Receipt = Receipt.from_dict(data)   # type: ignore
+    try:
+        shares: Dict[str, int] = cents.total_per_person_cents(receipt)
+    except ValueError:  # nobody is on any item
+        shares = {}
+    return {"shares": shares, "total": sum(shares.values()), "buyer": receipt.buyer or None,
+            "date": normalise_date(receipt.date), "stamp": stamp}
+
+
+def make_stamp(header: Dict[str, Any]) -> List[Any]:
+    """Returns what identifies a version of a stored receipt in its header: the file's mtime and
+    size where the backend has them, plus the name, date, buyer, payee and item count."""
+
+    return [header.get(field) for field in _stamp_fields]
+
+
+def _people_on(added: Dict[str, Any]) -> Set[str]:
+    """Returns everyone a receipt's contribution is for: its buyer and everyone with a share."""
+
+    people: Set[str] = set(added["shares"])
+    if added["buyer"] is not None:
+        people.add(added["buyer"])
+    return people
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints everyone's totals across the stored receipts.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    import argparse  # pylint: disable=import-outside-toplevel
+    from .receipts import repository  # pylint: disable=import-outside-toplevel
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.person_ledger",
+        description="Print each person's totals across every stored receipt.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help=f"recalculate every receipt rather than reading {_ledger_path}")
+    parser.add_argument("--transfers", action="store_true",
+                        help="also print the transfers that settle everyone up")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    ledger: PersonLedger = repository.people(rebuild=args.rebuild)
+    for total in ledger.totals().values():
+        print(f"{total}, balance ${total.balance / 100:.2f}")
+    if args.transfers:
+        for transfer in ledger.transfers():
+            print(transfer)
+    writer.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
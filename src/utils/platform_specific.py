@@ -6,9 +6,17 @@ Returns:
 #src/utils/platform_specific.py
 # imports
 import os
-import json
-from typing import Any
-from tkinter.messagebox import Message
+from threading import RLock
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+from .persistence import writer
+from .instrumentation import timed
+from .codec import get_codec
+
+# vars
+_cache: Dict[str, Tuple[Tuple[int, int] | None, Any]] = {}  # path -> ((mtime, size), frozen
+# contents), with (mtime, size) None while a write of the contents is still pending
+_cache_lock: RLock = RLock()
 
 # ********************
 # FUNCTIONS
@@ -22,42 +30,124 @@ def popup(title: str = "Popup Notification", message: str = "", icon: str = "inf
     :param icon: str, the preset icon to use in the popup, valid options are: [error, info, question, warning]. This may vary depending on operating system
     :param options: str, the preset of response options for the user, valid options are: [ok, okcancel, retrycancel, yesno, yesnocancel]"""
 
+    from tkinter.messagebox import Message  # pylint: disable=import-outside-toplevel
+    # ^ only the GUI needs Tk, so importing the rest of this module stays headless
     return Message(title=title, message=message, icon=icon, type=options).show()
 
 
-def update_conf(key: str, value: Any) -> dict:
-    """Updates the config found at `etc/conf.json` and writes it.
+def freeze(value: Any) -> Any:
+    """Returns a read-only copy of parsed JSON: dicts become MappingProxyType and lists tuples.
+
+    :param value: Any, the parsed JSON value.
+
+    :return frozen: Any, the read-only copy."""
+
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def load_json(path: str) -> Any:
+    """Returns the parsed contents of a JSON file from the in-process cache, only reading the file
+    again if its mtime or size has changed since it was cached.
+
+    :param path: str, the path of the JSON file, e.g. `etc/conf.json`.
+
+    :return contents: Any, a read-only snapshot of the file's contents (see `freeze()`)."""
+
+    cached: Tuple[Tuple[int, int] | None, Any] | None = _cache.get(path)
+    if cached is not None and cached[0] is None:    # newer than the file, which is being written
+        return cached[1]
+    stat: os.stat_result = os.stat(path)
+    key: Tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        contents: Any = freeze(get_codec().load(f))
+    with _cache_lock:
+        _cache[path] = (key, contents)
+    return contents
+
+
+def restamp(path: str, contents: Any) -> None:
+    """Marks the cached contents of a file as matching the file on disk once it has been written,
+    unless they have been replaced by a newer update in the meantime.
+
+    :param path: str, the path of the JSON file that was written.
+    :param contents: Any, the cached contents that were written."""
+
+    stat: os.stat_result = os.stat(path)
+    with _cache_lock:
+        cached: Tuple[Tuple[int, int] | None, Any] | None = _cache.get(path)
+        if cached is not None and cached[1] is contents:
+            _cache[path] = ((stat.st_mtime_ns, stat.st_size), contents)
+
+
+def invalidate(path: str, contents: Any) -> None:
+    """Drops the cached contents of a file whose write failed, unless they have been replaced by
+    a newer update in the meantime, so the file is read again rather than trusted as pending.
+
+    :param path: str, the path of the JSON file that wasn't written.
+    :param contents: Any, the cached contents that weren't written."""
+
+    with _cache_lock:
+        cached: Tuple[Tuple[int, int] | None, Any] | None = _cache.get(path)
+        if cached is not None and cached[1] is contents:
+            del _cache[path]
+
+
+@timed()
+def update_conf(key: str, value: Any) -> Mapping[str, Any]:
+    """Updates the config found at `etc/conf.json` and queues it to be written.
+
+    The in-process config is updated immediately; the file itself is written atomically by the
+    write-behind writer, coalescing repeated updates into a single write off the Tk main thread.
+    If that write fails, the update is dropped and `get_conf()` reads the file as it is again.
 
     :param key: str, the option to modify.
     :param value: Any, the value to set the option to.
 
-    :return conf: dict, the configuration post-modification."""
+    :return conf: Mapping[str, Any], a read-only snapshot of the configuration post-modification."""
 
 
-    conf: dict = get_conf()
-    conf[key] = value
     print(f"Updating config: {key} = {value}")
-    with open("etc/conf.json", "w", encoding="utf-8") as f:
-        payload: str = json.dumps(conf)
-        f.write(payload)
-    return conf
+    with _cache_lock:
+        conf: Dict[str, Any] = dict(get_conf())
+        conf[key] = value
+        snapshot: Mapping[str, Any] = freeze(conf)
+        _cache["etc/conf.json"] = (None, snapshot)  # update the cache in place, the file
+        # catches up once the writer gets to it
+
+    writer.schedule("etc/conf.json",
+                    lambda: get_codec().dumps(conf, default=dict), # nested snapshots are MappingProxyType
+                    on_written=lambda: restamp("etc/conf.json", snapshot),
+                    on_failed=lambda _: invalidate("etc/conf.json", snapshot))
+    return snapshot
 
 
 
-def get_conf(generate: bool = True) -> dict:
-    """Returns a dictionary object of the configuration at `etc/conf.json`
+@timed()
+def get_conf(generate: bool = True) -> Mapping[str, Any]:
+    """Returns a read-only snapshot of the configuration at `etc/conf.json`. The file is only
+    re-read when it has changed on disk.
 
     Args:
         generate (bool, optional): Whether to generate a new config file if one doesn't exist. Defaults to True.
 
     Returns:
-        dict: The configuration dictionary object.
+        Mapping[str, Any]: The configuration mapping.
     """
 
-    if not os.path.exists("etc/conf.json") and generate:
-        generate_conf()
-    with open("etc/conf.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    try:
+        return load_json("etc/conf.json")
+    except FileNotFoundError:
+        if not generate:
+            raise
+    generate_conf()
+    return load_json("etc/conf.json")
 
 
 def generate_conf() -> None:
@@ -71,5 +161,17 @@ def generate_conf() -> None:
 def get_version() -> str:
     """Returns a semver version derived from `etc/version.json`"""
 
-    with open("etc/version.json", "r", encoding="utf-8") as f:
-        return json.load(f)["version"]
+    return load_json("etc/version.json")["version"]
+
+
+def get_theme(name: str) -> Mapping[str, Any]:
+    """Returns a read-only snapshot of the theme at `etc/themes/<name>.json`
+
+    Args:
+        name (str): the name of the theme, e.g. "dark".
+
+    Returns:
+        Mapping[str, Any]: The theme mapping.
+    """
+
+    return load_json(f"etc/themes/{name}.json")
@@ -0,0 +1,338 @@
+"""Maintains an on-disk index of the receipts stored in `data/receipts/` so that listing receipts or
+finding the last id doesn't require parsing every receipt file.
+
+The index lives at `data/index.json` and maps each receipt file to a small header: its id, name,
+date, buyer, payee, item count and the file's mtime / size. Only files whose mtime or size has
+changed since the index was last written are parsed again, and `sync()` reports which receipts
+were added, changed or removed, so files edited outside the app can be picked up incrementally
+(see `watcher.py`).
+
+Returns:
+    None: N/A
+"""
+#src/utils/receipt_index.py
+# imports
+import os
+from threading import RLock
+from typing import Any, Dict, Iterable, List, NamedTuple
+from .persistence import writer
+from .codec import get_codec
+
+# vars
+_receipts_dir: str = "data/receipts/"
+_index_path: str = "data/index.json"
+_index_version: int = 1
+
+_lock: RLock = RLock()   # saves may update the index from outside the Tk main thread
+_entries: Dict[str, Dict[str, Any]] | None = None    # filename -> header, None until first use
+_ids: Dict[int, str] = {}   # receipt id -> filename
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Changes(NamedTuple):
+    """What a `sync()` found had changed in `data/receipts/` since the last one.
+
+    Args:
+        added (List[Dict[str, Any]]): the headers of new receipt files.
+        changed (List[Dict[str, Any]]): the new headers of receipt files that were modified.
+        removed (List[Dict[str, Any]]): the last known headers of receipt files that are gone.
+    """
+    added: List[Dict[str, Any]]
+    changed: List[Dict[str, Any]]
+    removed: List[Dict[str, Any]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def make_header(filename: str, data: Dict[str, Any],
+                stat: os.stat_result | None) -> Dict[str, Any]:
+    """Builds an index header from a receipt's raw dictionary and the stat of its file.
+
+    Args:
+        filename (str): the name of the receipt file in `data/receipts/`, including `.json`.
+        data (Dict[str, Any]): the receipt dictionary as stored on disk.
+        stat (os.stat_result | None): the stat result of the receipt file, or None if the file
+        hasn't been written yet (which makes the next refresh re-read it).
+
+    Returns:
+        Dict[str, Any]: the header to store in the index.
+    """
+
+    return {
+        "filename": filename,
+        "id": data["id"],
+        "name": data.get("name"),
+        "date": data.get("date"),
+        "buyer": data.get("buyer"),
+        "payee": data.get("payee"),
+        "items": len(data.get("items", [])),
+        "mtime": stat.st_mtime_ns if stat is not None else None,
+        "size": stat.st_size if stat is not None else None
+    }
+
+
+def load_index() -> Dict[str, Dict[str, Any]]:
+    """Reads the index at `data/index.json` as-is, without checking it against `data/receipts/`.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the stored headers by filename, empty if the index is missing,
+        unreadable or from an older version.
+    """
+
+    try:
+        with open(_index_path, "rb") as f:
+            stored: Dict[str, Any] = get_codec().load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stored, dict) or stored.get("version") != _index_version:
+        return {}
+    return stored.get("receipts", {})
+
+
+def save_index() -> None:
+    """Queues the in-memory index to be written to `data/index.json` by the write-behind writer."""
+
+    writer.schedule(_index_path, _render_index)
+
+
+def _render_index() -> str:
+    """Serialises the in-memory index, called on the writer thread."""
+
+    with _lock:
+        return get_codec().dumps({"version": _index_version, "receipts": _entries or {}})
+
+
+def refresh_index() -> Dict[str, Dict[str, Any]]:
+    """Brings the index up to date with `data/receipts/`, parsing only the files that were added or
+    whose mtime / size changed, and dropping files that were removed, see `sync()`.
+
+    Raises:
+        FileNotFoundError: when the receipts dir is missing.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the up-to-date headers by filename.
+    """
+
+    sync()
+    return _entries     # type: ignore
+
+
+def sync(filenames: Iterable[str] | None = None) -> Changes:
+    """Brings the index up to date with `data/receipts/` and reports what changed. Files are only
+    parsed if they were added or their mtime / size changed, so an unchanged directory costs one
+    `os.scandir` of stat data. Files that can't be read or parsed (e.g. still being written by
+    another program) are skipped and retried on the next sync.
+
+    Args:
+        filenames (Iterable[str] | None, optional): only check these files (e.g. the ones a
+        filesystem watcher reported), rather than listing the whole directory. Defaults to None.
+
+    Raises:
+        FileNotFoundError: when the receipts dir is missing.
+
+    Returns:
+        Changes: the headers of the receipts that were added, changed or removed.
+    """
+
+    global _entries, _ids   # pylint: disable=global-statement
+
+    if not os.path.exists(_receipts_dir):
+        raise FileNotFoundError(f"Directory {_receipts_dir} does not exist!")
+
+    with _lock:
+        first: bool = _entries is None
+        if first:   # the stored index hasn't been checked against the directory yet
+            filenames = None
+        previous: Dict[str, Dict[str, Any]] = _entries if _entries is not None else load_index()
+        stats: Dict[str, os.stat_result] = _stat_files(filenames)
+        entries: Dict[str, Dict[str, Any]] = dict(previous) if filenames is not None else {}
+        added: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        removed: List[Dict[str, Any]] = []
+
+        for filename, stat in stats.items():
+            header: Dict[str, Any] | None = previous.get(filename)
+            # unchanged since it was indexed, or about to be overwritten by a queued save whose
+            # receipt is newer than the file on disk
+            if header is not None and (_pending(header, first) or header["mtime"] == stat.st_mtime_ns
+                                       and header["size"] == stat.st_size):
+                entries[filename] = header
+                continue
+            try:
+                with open(os.path.join(_receipts_dir, filename), "rb") as f:
+                    new: Dict[str, Any] = make_header(filename, get_codec().load(f), stat)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Skipping receipt file {filename} for now: {e}")
+                if header is not None:  # keep the old header; its stale stat gets it retried
+                    entries[filename] = header
+                continue
+            entries[filename] = new
+            (added if header is None else changed).append(new)
+
+        checked: Iterable[str] = previous if filenames is None else set(filenames)
+        for filename in checked:
+            header = previous.get(filename)
+            if header is None or filename in stats:
+                continue
+            if _pending(header, first):
+                entries[filename] = header
+            else:
+                entries.pop(filename, None)
+                removed.append(header)
+
+        _entries = entries
+        _ids = {header["id"]: filename for filename, header in entries.items()}
+    if added or changed or removed or (first and not previous):
+        save_index()
+    return Changes(added, changed, removed)
+
+
+def _pending(header: Dict[str, Any], first: bool) -> bool:
+    """Returns whether a header is for a save still queued on the writer thread, see
+    `update_entry()`. Saves can only be queued once the index has been synced, so a header read
+    from `data/index.json` without an mtime is left over from a save that never finished."""
+
+    return header["mtime"] is None and not first
+
+
+def _stat_files(filenames: Iterable[str] | None) -> Dict[str, os.stat_result]:
+    """Returns the stat of each receipt file in `data/receipts/` by filename: every file, or only
+    those of `filenames` that (still) exist."""
+
+    stats: Dict[str, os.stat_result] = {}
+    if filenames is None:
+        with os.scandir(_receipts_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stats[entry.name] = entry.stat()
+        return stats
+    for filename in filenames:
+        if not filename.endswith(".json"):
+            continue
+        try:
+            stats[filename] = os.stat(os.path.join(_receipts_dir, filename))
+        except FileNotFoundError:
+            continue
+    return stats
+
+
+def reset() -> None:
+    """Forgets the in-memory index, so the next lookup reads `data/index.json` and checks it against
+    `data/receipts/` again, e.g. after switching to another project root."""
+
+    global _entries, _ids   # pylint: disable=global-statement
+
+    with _lock:
+        _entries, _ids = None, {}
+
+
+def get_index() -> Dict[str, Dict[str, Any]]:
+    """Returns the index headers by filename, refreshing them against `data/receipts/` on first use.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the headers by filename.
+    """
+
+    if _entries is None:
+        return refresh_index()
+    return _entries
+
+
+def get_headers() -> List[Dict[str, Any]]:
+    """Returns the header of every indexed receipt.
+
+    Returns:
+        List[Dict[str, Any]]: the headers, in `data/receipts/` listing order.
+    """
+
+    return list(get_index().values())
+
+
+def get_header(rid: int) -> Dict[str, Any] | None:
+    """Returns the header of the receipt with the specified id.
+
+    Args:
+        rid (int): the id of the receipt.
+
+    Returns:
+        Dict[str, Any] | None: the header, or None if no receipt has that id.
+    """
+
+    filename: str | None = get_filename(rid)
+    return None if filename is None else get_index()[filename]
+
+
+def get_filename(rid: int) -> str | None:
+    """Returns the filename (including `.json`) of the receipt with the specified id.
+
+    Args:
+        rid (int): the id of the receipt.
+
+    Returns:
+        str | None: the filename, or None if no receipt has that id.
+    """
+
+    get_index()
+    return _ids.get(rid)
+
+
+def update_entry(filename: str, data: Dict[str, Any], written: bool = True) -> Dict[str, Any]:
+    """Re-indexes a single receipt file and saves the index.
+
+    Args:
+        filename (str): the name of the receipt file in `data/receipts/`, including `.json`.
+        data (Dict[str, Any]): the receipt dictionary that was (or is about to be) written.
+        written (bool, optional): whether the file is already on disk. Pending saves are indexed
+        straight away so ids and filenames aren't handed out twice, and are indexed again once
+        written. Defaults to True.
+
+    Returns:
+        Dict[str, Any]: the new header of the receipt.
+    """
+
+    header: Dict[str, Any] = make_header(filename, data,
+                                         os.stat(os.path.join(_receipts_dir, filename))
+                                         if written else None)
+    with _lock:
+        entries: Dict[str, Dict[str, Any]] = get_index()
+        old: Dict[str, Any] | None = entries.get(filename)
+        if old is not None and _ids.get(old["id"]) == filename:
+            del _ids[old["id"]]
+        entries[filename] = header
+        _ids[header["id"]] = filename
+    save_index()
+    return header
+
+
+def remove_entry(filename: str) -> None:
+    """Removes a receipt file from the index and saves the index.
+
+    Args:
+        filename (str): the name of the receipt file in `data/receipts/`, including `.json`.
+    """
+
+    with _lock:
+        old: Dict[str, Any] | None = get_index().pop(filename, None)
+        if old is None:
+            return
+        if _ids.get(old["id"]) == filename:
+            del _ids[old["id"]]
+    save_index()
+
+
+def last_id() -> int:
+    """Returns the greatest receipt id in the index.
+
+    Returns:
+        int: the greatest id, or 0 if there are no receipts.
+    """
+
+    get_index()
+    return max(_ids, default=0)
@@ -2,8 +2,281 @@
 # imports
 import os
 import json
-from typing import List, Dict, Union
+from collections import OrderedDict
+from datetime import datetime
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Iterator, List, Dict, Union
 from .models import Receipt # type: ignore
+from .platform_specific import get_conf # type: ignore
+from .storage import Backend, get_backend
+from .date_index import DateIndex
+from . import id_generator
+from .instrumentation import timed
+
+if TYPE_CHECKING:    # imported when first used, to keep importing the core fast
+    from .archive import Archive
+    from .search_index import SearchIndex
+    from .person_ledger import PersonLedger, PersonTotal
+
+# *******************************
+# CLASSES
+# *******************************
+
+class ReceiptRepository:
+    """Loads receipts from the storage backend on demand.
+
+    Headers come from the backend (the receipt index by default), and a full Receipt (with its Item objects) is only parsed
+    when it is asked for. The most recently used receipts are kept hydrated in a bounded LRU, so
+    browsing a large archive keeps memory flat.
+
+    Receipts in the read-only archive at `data/archive.rca`, if there is one, are served underneath
+    the backend: a receipt saved to the backend shadows its archived copy.
+
+    Args:
+        capacity (int, optional): how many hydrated receipts to keep. Defaults to 32.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.capacity: int = capacity
+        self._hydrated: OrderedDict[int, Receipt] = OrderedDict()
+        self._dates: DateIndex | None = None
+        self._search: "SearchIndex | None" = None
+        self._people: "PersonLedger | None" = None
+        self._lock: RLock = RLock()
+        self._search_lock: RLock = RLock()  # held while the search index builds, which is slow
+        self._people_lock: RLock = RLock()  # likewise while the per-person ledger is reconciled
+
+    @property
+    def backend(self) -> Backend:
+        """Returns the storage backend selected in `etc/conf.json`, see `storage.get_backend()`."""
+        return get_backend()
+
+    @property
+    def archive(self) -> "Archive | None":
+        """Returns the read-only archive, or None if there isn't one, see `archive.get_archive()`."""
+        from .archive import get_archive  # pylint: disable=import-outside-toplevel
+        return get_archive()
+
+    def headers(self) -> List[Dict[str, Any]]:
+        """Returns the header of every stored receipt without hydrating any of them."""
+
+        headers: List[Dict[str, Any]] = self.backend.headers()
+        archive: Archive | None = self.archive
+        if archive is not None and len(archive):
+            live: set[int] = {header["id"] for header in headers}
+            headers = [header for header in archive.headers() if header["id"] not in live] + headers
+        return headers
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        """Returns the header of the receipt with the specified id, or None if there isn't one."""
+
+        header: Dict[str, Any] | None = self.backend.header(rid)
+        archive: Archive | None = self.archive
+        if header is None and archive is not None:
+            return archive.header(rid)
+        return header
+
+    @timed()
+    def dates(self) -> DateIndex:
+        """Returns the date index of every stored receipt, built from their headers on first use
+        and kept up to date by `reindex()`."""
+
+        with self._lock:
+            if self._dates is None:
+                self._dates = DateIndex(self.headers())
+            return self._dates
+
+    def search_index(self) -> "SearchIndex":
+        """Returns the search index of every stored receipt, built on first use (which reads
+        every receipt, so do it off the Tk main thread) and kept up to date by `reindex()`."""
+
+        from .search_index import SearchIndex  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        with self._search_lock:
+            if self._search is None:
+                self._search = SearchIndex(self.iter_dicts())
+            return self._search
+
+    @timed()
+    def people(self, rebuild: bool = False) -> "PersonLedger":
+        """Returns the per-person ledger of every stored receipt, kept up to date by `reindex()`.
+
+        On first use it is read from `data/people.json` and reconciled with the store, which only
+        reads the receipts that changed since it was saved (every receipt the first time ever, so
+        do it off the Tk main thread).
+
+        Args:
+            rebuild (bool, optional): whether to recalculate every receipt instead. Defaults to
+            False.
+        """
+
+        from .person_ledger import PersonLedger  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        with self._people_lock:
+            if self._people is None or rebuild:
+                ledger: PersonLedger = PersonLedger() if rebuild else PersonLedger.load()
+                if ledger.reconcile(self.headers(), self.load_dict) or rebuild:
+                    ledger.save()
+                self._people = ledger
+            return self._people
+
+    def reindex(self, rid: int, data: Dict[str, Any] | None = None) -> None:
+        """Updates the date and search indexes and the per-person ledger after the receipt with
+        the specified id was saved, changed or deleted. Indexes that haven't been built yet are
+        left alone.
+
+        Args:
+            rid (int): the id of the receipt.
+            data (Dict[str, Any] | None, optional): the receipt's dictionary, if the caller has it.
+            Defaults to loading it from the store.
+        """
+
+        header: Dict[str, Any] | None = self.header(rid)
+        with self._lock:
+            if self._dates is not None:
+                if header is None:
+                    self._dates.remove(rid)
+                else:
+                    self._dates.put(header)
+        if header is None or (self._search is None and self._people is None):
+            data = None
+        elif data is None:
+            try:
+                data = self.load_dict(rid)
+            except (KeyError, OSError, ValueError) as e:   # gone again, or not written yet
+                print(f"Couldn't reindex receipt {rid}: {e}")
+        with self._search_lock:
+            if self._search is not None:
+                if data is None:
+                    self._search.remove(rid)
+                else:
+                    self._search.put(data)
+        with self._people_lock:
+            if self._people is None:
+                return
+            from .person_ledger import make_stamp  # pylint: disable=import-outside-toplevel
+            try:
+                if data is None:
+                    self._people.remove(rid)
+                else:
+                    self._people.put(data, make_stamp(header))  # type: ignore
+            except (KeyError, TypeError, ValueError) as e:  # not a valid receipt
+                print(f"Couldn't add receipt {rid} to the per-person totals: {e}")
+                self._people.remove(rid)
+            self._people.save()
+
+    def load_dict(self, rid: int) -> Dict[str, Any]:
+        """Returns the stored dictionary of the receipt with the specified id, from the backend or
+        else the archive.
+
+        Raises:
+            KeyError: if no receipt has that id.
+        """
+
+        try:
+            return self.backend.load_dict(rid)
+        except KeyError:
+            archive: Archive | None = self.archive
+            if archive is None:
+                raise
+            return archive.get_dict(rid)
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yields the stored dictionary of every receipt, one at a time, without parsing them into
+        Receipt objects."""
+
+        for header in self.headers():
+            try:
+                yield self.load_dict(header["id"])
+            except (KeyError, FileNotFoundError):  # deleted since the listing
+                continue
+
+    def load(self, rid: int) -> Receipt:
+        """Parses the receipt with the specified id from the backend, or else the archive, without
+        caching it.
+
+        Raises:
+            KeyError: if no receipt has that id.
+        """
+
+        try:
+            return self.backend.load(rid)
+        except KeyError:
+            archive: Archive | None = self.archive
+            if archive is None:
+                raise
+            return archive.get(rid)
+
+    def get(self, rid: int) -> Receipt:
+        """Returns the hydrated Receipt with the specified id, parsing it if it isn't cached.
+
+        Args:
+            rid (int): the id of the receipt.
+
+        Raises:
+            KeyError: if no receipt has that id.
+
+        Returns:
+            Receipt: the receipt.
+        """
+
+        with self._lock:
+            receipt: Receipt | None = self._hydrated.get(rid)
+            if receipt is not None:
+                self._hydrated.move_to_end(rid)
+                return receipt
+
+        receipt = self.load(rid)
+        self.put(receipt)
+        return receipt
+
+    def put(self, receipt: Receipt) -> None:
+        """Caches a hydrated receipt, evicting the least recently used one if over capacity."""
+
+        with self._lock:
+            self._hydrated[receipt.id] = receipt
+            self._hydrated.move_to_end(receipt.id)
+            while len(self._hydrated) > self.capacity:
+                self._hydrated.popitem(last=False)
+
+    def evict(self, rid: int) -> None:
+        """Drops the hydrated copy of a receipt, if any, so it is parsed again on next access."""
+
+        with self._lock:
+            self._hydrated.pop(rid, None)
+
+    def clear(self) -> None:
+        """Drops every hydrated receipt, the date and search indexes and the per-person ledger
+        (which stays saved in `data/people.json`)."""
+
+        with self._lock:
+            self._hydrated.clear()
+            self._dates = None
+        with self._search_lock:
+            self._search = None
+        with self._people_lock:
+            self._people = None
+
+    def __iter__(self) -> Iterator[Receipt]:
+        """Yields every stored receipt one at a time. Receipts that aren't already cached are
+        parsed but not cached, so iterating the whole archive doesn't flush the LRU."""
+
+        for header in self.headers():
+            with self._lock:
+                receipt: Receipt | None = self._hydrated.get(header["id"])
+            try:
+                yield receipt if receipt is not None else self.load(header["id"])
+            except KeyError:    # deleted since the listing
+                continue
+
+    def __contains__(self, rid: object) -> bool:
+        archive: Archive | None = self.archive
+        return rid in self.backend or (archive is not None and rid in archive)
+
+    def __len__(self) -> int:
+        archive: Archive | None = self.archive
+        if archive is None:
+            return len(self.backend)
+        return len(self.headers())
+
 
 # *******************************
 # FUNCTIONS
@@ -15,23 +288,79 @@ def get_last_receipt() -> int | None:
     Returns:
           int | None: The id of the last receipt used as found in `etc/conf.json` if any.
     """
-    with open("etc/conf.json", "r", encoding="utf-8") as f:
-        rid: int | None = json.load(f)["lastReceipt"]
-        if rid in receipts_by_id.keys():    # if a receipt with that ID exists...
-            return rid
+    rid: int | None = get_conf()["lastReceipt"]
+    if rid in repository:    # if a receipt with that ID exists...
+        return rid
+    return None
 
 
-def get_receipts() -> List[Union[Receipt, object]]:    # this whole function could be compressed into a single line with list comprehension! I've resisted the temptation in the name of readability :eyes:
-    """Returns a list of Receipt-like objects derived from `data/receipts/`"""
+@timed()
+def get_receipt_headers() -> List[Dict[str, Any]]:
+    """Returns the headers (id, name, date, buyer, payee and item count) of every stored receipt
+    without parsing the receipts themselves."""
+
+    return repository.headers()
+
+
+def get_receipt_headers_by_date(newest_first: bool = True) -> List[Dict[str, Any]]:
+    """Returns the header of every stored receipt in date order, followed by the receipts without
+    a valid date, see `date_index.DateIndex.ordered()`."""
+
+    return repository.dates().ordered(newest_first)
+
+
+def get_receipts_between(start: str | datetime | None = None,
+                         end: str | datetime | None = None) -> List[Dict[str, Any]]:
+    """Returns the headers of the stored receipts dated between start and end (inclusive, e.g.
+    `get_receipts_between("2025-01", "2025-06")` for the first half of 2025), oldest first, see
+    `date_index.DateIndex.between()`."""
+
+    return repository.dates().between(start, end)
+
+
+def search_receipts(query: str) -> List[Dict[str, Any]]:
+    """Returns the headers of the stored receipts matching every word of a query as a prefix
+    (e.g. "cat bo"), in their names, payees, buyers, item names or item users, newest first, see
+    `search_index.SearchIndex.search()`. Builds the search index on first use."""
+
+    matches: set[int] = repository.search_index().search(query)
+    return [header for header in repository.dates().ordered() if header["id"] in matches]
+
 
-    _receipts: List[Union[Receipt, object]] = []
-    filepaths: List[str] = [file for file in os.listdir("data/receipts/") if file.endswith(".json")]
+def get_person_totals() -> Dict[str, "PersonTotal"]:
+    """Returns each person's totals across every stored receipt, by person: what they owe and
+    have paid in cents, how many receipts they are on, and when they were last on one, see
+    `person_ledger.PersonLedger`. Reads `data/people.json` on first use."""
 
-    for filename in filepaths:
-        with open(f"data/receipts/{filename}", "r", encoding="utf-8") as f:
-            receipt: object = Receipt.from_dict(data=json.load(f))
-            _receipts.append(receipt)
-    return _receipts
+    return repository.people().totals()
+
+
+def find_receipts(person: str | None = None, payee: str | None = None, buyer: str | None = None,
+                  start: str | None = None, end: str | None = None) -> List[Dict[str, Any]]:
+    """Returns the headers of the stored receipts matching every filter given, e.g. every receipt
+    "Bozo the cat" is on with `find_receipts(person="Bozo the cat")`, see `storage.Backend.find()`.
+    Only the backend is searched, not the read-only archive.
+    """
+
+    return repository.backend.find(person=person, payee=payee, buyer=buyer, start=start, end=end)
+
+
+@timed()
+def get_receipts() -> List[Union[Receipt, object]]:
+    """Returns a list of Receipt-like objects from the storage backend. Prefer `iter_receipts()`
+    for large archives."""
+
+    return list(iter_receipts())
+
+
+def iter_receipts() -> Iterator[Union[Receipt, object]]:
+    """Yields the stored Receipt objects one at a time, so a huge archive streams in constant memory.
+
+    Reads whichever backend `storage` selects in `etc/conf.json`: `data/receipts/` by default, the
+    append-only journal at `data/receipts.jsonl`, or the SQLite database at `data/receipts.sqlite3`,
+    plus any archived receipts in `data/archive.rca` that the backend doesn't shadow."""
+
+    yield from repository
 
 
 def get_receipts_compact() -> List[Union[Receipt, object]]:    # and for the aforementioned compacted version...
@@ -49,8 +378,8 @@ def get_receipt_file(filename: str) -> Union[Receipt, object]:
 
     filepath: str = f"data/receipts/{filename}.json"
     if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            return Receipt.from_dict(json.load(f))
+        with open(filepath, "rb") as f:
+            return Receipt.from_json(f.read(), source=filepath)
     raise FileNotFoundError(f"Coulnd't find '{filepath}.json' in `data/receipts/`!")
 
 
@@ -61,19 +390,46 @@ def get_receipt_by_id(rid: int) -> Receipt:
 
     :return receipt: Receipt, the Receipt like object to return containing item information."""
 
-    return receipts_by_id[rid]
+    return repository.get(rid)
+
+
+@timed()
+def save_receipt(receipt: Receipt) -> int:
+    """Saves a Receipt object to the storage backend. With the default directory backend, only a
+    snapshot is taken here and the file is written on the write-behind writer's thread.
+
+    :param receipt: Receipt, the receipt to save. Receipts that are already stored are replaced.
+
+    :return rid: int, the id the receipt is saved under."""
+
+    rid: int = repository.backend.save(receipt)
+    if receipt.is_new:  # the receipt now owns its id rather than the next free one
+        receipt.uid = rid
+        receipt.is_new = False
+    repository.put(receipt)
+    repository.reindex(rid, receipt.to_dict())  # the file may not be written yet
+    return rid
+
+
+@timed()
+def delete_receipt(rid: int) -> None:
+    """Deletes a stored receipt, if there is one. Archived receipts are read-only and stay put.
+
+    :param rid: int, the id of the receipt to delete."""
+
+    repository.evict(rid)
+    repository.backend.delete(rid)
+    repository.reindex(rid)
 
 
 def last_id() -> int:
-    """Returns the latest (greatest) id of saved receipts"""
-    _receipts: List[Union[Receipt, object]]= get_receipts()
-    return max(receipt.id for receipt in receipts if isinstance(receipt, Receipt))
+    """Returns the latest (greatest) id of saved receipts, see `id_generator.last_id()`"""
+    return id_generator.last_id()
+
 
 
 # ******************************
 # VARIABLES
 # *******************************
 
-receipts: List[Union[Receipt, object]] = get_receipts()
-receipts_by_id: Dict[int, Receipt] = {receipt.id: receipt for receipt in receipts if
-                                      isinstance(receipt, Receipt)}
+repository: ReceiptRepository = ReceiptRepository()    # nothing is read until it is first used
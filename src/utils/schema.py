@@ -0,0 +1,359 @@
+"""The schema of stored receipts, compiled once into fast validating constructors.
+
+`RECEIPT` and `ITEM` are the single definition of what a receipt file holds: each field's key,
+the exact JSON types it may have, and whether it may be null. `compile_schema()` turns a schema
+into a specialised Python function, generated once at import, that reads every field, checks its
+type and hands the values straight to a constructor (`models.Receipt.from_dict()`,
+`Item.from_dict()` and `Receipt.from_json()` all build through it), or just checks them. The
+compiled function stops at the first problem and returns None, so valid input pays for nothing
+else; only then does `validate()` walk the data again to report every problem with its path,
+e.g. `$.items[2].cost: expected a number, got a string ("12.50")`, raised as a `SchemaError`.
+
+The function is generated, rather than built from one closure per field, because those closures
+cost a function call per field on the hot path of every load: `python -m benchmarks.schema`, which
+times both, measured checking 10,000 items at 10 ms generated against 37 ms with closures, and
+building Receipts from them at 71 ms against 98 ms. The generated code is kept as the function's
+`source` attribute; print it to read it, or to see what a traceback's line in `<schema item>` is.
+
+Types are exact, as JSON decodes them: `true` isn't a number, and `"12.50"` isn't either. Fields
+the schema doesn't know are ignored, so newer files still load.
+
+A whole data directory can be checked in parallel, which also reports duplicate receipt ids:
+    PYTHONPATH=src python -m utils.schema [data/receipts/ ...] [--workers N] [--chunk-size N]
+
+Returns:
+    None: N/A
+"""
+#src/utils/schema.py
+# imports
+import os
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+from .codec import get_codec
+
+# vars
+_type_names: Dict[type, str] = {str: "a string", int: "an integer", float: "a number", bool: "true or false",
+                                list: "a list", dict: "an object", type(None): "null"}
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Schema(NamedTuple):
+    """The fields of a JSON object.
+
+    Args:
+        name (str): what the object is, e.g. "item", for messages.
+        fields (Tuple[Field, ...]): its fields, in the order they are passed to constructors.
+    """
+
+    name: str
+    fields: Tuple["Field", ...]
+
+
+class Field(NamedTuple):
+    """One field of a JSON object.
+
+    Args:
+        key (str): the field's key.
+        types (Tuple[type, ...]): the exact types its value may have, e.g. `(int, float)`.
+        nullable (bool, optional): whether it may be null. Defaults to False.
+        each (Tuple[type, ...] | Schema | None, optional): for a list, the exact types of every
+        element, or the schema every element (an object) must match. Defaults to None.
+    """
+
+    key: str
+    types: Tuple[type, ...]
+    nullable: bool = False
+    each: Tuple[type, ...] | Schema | None = None
+
+
+class SchemaError(ValueError, TypeError):
+    """Raised when data doesn't match its schema. A ValueError and a TypeError, which is what
+    `Item.from_dict()` and `Receipt.from_dict()` raised for bad data before there was a schema.
+
+    Args:
+        errors (List[str]): every problem, each starting with its path, see `validate()`.
+        source (str | None, optional): where the data came from, e.g. its file. Defaults to None.
+    """
+
+    def __init__(self, errors: List[str], source: str | None = None):
+        super().__init__(errors)
+        self.errors: List[str] = errors
+        self.source: str | None = source
+
+    def __str__(self) -> str:
+        prefix: str = f"{self.source}: " if self.source else ""
+        return "\n".join(prefix + error for error in self.errors)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def compile_schema(schema: Schema, make: Callable[..., Any] | None = None,
+                   each: Callable[[Any], Any] | None = None, built: type | Tuple[type, ...] = ()
+                   ) -> Callable[[Any], Any]:
+    """Generates a function that checks a decoded JSON object against a schema and builds an
+    object from it, in one pass with no per-field function calls.
+
+    Args:
+        schema (Schema): the schema.
+        make (Callable[..., Any] | None, optional): called with the value of every field, in the
+        schema's order, to build the object. Defaults to None, to just check the object.
+        each (Callable[[Any], Any] | None, optional): a compiled function for the elements of the
+        schema's list-of-objects field, whose results replace them. Defaults to checking them
+        against their own schema.
+        built (type | Tuple[type, ...], optional): the types of elements that were already built,
+        e.g. Items made while decoding, which are taken as they are. Defaults to none.
+
+    Returns:
+        Callable[[Any], Any]: a function returning what `make` returns (True without `make`), or
+        None if the object doesn't match the schema, see `validate()` for why. Its `source`
+        attribute holds the generated code, e.g. for `ITEM`:
+            def check_item(data):
+                ...
+                try:
+                    v0 = data['name']
+                    ...
+                except KeyError:
+                    return None
+                if not (type(v0) is t0 and
+                        ...
+                        (v3 is None or type(v3) in t3) and
+                        type(v5) is t5):
+                    return None
+                for e in v1:
+                    if not type(e) is e1:
+                        return None
+                return make(v0, v1, v2, v3, v4, v5)
+    """
+
+    built = built if isinstance(built, tuple) else (built,)
+    namespace: Dict[str, Any] = {"make": make, "built": built}
+    reads: List[str] = []
+    checks: List[str] = []
+    loops: List[str] = []
+    values: List[str] = []
+    for i, field in enumerate(schema.fields):
+        value: str = f"v{i}"
+        reads.append(f"        {value} = data[{field.key!r}]")
+        check: str = _type_check(value, field.types, f"t{i}", namespace)
+        checks.append(f"({value} is None or {check})" if field.nullable else check)
+        values.append(value)
+        elements: str = f"({value} or ())" if field.nullable else value
+        if isinstance(field.each, Schema):
+            namespace[f"each{i}"] = each or compile_schema(field.each)
+            convert: str = f"e if type(e) in built else each{i}(e)" if built else f"each{i}(e)"
+            values[-1] = f"l{i}"
+            loops += [f"    l{i} = [{convert} for e in {elements}]", f"    if None in l{i}:",
+                      "        return None"]
+            if field.nullable:
+                loops.append(f"    l{i} = l{i} if {value} is not None else None")
+        elif field.each is not None:
+            loops += [f"    for e in {elements}:",
+                      f"        if not {_type_check('e', field.each, f'e{i}', namespace)}:",
+                      "            return None"]
+
+    source: str = "\n".join([
+        f"def check_{schema.name}(data):", "    if type(data) is not dict:", "        return None",
+        "    try:", *reads, "    except KeyError:", "        return None",
+        "    if not (" + " and\n            ".join(checks) + "):", "        return None", *loops,
+        f"    return make({', '.join(values)})" if make is not None else "    return True"
+    ])
+    exec(compile(source, f"<schema {schema.name}>", "exec"), namespace)   # pylint: disable=exec-used
+    function: Callable[[Any], Any] = namespace[f"check_{schema.name}"]
+    function.source = source  # type: ignore  # not registered with linecache, as importing it costs ~15 ms
+    return function
+
+
+def _type_check(value: str, types: Tuple[type, ...], name: str, namespace: Dict[str, Any]) -> str:
+    """Returns the expression checking a value's exact type, adding any tuple it needs to the
+    generated function's namespace."""
+
+    if len(types) == 1:
+        namespace[name] = types[0]
+        return f"type({value}) is {name}"
+    namespace[name] = types
+    return f"type({value}) in {name}"
+
+
+def validate(data: Any, schema: Schema | None = None, built: type | Tuple[type, ...] = (),
+             path: str = "$") -> List[str]:
+    """Checks decoded JSON against a schema, finding every problem rather than stopping at the
+    first. Slower than a compiled function, so it is only run once that has failed.
+
+    Args:
+        data (Any): the decoded JSON.
+        schema (Schema | None, optional): the schema. Defaults to `RECEIPT`.
+        built (type | Tuple[type, ...], optional): the types of list elements that were already
+        built, which are taken as valid, see `compile_schema()`. Defaults to none.
+        path (str, optional): where `data` is, for messages. Defaults to "$", the document.
+
+    Returns:
+        List[str]: every problem as "path: what is wrong", e.g.
+        `$.items[2].shouldTax: missing`; empty if the data matches.
+    """
+
+    schema = schema or RECEIPT
+    if not isinstance(data, dict):
+        return [f"{path}: expected {schema.name} (an object), got {_got(data)}"]
+    errors: List[str] = []
+    for field in schema.fields:
+        where: str = f"{path}.{field.key}"
+        if field.key not in data:
+            errors.append(f"{where}: missing")
+            continue
+        value: Any = data[field.key]
+        if value is None and field.nullable:
+            continue
+        if type(value) not in field.types:
+            errors.append(f"{where}: expected {_expected(field.types, field.nullable)}, got {_got(value)}")
+            continue
+        if isinstance(field.each, Schema):
+            for i, element in enumerate(value):
+                if not isinstance(element, built):
+                    errors += validate(element, field.each, built, f"{where}[{i}]")
+        elif field.each is not None:
+            errors += [f"{where}[{i}]: expected {_expected(field.each)}, got {_got(element)}"
+                       for i, element in enumerate(value) if type(element) not in field.each]
+    return errors
+
+
+def _expected(types: Tuple[type, ...], nullable: bool = False) -> str:
+    """Describes the types a field may have, e.g. "a number or null"."""
+
+    names: List[str] = ["a number"] if set(types) == {int, float} else \
+        [_type_names.get(t, t.__name__) for t in types]
+    return " or ".join(names + ["null"] if nullable else names)
+
+
+def _got(value: Any) -> str:
+    """Describes a value that was found, e.g. `a string ("12.50")` or `true`."""
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    name: str = _type_names.get(type(value), type(value).__name__)
+    if isinstance(value, (dict, list)) or value is None:
+        return name
+    shown: str = get_codec().dumps(value) if isinstance(value, (str, int, float)) else repr(value)
+    return f"{name} ({shown if len(shown) <= 40 else shown[:37] + '...'})"
+
+
+@lru_cache(maxsize=None)
+def _check_receipt() -> Callable[[Any], Any]:
+    """Returns the compiled receipt check, compiled on first use as only validation needs it."""
+    return compile_schema(RECEIPT)
+
+
+def check_file(path: str) -> Tuple[str, int | None, List[str]]:
+    """Checks a receipt file against the schema. Runs on the worker processes.
+
+    Args:
+        path (str): the receipt file.
+
+    Returns:
+        Tuple[str, int | None, List[str]]: the file, the receipt's id (None if it has no valid
+        one) and every problem, see `validate()`.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            data: Any = get_codec().load(f)
+    except OSError as e:
+        return path, None, [f"$: couldn't be read: {e.strerror}"]
+    except ValueError as e:
+        return path, None, [f"$: isn't valid JSON: {e}"]
+    rid: Any = data.get("id") if isinstance(data, dict) else None
+    rid = rid if type(rid) is int else None     # pylint: disable=unidiomatic-typecheck
+    if _check_receipt()(data):
+        return path, rid, []
+    return path, rid, validate(data)
+
+
+def check_files(paths: List[str], workers: int | None = None,
+                chunk_size: int = 64) -> Iterator[Tuple[str, int | None, List[str]]]:
+    """Checks receipt files across a process pool, yielding results in input order as soon as
+    they are ready.
+
+    Args:
+        paths (List[str]): the receipt files.
+        workers (int | None, optional): how many processes. Defaults to one per core.
+        chunk_size (int, optional): how many files to hand a worker at a time. Defaults to 64.
+
+    Yields:
+        Iterator[Tuple[str, int | None, List[str]]]: the result of `check_file()` for each path.
+    """
+
+    if workers == 1:    # no point paying for a pool
+        yield from map(check_file, paths)
+        return
+    # imported here rather than with this module, which models imports: it loads multiprocessing
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(check_file, paths, chunksize=chunk_size)
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Checks receipt files from the command line, printing every problem as "file: path: what is
+    wrong", and any receipt id used by more than one file.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code, 1 if any file is invalid.
+    """
+
+    import argparse  # pylint: disable=import-outside-toplevel
+    from .batch import find_receipts  # pylint: disable=import-outside-toplevel
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.schema", description="Check receipt files against the schema.")
+    parser.add_argument("paths", nargs="*", default=["data/receipts/"],
+                        help="receipt directories, files or globs (default: data/receipts/)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=64,
+                        help="files handed to a worker at a time (default: 64)")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    paths: List[str] = find_receipts(args.paths)
+    invalid: int = 0
+    ids: Dict[int, str] = {}    # id -> the first file with it
+    for path, rid, errors in check_files(paths, args.workers, args.chunk_size):
+        if rid is not None:
+            if rid in ids:
+                errors = errors + [f"$.id: {rid} is also the id of {ids[rid]}"]
+            else:
+                ids[rid] = path
+        if errors:
+            invalid += 1
+            print(SchemaError(errors, path))
+    print(f"{len(paths)} receipt files checked, {invalid} invalid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+# the schema of every stored receipt, see `models.Item.to_dict()` and `Receipt.to_dict()`
+ITEM: Schema = Schema("item", (
+    Field("name", (str,)),
+    Field("users", (list,), each=(str,)),
+    Field("cost", (int, float)),
+    Field("tax", (int, float), nullable=True),    # null for the default tax in etc/conf.json
+    Field("tip", (int, float), nullable=True),    # null for no tip
+    Field("shouldTax", (bool,))
+))
+RECEIPT: Schema = Schema("receipt", (
+    Field("name", (str,)),
+    Field("id", (int,)),
+    Field("buyer", (str,)),
+    Field("payee", (str,), nullable=True),
+    Field("date", (str,), nullable=True),
+    Field("items", (list,), each=ITEM)
+))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
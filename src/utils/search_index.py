@@ -0,0 +1,167 @@
+"""An incremental inverted index for searching receipts by word or word prefix.
+
+Every receipt's `name`, `payee` and `buyer`, and every item's `name` and `users`, are split into
+lower-case words (tokens). Each token maps to the receipts it appears in, and to the positions of
+the items it appears on (`RECEIPT` for the receipt's own fields), so a search never walks the
+receipts themselves. The tokens are also kept in a sorted list, so a prefix ("ora" for "Oranges")
+is found by bisection, which is what makes type-ahead search cheap.
+
+A query matches the receipts containing every one of its words, each as a prefix, e.g. "cat bo"
+finds receipts with an item containing a word starting with "cat" and a word starting with "bo"
+anywhere on the receipt. Receipts are added, replaced and removed one at a time as they are saved,
+deleted or changed on disk, see `receipts.ReceiptRepository.search_index()`.
+
+Returns:
+    None: N/A
+"""
+#src/utils/search_index.py
+# imports
+import re
+import bisect
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Set
+
+# vars
+RECEIPT: int = -1   # the position recorded for the receipt's own name, payee and buyer
+_word: re.Pattern = re.compile(r"\w+")
+
+
+# ********************
+# CLASSES
+# ********************
+
+class SearchIndex:
+    """Receipts by the words on them.
+
+    Args:
+        receipts (Iterable[Dict[str, Any]], optional): the receipt dictionaries (as stored) to
+        index. Defaults to none.
+    """
+
+    def __init__(self, receipts: Iterable[Dict[str, Any]] = ()):
+        self._lock: RLock = RLock()
+        self._postings: Dict[str, Dict[int, Set[int]]] = {}     # token -> id -> item positions
+        self._tokens: Dict[int, Set[str]] = {}  # id -> its tokens, to remove it again
+        for data in receipts:
+            self._add(data)
+        self._vocabulary: List[str] = sorted(self._postings)   # every token, for prefix search
+
+    def put(self, data: Dict[str, Any]) -> None:
+        """Adds a receipt, replacing any receipt with the same id.
+
+        Args:
+            data (Dict[str, Any]): the receipt dictionary, as stored.
+        """
+
+        with self._lock:
+            self.remove(data["id"])
+            for token in self._add(data):
+                if len(self._postings[token]) == 1:     # new to the index
+                    bisect.insort(self._vocabulary, token)
+
+    def remove(self, rid: int) -> None:
+        """Removes a receipt, if it is indexed."""
+
+        with self._lock:
+            for token in self._tokens.pop(rid, ()):
+                postings: Dict[int, Set[int]] = self._postings[token]
+                del postings[rid]
+                if not postings:    # no longer on any receipt
+                    del self._postings[token]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def _add(self, data: Dict[str, Any]) -> Set[str]:
+        """Adds a receipt's tokens to the postings, but not to the vocabulary.
+
+        Returns:
+            Set[str]: the receipt's tokens.
+        """
+
+        rid: int = data["id"]
+        positions: Dict[str, Set[int]] = {}
+        for field in (data.get("name"), data.get("payee"), data.get("buyer")):
+            for token in tokenise(field):
+                positions.setdefault(token, set()).add(RECEIPT)
+        for position, item in enumerate(data.get("items", ())):
+            for field in (item.get("name"), *item.get("users", ())):
+                for token in tokenise(field):
+                    positions.setdefault(token, set()).add(position)
+        for token, found in positions.items():
+            self._postings.setdefault(token, {})[rid] = found
+        self._tokens[rid] = set(positions)
+        return self._tokens[rid]
+
+    def terms(self, prefix: str) -> List[str]:
+        """Returns every indexed token starting with a prefix.
+
+        Args:
+            prefix (str): the prefix, already lower-case, see `tokenise()`.
+
+        Returns:
+            List[str]: the tokens, in order.
+        """
+
+        with self._lock:
+            start: int = bisect.bisect_left(self._vocabulary, prefix)
+            end: int = bisect.bisect_left(self._vocabulary, prefix + "\uffff", start)
+            return self._vocabulary[start:end]
+
+    def search(self, query: str) -> Set[int]:
+        """Returns the ids of the receipts matching every word of a query as a prefix.
+
+        Args:
+            query (str): the query, e.g. "cat bo". Case and punctuation are ignored.
+
+        Returns:
+            Set[int]: the matching ids; every indexed id if the query has no words.
+        """
+
+        words: List[str] = tokenise(query)
+        with self._lock:
+            if not words:
+                return set(self._tokens)
+            matches: Set[int] | None = None
+            for word in sorted(set(words), key=len, reverse=True):  # longest are most selective
+                found: Set[int] = set()
+                for token in self.terms(word):
+                    found.update(self._postings[token])
+                matches = found if matches is None else matches & found
+                if not matches:
+                    break
+            return matches or set()
+
+    def positions(self, rid: int, query: str) -> Set[int]:
+        """Returns which items of a receipt match any word of a query, e.g. to highlight them.
+
+        Args:
+            rid (int): the id of the receipt.
+            query (str): the query.
+
+        Returns:
+            Set[int]: the positions of the matching items, plus `RECEIPT` if the receipt's name,
+            payee or buyer matches.
+        """
+
+        found: Set[int] = set()
+        with self._lock:
+            for word in set(tokenise(query)):
+                for token in self.terms(word):
+                    found.update(self._postings[token].get(rid, ()))
+        return found
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self._tokens
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def tokenise(text: Any) -> List[str]:
+    """Splits text into lower-case words, e.g. "Pet food & water bowls" into `pet`, `food`,
+    `water` and `bowls`. Anything that isn't a string has no words."""
+
+    return _word.findall(text.casefold()) if isinstance(text, str) else []
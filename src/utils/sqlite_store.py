@@ -0,0 +1,336 @@
+"""A SQLite storage backend for receipts, built on the standard library's `sqlite3`.
+
+Receipts, their items and each item's users are stored in three tables, with indexes on the
+receipt id (its primary key), normalised date, buyer and payee, and on each person, so queries such as
+"every receipt Bozo the cat is on" or "every Pet Smart receipt this year" only touch the matching
+rows instead of loading the whole archive. Saving many receipts at once inserts them in a single
+transaction.
+
+Select it with `"storage": "sqlite"` in `etc/conf.json`. An existing `data/receipts/` directory
+can be imported with (from the project root):
+    PYTHONPATH=src python -m utils.sqlite_store import [data/receipts/] [--database data/receipts.sqlite3]
+
+Returns:
+    None: N/A
+"""
+#src/utils/sqlite_store.py
+# imports
+import os
+import sys
+import sqlite3
+from threading import RLock
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from .models import Receipt  # type: ignore
+from .codec import get_codec
+from .storage import Backend
+from .date_parser import normalise_date
+from .platform_specific import get_conf
+
+# vars
+_default_path: str = "data/receipts.sqlite3"
+_schema: str = """
+CREATE TABLE IF NOT EXISTS receipts (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    buyer TEXT,
+    payee TEXT,
+    date TEXT,
+    items INTEGER NOT NULL,
+    sort_date TEXT  -- `date` normalised by `normalise_date()`, NULL if it can't be parsed
+);
+CREATE TABLE IF NOT EXISTS items (
+    receipt_id INTEGER NOT NULL REFERENCES receipts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT,
+    cost REAL NOT NULL,
+    tax REAL NOT NULL,
+    tip REAL NOT NULL,
+    should_tax INTEGER NOT NULL,
+    PRIMARY KEY (receipt_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS item_users (
+    receipt_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    person TEXT NOT NULL,
+    PRIMARY KEY (receipt_id, position, slot),
+    FOREIGN KEY (receipt_id, position) REFERENCES items (receipt_id, position) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS receipts_buyer ON receipts (buyer);
+CREATE INDEX IF NOT EXISTS receipts_payee ON receipts (payee);
+CREATE INDEX IF NOT EXISTS item_users_person ON item_users (person, receipt_id);
+"""
+_header_columns: str = "id, name, date, buyer, payee, items"
+
+
+# ********************
+# CLASSES
+# ********************
+
+class SQLiteBackend(Backend):
+    """Receipts stored in a SQLite database. The connection is opened on first use and shared
+    between threads behind a lock, so the Tk main thread and the write-behind and calculation
+    threads can all use the same backend.
+
+    Args:
+        path (str, optional): the database file. Defaults to `data/receipts.sqlite3`.
+    """
+
+    def __init__(self, path: str = _default_path):
+        self.path: str = path
+        self._connection: sqlite3.Connection | None = None
+        self._lock: RLock = RLock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Returns the connection, opening the database and creating its tables if needed."""
+
+        with self._lock:
+            if self._connection is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                connection: sqlite3.Connection = sqlite3.connect(self.path, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode = WAL")
+                connection.execute("PRAGMA foreign_keys = ON")
+                connection.executescript(_schema)
+                _migrate(connection)
+                self._connection = connection
+            return self._connection
+
+    def close(self) -> None:
+        """Closes the connection; it is reopened on next use."""
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _query(self, sql: str, parameters: Iterable[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self.connection.execute(sql, tuple(parameters)).fetchall()
+
+    def headers(self) -> List[Dict[str, Any]]:
+        return [_header(row) for row in
+                self._query(f"SELECT {_header_columns} FROM receipts ORDER BY id")]
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        rows: List[Tuple[Any, ...]] = self._query(
+            f"SELECT {_header_columns} FROM receipts WHERE id = ?", (rid,))
+        return _header(rows[0]) if rows else None
+
+    def load_dict(self, rid: int) -> Dict[str, Any]:
+        with self._lock:
+            rows: List[Tuple[Any, ...]] = self._query(
+                "SELECT id, name, buyer, payee, date FROM receipts WHERE id = ?", (rid,))
+            if not rows:
+                raise KeyError(rid)
+            items: List[Tuple[Any, ...]] = self._query(
+                "SELECT position, name, cost, tax, tip, should_tax FROM items "
+                "WHERE receipt_id = ? ORDER BY position", (rid,))
+            users: List[Tuple[Any, ...]] = self._query(
+                "SELECT position, person FROM item_users WHERE receipt_id = ? "
+                "ORDER BY position, slot", (rid,))
+
+        people: Dict[int, List[str]] = {}
+        for position, person in users:
+            people.setdefault(position, []).append(person)
+        rid, name, buyer, payee, date = rows[0]
+        return {
+            "name": name,
+            "id": rid,
+            "buyer": buyer,
+            "payee": payee,
+            "date": date,
+            "items": [{
+                "name": item_name,
+                "users": people.get(position, []),
+                "cost": cost,
+                "tax": tax,
+                "tip": tip,
+                "shouldTax": bool(should_tax)
+            } for position, item_name, cost, tax, tip, should_tax in items]
+        }
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        for (rid,) in self._query("SELECT id FROM receipts ORDER BY id"):
+            try:
+                yield self.load_dict(rid)
+            except KeyError:    # deleted since the listing
+                continue
+
+    def save(self, receipt: Receipt) -> int:
+        return self.save_dicts([receipt.to_dict()])[0]
+
+    def save_many(self, receipts: Iterable[Receipt]) -> List[int]:
+        return self.save_dicts(receipt.to_dict() for receipt in receipts)
+
+    def save_dicts(self, receipts: Iterable[Dict[str, Any]]) -> List[int]:
+        """Stores receipt dictionaries in a single transaction, replacing any stored receipts with
+        the same ids. Nothing is stored if any of them fails. If an id is in the batch more than
+        once, only the last of its dictionaries is stored.
+
+        Args:
+            receipts (Iterable[Dict[str, Any]]): the receipt dictionaries, as from `to_dict()`.
+
+        Returns:
+            List[int]: the ids they were stored under.
+        """
+
+        ids: List[int] = []
+        latest: Dict[int, Dict[str, Any]] = {}  # id -> its last dictionary in the batch
+        for data in receipts:
+            rid: int = data["id"]
+            if rid in latest:
+                print(f"Receipt id {rid} is in the batch more than once, storing the last one")
+            ids.append(rid)
+            latest[rid] = data
+
+        default_tax: float = get_conf()["defaultTax"]
+        rows: List[Tuple[Any, ...]] = []
+        item_rows: List[Tuple[Any, ...]] = []
+        user_rows: List[Tuple[Any, ...]] = []
+        for rid, data in latest.items():
+            rows.append((rid, data["name"], data["buyer"], data["payee"], data["date"],
+                         len(data["items"]), normalise_date(data["date"])))
+            for position, item in enumerate(data["items"]):
+                # a null tax or tip in a file means the default, as for `Item`
+                tax: float | None = item["tax"]
+                tip: float | None = item["tip"]
+                item_rows.append((rid, position, item["name"], item["cost"],
+                                  default_tax if tax is None else tax, 0.0 if tip is None else tip,
+                                  int(item["shouldTax"])))
+                user_rows.extend((rid, position, slot, person) for slot, person in
+                                 enumerate(item["users"]))
+
+        with self._lock, self.connection as connection:    # one transaction, rolled back on error
+            connection.executemany("DELETE FROM receipts WHERE id = ?", [(rid,) for rid in latest])
+            connection.executemany("INSERT INTO receipts (id, name, buyer, payee, date, items, "
+                                   "sort_date) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            connection.executemany("INSERT INTO items (receipt_id, position, name, cost, tax, tip,"
+                                   " should_tax) VALUES (?, ?, ?, ?, ?, ?, ?)", item_rows)
+            connection.executemany("INSERT INTO item_users (receipt_id, position, slot, person) "
+                                   "VALUES (?, ?, ?, ?)", user_rows)
+        return ids
+
+    def delete(self, rid: int) -> None:
+        with self._lock, self.connection as connection:
+            connection.execute("DELETE FROM receipts WHERE id = ?", (rid,))    # cascades
+
+    def last_id(self) -> int:
+        return self._query("SELECT coalesce(max(id), 0) FROM receipts")[0][0]
+
+    def find(self, person: str | None = None, payee: str | None = None, buyer: str | None = None,
+             start: str | None = None, end: str | None = None) -> List[Dict[str, Any]]:
+        """Same as `Backend.find()`, but answered by the indexes rather than by loading receipts.
+        Dates are compared normalised, so receipts without a valid date never match a range."""
+
+        conditions: List[str] = []
+        parameters: List[Any] = []
+        if person is not None:
+            conditions.append("id IN (SELECT receipt_id FROM item_users WHERE person = ?)")
+            parameters.append(person)
+        if payee is not None:
+            conditions.append("payee = ?")
+            parameters.append(payee)
+        if buyer is not None:
+            conditions.append("buyer = ?")
+            parameters.append(buyer)
+        if start is not None:
+            conditions.append("sort_date >= ?")
+            parameters.append(start)
+        if end is not None:     # inclusive of everything that starts with `end`, e.g. "2025-06"
+            conditions.append("substr(sort_date, 1, ?) <= ?")
+            parameters.extend((len(end), end))
+        where: str = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return [_header(row) for row in self._query(
+            f"SELECT {_header_columns} FROM receipts{where} ORDER BY id", parameters)]
+
+    def __contains__(self, rid: object) -> bool:
+        return isinstance(rid, int) and bool(self._query("SELECT 1 FROM receipts WHERE id = ?",
+                                                         (rid,)))
+
+    def __len__(self) -> int:
+        return self._query("SELECT count(*) FROM receipts")[0][0]
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _migrate(connection: sqlite3.Connection) -> None:
+    """Brings a database created by an older version up to date: adds the `sort_date` column,
+    filled in from each receipt's date, and indexes it in place of the raw date."""
+
+    columns: List[str] = [row[1] for row in connection.execute("PRAGMA table_info(receipts)")]
+    if "sort_date" not in columns:
+        with connection:
+            connection.execute("ALTER TABLE receipts ADD COLUMN sort_date TEXT")
+            connection.executemany("UPDATE receipts SET sort_date = ? WHERE id = ?", [
+                (normalise_date(date), rid)
+                for rid, date in connection.execute("SELECT id, date FROM receipts").fetchall()])
+            connection.execute("DROP INDEX IF EXISTS receipts_date")
+    connection.execute("CREATE INDEX IF NOT EXISTS receipts_sort_date ON receipts (sort_date)")
+
+
+def _header(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Turns a row of `_header_columns` into a header dictionary."""
+    return dict(zip(("id", "name", "date", "buyer", "payee", "items"), row))
+
+
+def import_directory(directory: str = "data/receipts/", path: str = _default_path) -> int:
+    """Imports every receipt file in a per-file receipts directory in a single transaction. The
+    files themselves are left in place, and receipts already in the database are replaced.
+
+    Args:
+        directory (str, optional): the receipts directory. Defaults to `data/receipts/`.
+        path (str, optional): the database file. Defaults to `data/receipts.sqlite3`.
+
+    Returns:
+        int: how many receipts were imported.
+    """
+
+    def read() -> Iterator[Dict[str, Any]]:
+        with os.scandir(directory) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.name.endswith(".json") and entry.is_file():
+                    with open(entry.path, "rb") as f:
+                        yield get_codec().load(f)
+
+    backend: SQLiteBackend = SQLiteBackend(path)
+    try:
+        return len(set(backend.save_dicts(read())))
+    finally:
+        backend.close()
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Runs the SQLite store command line.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    import argparse  # pylint: disable=import-outside-toplevel
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.sqlite_store", description="Manage the SQLite receipt database.")
+    parser.add_argument("command", choices=("import", "stats"))
+    parser.add_argument("directory", nargs="?", default="data/receipts/",
+                        help="receipts directory to import from (default: data/receipts/)")
+    parser.add_argument("-d", "--database", default=_default_path,
+                        help=f"the database file (default: {_default_path})")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if args.command == "import":
+        print(f"Imported {import_directory(args.directory, args.database)} receipts to "
+              f"{args.database}")
+    else:
+        backend: SQLiteBackend = SQLiteBackend(args.database)
+        print(f"{len(backend)} receipts in {args.database} (last id {backend.last_id()})")
+        backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""Pluggable storage backends for receipts.
+
+Every receipt lookup in `receipts.py` and `id_generator.py` goes through the backend returned by
+`get_backend()`, which is chosen by the `storage` key in `etc/conf.json`:
+    "directory" (default): one JSON file per receipt in `data/receipts/`, see `receipt_index.py`.
+    "journal": the append-only JSON Lines journal at `data/receipts.jsonl`, see `journal.py`.
+    "sqlite": the indexed SQLite database at `data/receipts.sqlite3`, see `sqlite_store.py`.
+
+Raises:
+    ValueError: when `storage` names an unknown backend.
+
+Returns:
+    None: N/A
+"""
+#src/utils/storage.py
+# imports
+import os
+import re
+from threading import RLock
+from typing import Any, Dict, Iterable, Iterator, List
+from .models import Receipt  # type: ignore
+from .platform_specific import get_conf  # type: ignore
+from .persistence import writer
+from . import receipt_index
+from . import journal
+from .date_parser import normalise_date
+from .codec import get_codec
+
+# vars
+_backends: Dict[str, "Backend"] = {}
+_backends_lock: RLock = RLock()
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Backend:
+    """The interface every storage backend implements. Headers are small dictionaries with at
+    least `id`, `name`, `date`, `buyer`, `payee` and `items` (the item count)."""
+
+    def headers(self) -> List[Dict[str, Any]]:
+        """Returns the header of every stored receipt."""
+        raise NotImplementedError
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        """Returns the header of the receipt with the specified id, or None if there isn't one."""
+        return next((header for header in self.headers() if header["id"] == rid), None)
+
+    def load_dict(self, rid: int) -> Dict[str, Any]:
+        """Returns the stored dictionary of the receipt with the specified id.
+
+        Raises:
+            KeyError: if no receipt has that id.
+        """
+        raise NotImplementedError
+
+    def load(self, rid: int) -> Receipt:
+        """Returns the Receipt with the specified id, see `load_dict()`."""
+        return Receipt.from_dict(self.load_dict(rid))    # type: ignore
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yields the stored dictionary of every receipt, one at a time."""
+        for header in self.headers():
+            yield self.load_dict(header["id"])
+
+    def __iter__(self) -> Iterator[Receipt]:
+        """Yields every stored Receipt, one at a time."""
+        for data in self.iter_dicts():
+            yield Receipt.from_dict(data)    # type: ignore
+
+    def save(self, receipt: Receipt) -> int:
+        """Stores a receipt, replacing any stored receipt with the same id.
+
+        Returns:
+            int: the id it was stored under.
+        """
+        return self.save_many([receipt])[0]
+
+    def save_many(self, receipts: Iterable[Receipt]) -> List[int]:
+        """Stores many receipts, as one transaction where the backend supports it.
+
+        Returns:
+            List[int]: the ids they were stored under.
+        """
+        return [self.save(receipt) for receipt in receipts]
+
+    def delete(self, rid: int) -> None:
+        """Deletes the receipt with the specified id, if there is one."""
+        raise NotImplementedError
+
+    def last_id(self) -> int:
+        """Returns the greatest stored receipt id, or 0 if there are none."""
+        return max((header["id"] for header in self.headers()), default=0)
+
+    def find(self, person: str | None = None, payee: str | None = None, buyer: str | None = None,
+             start: str | None = None, end: str | None = None) -> List[Dict[str, Any]]:
+        """Returns the headers of the receipts matching every filter given.
+
+        Args:
+            person (str | None, optional): someone who is on at least one item.
+            payee (str | None, optional): the exact payee.
+            buyer (str | None, optional): the exact buyer.
+            start (str | None, optional): the earliest date, inclusive, as `%Y-%m-%d_%H:%M:%S` or
+            any prefix of it such as "2025-06".
+            end (str | None, optional): the latest date, inclusive, in the same format.
+
+        Returns:
+            List[Dict[str, Any]]: the matching headers.
+        """
+
+        matches: List[Dict[str, Any]] = [
+            header for header in self.headers()
+            if (payee is None or header["payee"] == payee) and
+            (buyer is None or header["buyer"] == buyer) and in_range(header["date"], start, end)
+        ]
+        if person is not None:  # needs the items, so only load the receipts still in the running
+            matches = [header for header in matches if any(
+                person in item["users"] for item in self.load_dict(header["id"])["items"])]
+        return matches
+
+    def __contains__(self, rid: object) -> bool:
+        return isinstance(rid, int) and self.header(rid) is not None
+
+    def __len__(self) -> int:
+        return len(self.headers())
+
+
+class DirectoryBackend(Backend):
+    """One pretty-printed JSON file per receipt in `data/receipts/`, listed through the receipt
+    index and written by the write-behind writer."""
+
+    def headers(self) -> List[Dict[str, Any]]:
+        return receipt_index.get_headers()
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        return receipt_index.get_header(rid)
+
+    def load_dict(self, rid: int) -> Dict[str, Any]:
+        filename: str | None = receipt_index.get_filename(rid)
+        if filename is None:
+            raise KeyError(rid)
+        with open(f"data/receipts/{filename}", "rb") as f:
+            return get_codec().load(f)
+
+    def load(self, rid: int) -> Receipt:
+        """Parses the file straight into a Receipt, see `Receipt.from_json()`."""
+
+        filename: str | None = receipt_index.get_filename(rid)
+        if filename is None:
+            raise KeyError(rid)
+        with open(f"data/receipts/{filename}", "rb") as f:
+            return Receipt.from_json(f.read(), source=f.name)
+
+    def save(self, receipt: Receipt) -> int:
+        """Only a snapshot of the receipt is taken here; serialising and writing it happen
+        atomically on the write-behind writer's thread, so saving doesn't block the caller."""
+
+        data: Dict[str, Any] = receipt.to_dict()
+        filename: str | None = receipt_index.get_filename(data["id"])
+        if filename is None:
+            filename = new_filename(receipt.name, data["id"])
+        receipt_index.update_entry(filename, data, written=False)  # claim the id and filename now
+        writer.schedule(f"data/receipts/{filename}", lambda: get_codec().dumps(data, pretty=True),
+                        on_written=lambda: receipt_index.update_entry(filename, data))
+        return data["id"]
+
+    def delete(self, rid: int) -> None:
+        filename: str | None = receipt_index.get_filename(rid)
+        if filename is None:
+            return
+        writer.cancel(f"data/receipts/{filename}")
+        if os.path.exists(f"data/receipts/{filename}"):
+            os.remove(f"data/receipts/{filename}")
+        receipt_index.remove_entry(filename)
+
+    def last_id(self) -> int:
+        return receipt_index.last_id()
+
+    def __contains__(self, rid: object) -> bool:
+        return isinstance(rid, int) and receipt_index.get_filename(rid) is not None
+
+    def __len__(self) -> int:
+        return len(receipt_index.get_index())
+
+
+class JournalBackend(Backend):
+    """The append-only JSON Lines journal. Headers are parsed once per record and cached by the
+    record's offset, so only records appended since the last listing are read. The cache is
+    dropped whenever the journal is rewritten (e.g. compacted), which moves every record.
+
+    Args:
+        path (str, optional): the journal file. Defaults to `data/receipts.jsonl`.
+    """
+
+    def __init__(self, path: str = "data/receipts.jsonl"):
+        self.journal: journal.Journal = journal.Journal(path)
+        self._headers: Dict[int, Dict[str, Any]] = {}   # record offset -> header
+        self._generation: int = self.journal.generation    # of the journal the offsets are in
+        self._lock: RLock = RLock()
+
+    def _scan(self) -> Dict[int, int]:
+        """Scans the journal, dropping the cached headers if it was rewritten since they were read.
+        Call with the lock held."""
+
+        offsets: Dict[int, int] = self.journal.scan()
+        if self.journal.generation != self._generation:
+            self._headers = {}
+            self._generation = self.journal.generation
+        return offsets
+
+    def headers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            offsets: List[int] = sorted(self._scan().values())
+            missing: List[int] = [offset for offset in offsets if offset not in self._headers]
+            headers: Dict[int, Dict[str, Any]] = {offset: self._headers[offset] for offset in
+                                                  offsets if offset in self._headers}
+            for offset, data in self.journal.read_at(missing):
+                headers[offset] = make_header(data)
+            self._headers = headers     # also drops superseded records
+            return [headers[offset] for offset in offsets]
+
+    def header(self, rid: int) -> Dict[str, Any] | None:
+        with self._lock:
+            offset: int | None = self._scan().get(rid)
+            if offset is None:
+                return None
+            if offset not in self._headers:
+                self._headers[offset] = make_header(self.journal.get_dict(rid))
+            return self._headers[offset]
+
+    def load_dict(self, rid: int) -> Dict[str, Any]:
+        return self.journal.get_dict(rid)
+
+    def load(self, rid: int) -> Receipt:
+        return self.journal.get(rid)
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        return self.journal.iter_dicts()
+
+    def __iter__(self) -> Iterator[Receipt]:
+        return iter(self.journal)
+
+    def save(self, receipt: Receipt) -> int:
+        data: Dict[str, Any] = receipt.to_dict()
+        self.journal.put(data)
+        return data["id"]
+
+    def delete(self, rid: int) -> None:
+        if rid in self.journal:
+            self.journal.delete(rid)
+
+    def last_id(self) -> int:
+        return self.journal.last_id()
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self.journal
+
+    def __len__(self) -> int:
+        return len(self.journal)
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def make_header(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a header from a receipt's stored dictionary."""
+
+    return {
+        "id": data["id"],
+        "name": data.get("name"),
+        "date": data.get("date"),
+        "buyer": data.get("buyer"),
+        "payee": data.get("payee"),
+        "items": len(data.get("items", []))
+    }
+
+
+def in_range(date: str | None, start: str | None, end: str | None) -> bool:
+    """Returns whether a `%Y-%m-%d_%H:%M:%S` date string falls between start and end (inclusive,
+    either may be None or a prefix such as "2025-06"). Receipts without a valid date never match a
+    range.
+    """
+
+    if start is None and end is None:
+        return True
+    date = normalise_date(date)
+    if date is None:
+        return False
+    return (start is None or date >= start) and (end is None or date[:len(end)] <= end)
+
+
+def new_filename(name: str, rid: int) -> str:
+    """Returns an unused filename in `data/receipts/` for a receipt.
+
+    :param name: str, the name of the receipt, e.g. "Pet Store" becomes `pet_store.json`.
+    :param rid: int, the id of the receipt, appended to the filename if it is already taken.
+
+    :return filename: str, the filename including `.json`."""
+
+    stem: str = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "receipt"
+    if os.path.exists(f"data/receipts/{stem}.json") or \
+            f"{stem}.json" in receipt_index.get_index():   # taken, or claimed by a pending save
+        stem = f"{stem}_{rid}"
+    return f"{stem}.json"
+
+
+def get_backend(name: str | None = None) -> Backend:
+    """Returns the storage backend selected by the `storage` key in `etc/conf.json`. Backends are
+    created once and reused; creating one performs no I/O.
+
+    Args:
+        name (str | None, optional): "directory", "journal" or "sqlite" instead of the configured
+        backend. Defaults to None.
+
+    Raises:
+        ValueError: if the backend is unknown.
+
+    Returns:
+        Backend: the backend.
+    """
+
+    name = name or get_conf().get("storage", "directory")
+    with _backends_lock:
+        backend: Backend | None = _backends.get(name)   # type: ignore
+        if backend is not None:
+            return backend
+        if name == "directory":
+            backend = DirectoryBackend()
+        elif name == "journal":
+            backend = JournalBackend()
+        elif name == "sqlite":
+            from .sqlite_store import SQLiteBackend  # pylint: disable=import-outside-toplevel
+            backend = SQLiteBackend()
+        else:
+            raise ValueError(f"Unknown storage backend '{name}'!")
+        _backends[name] = backend
+        return backend
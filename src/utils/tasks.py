@@ -0,0 +1,193 @@
+"""A shared, bounded executor for background work started from the GUI.
+
+Work is submitted under a key, and submitting a key that is already in flight joins the running
+task instead of starting another, so rapid clicks on the same receipt only calculate it once.
+Workers never touch Tk: finished futures are put on a queue, which the Tk main loop drains with
+`after()`, and every result and error callback runs on the main thread. Callbacks are registered
+with an owner (usually the page that asked), and `cancel(owner)` drops them when the owner is
+destroyed, cancelling any task nobody is waiting on anymore.
+
+Returns:
+    None: N/A
+"""
+#src/utils/tasks.py
+# imports
+import os
+from queue import Empty, SimpleQueue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+# vars
+Waiter = Tuple[Any, Callable[[Any], None] | None, Callable[[BaseException], None] | None]
+
+
+# ********************
+# CLASSES
+# ********************
+
+class TaskRunner:
+    """Runs keyed tasks on a bounded thread pool and delivers their results on the Tk main thread.
+
+    Every method other than the task functions themselves must be called from the Tk main thread.
+
+    Args:
+        workers (int | None, optional): the most tasks running at once. Defaults to one per core,
+        up to 4.
+        poll_interval (int, optional): how often to check for finished tasks while any are in
+        flight, in milliseconds. Defaults to 50.
+    """
+
+    def __init__(self, workers: int | None = None, poll_interval: int = 50):
+        self.workers: int = workers or min(4, os.cpu_count() or 1)
+        self.poll_interval: int = poll_interval
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: Dict[Hashable, Future] = {}          # key -> its in-flight future
+        self._waiters: Dict[Hashable, List[Waiter]] = {}    # key -> who is waiting on it
+        self._done: SimpleQueue = SimpleQueue()  # (key, future) pairs, put by the workers
+        self._scheduler: Any = None     # the widget whose `after()` drives polling
+        self._poll_id: str | None = None
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, owner: Any,
+               on_done: Callable[[Any], None] | None = None,
+               on_error: Callable[[BaseException], None] | None = None) -> Future:
+        """Runs `fn(*args)` on the pool, unless a task with the same key is already in flight, in
+        which case the callbacks wait on that task instead.
+
+        Args:
+            key (Hashable): identifies the work, e.g. `("calc", rid, version)`.
+            fn (Callable[..., Any]): the task; runs on a worker thread and must not touch Tk.
+            *args (Any): the task's arguments. They are read on the worker thread, so pass a
+            snapshot of anything the main thread may keep editing, e.g. `Receipt.to_dict()`.
+            owner (Any): the Tk widget the callbacks belong to, see `cancel()`.
+            on_done (Callable[[Any], None] | None, optional): called with the task's result on the
+            main thread. Defaults to None.
+            on_error (Callable[[BaseException], None] | None, optional): called with the task's
+            exception on the main thread. Defaults to printing it.
+
+        Returns:
+            Future: the task's future.
+        """
+
+        waiter: Waiter = (owner, on_done, on_error)
+        future: Future | None = self._futures.get(key)
+        if future is not None:  # already in flight, so just wait on it too
+            self._waiters[key].append(waiter)
+            return future
+
+        if self._executor is None:  # started on first use, so importing this is free
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="calculate")
+        future = self._executor.submit(fn, *args)
+        self._futures[key] = future
+        self._waiters[key] = [waiter]
+        future.add_done_callback(lambda f, key=key: self._done.put((key, f)))  # only ever queues
+        self._schedule(owner)
+        return future
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Returns whether a task with the key is queued or running."""
+        return key in self._futures
+
+    def cancel(self, owner: Any) -> int:
+        """Drops every callback registered by an owner, e.g. a page being destroyed, and cancels
+        the tasks nobody else is waiting on that haven't started yet.
+
+        Args:
+            owner (Any): the owner passed to `submit()`.
+
+        Returns:
+            int: how many tasks no longer have anyone waiting on them.
+        """
+
+        abandoned: int = 0
+        for key, waiters in self._waiters.items():
+            remaining: List[Waiter] = [waiter for waiter in waiters if waiter[0] is not owner]
+            if len(remaining) == len(waiters):
+                continue
+            self._waiters[key] = remaining
+            if not remaining:
+                abandoned += 1
+                self._futures[key].cancel()     # no-op if it is already running
+        return abandoned
+
+    def poll(self) -> None:
+        """Delivers the results of finished tasks to their callbacks. Scheduled with `after()`
+        while tasks are in flight; there's no need to call it directly."""
+
+        self._poll_id = None
+        while True:
+            try:
+                key, future = self._done.get_nowait()
+            except Empty:
+                break
+            self._futures.pop(key, None)
+            waiters: List[Waiter] = self._waiters.pop(key, [])
+            if future.cancelled():
+                continue
+            error: BaseException | None = future.exception()
+            for _, on_done, on_error in waiters:
+                try:
+                    if error is not None:
+                        (on_error or _print_error)(error)
+                    elif on_done is not None:
+                        on_done(future.result())
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    print(f"Task {key} callback failed: {e}")
+        if self._futures:
+            self._schedule(self._scheduler)
+
+    def _schedule(self, widget: Any) -> None:
+        """Makes sure a poll is scheduled on the Tk main loop."""
+
+        if self._poll_id is not None:
+            return
+        if self._scheduler is None or not _exists(self._scheduler):
+            self._scheduler = widget.winfo_toplevel() if hasattr(widget, "winfo_toplevel") \
+                else widget
+        try:
+            self._poll_id = self._scheduler.after(self.poll_interval, self.poll)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Couldn't schedule polling for finished tasks: {e}")   # the window is gone
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancels every queued task and stops the pool. It is restarted if more work comes in.
+
+        Args:
+            wait (bool, optional): whether to wait for running tasks to finish. Defaults to False.
+        """
+
+        if self._poll_id is not None and self._scheduler is not None:
+            try:
+                self._scheduler.after_cancel(self._poll_id)
+            except Exception:   # pylint: disable=broad-exception-caught
+                pass    # the window is already gone
+            self._poll_id = None
+        self._waiters.clear()
+        self._futures.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _print_error(error: BaseException) -> None:
+    print(f"Background task failed: {error!r}")
+
+
+def _exists(widget: Any) -> bool:
+    """Returns whether a Tk widget still exists (anything that isn't a widget always does)."""
+
+    try:
+        return not hasattr(widget, "winfo_exists") or bool(widget.winfo_exists())
+    except Exception:   # pylint: disable=broad-exception-caught
+        return False
+
+
+# ********************
+# VARIABLES
+# ********************
+
+runner: TaskRunner = TaskRunner()   # shared by every page, nothing starts until it is first used
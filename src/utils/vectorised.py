@@ -0,0 +1,232 @@
+"""An optional NumPy engine that splits very large receipts, or whole batches of them, in one
+vectorised pass.
+
+Receipts (or their raw dictionaries, which skips building Item objects altogether) are lowered
+into flat arrays (costs, tax rates, tip rates and a should_tax mask per item) plus a sparse
+item x person share matrix in coordinate form, and every per-person total is then summed with a
+single `numpy.bincount`. If NumPy isn't installed, the functions here fall back to the pure-Python
+ones in `calculator.py`, and either way they return the same results.
+
+Raises:
+    ValueError: when a receipt has 0 people to calculate with.
+
+Returns:
+    None: N/A
+"""
+#src/utils/vectorised.py
+# imports
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from .models import Receipt, Item  # type: ignore
+from .platform_specific import get_conf  # type: ignore
+from . import calculator
+
+try:
+    import numpy as np
+except ImportError:     # NumPy is optional, everything falls back to calculator.py without it
+    np = None   # pylint: disable=invalid-name
+
+# vars
+HAS_NUMPY: bool = np is not None
+
+
+# ********************
+# CLASSES
+# ********************
+
+class LoweredReceipts:
+    """A batch of receipts lowered into flat NumPy arrays.
+
+    Build one with `from_receipts()`, or with `from_dicts()` to go straight from parsed JSON to
+    arrays without constructing any Item or Receipt objects.
+
+    Attributes:
+        names (List[str]): the name of each lowered receipt, in order.
+        people (List[str]): every person across the batch; person columns index into this.
+        costs, taxes, tips (np.ndarray): float64 per item.
+        should_tax (np.ndarray): bool per item.
+        item_receipt (np.ndarray): the index of the receipt each item belongs to.
+        share_item, share_person (np.ndarray): the row / column of each non-zero share.
+        share_count (np.ndarray): how many users the item of each share is split between.
+    """
+
+    def __init__(self, names: List[str], items: Iterable[Tuple[int, float, float, float, bool,
+                                                                  Sequence[str]]]):
+        if np is None:
+            raise ImportError("LoweredReceipts requires NumPy!")
+
+        self.names: List[str] = names
+        self.people: List[str] = []
+        person_ids: Dict[str, int] = {}
+
+        costs: List[float] = []
+        taxes: List[float] = []
+        tips: List[float] = []
+        should_tax: List[bool] = []
+        item_receipt: List[int] = []
+        share_item: List[int] = []
+        share_person: List[int] = []
+        share_count: List[int] = []
+
+        for r, cost, tax, tip, taxed, users in items:
+            row: int = len(costs)
+            costs.append(cost)
+            taxes.append(tax)
+            tips.append(tip)
+            should_tax.append(taxed)
+            item_receipt.append(r)
+            for user in users:
+                column: int | None = person_ids.get(user)
+                if column is None:
+                    column = person_ids[user] = len(self.people)
+                    self.people.append(user)
+                share_item.append(row)
+                share_person.append(column)
+                share_count.append(len(users))
+
+        self.costs: Any = np.array(costs, dtype=np.float64)
+        self.taxes: Any = np.array(taxes, dtype=np.float64)
+        self.tips: Any = np.array(tips, dtype=np.float64)
+        self.should_tax: Any = np.array(should_tax, dtype=np.bool_)
+        self.item_receipt: Any = np.array(item_receipt, dtype=np.intp)
+        self.share_item: Any = np.array(share_item, dtype=np.intp)
+        self.share_person: Any = np.array(share_person, dtype=np.intp)
+        self.share_count: Any = np.array(share_count, dtype=np.float64)
+
+    @staticmethod
+    def from_receipts(receipts: Iterable[Receipt]) -> "LoweredReceipts":
+        """Lowers Receipt objects.
+
+        Args:
+            receipts (Iterable[Receipt]): the receipts to lower.
+
+        Returns:
+            LoweredReceipts: the lowered batch.
+        """
+
+        receipts = list(receipts)
+        return LoweredReceipts([receipt.name for receipt in receipts],
+                               ((r, item.cost, item.tax, item.tip, item.should_tax, item.users)
+                                for r, receipt in enumerate(receipts) for item in receipt
+                                if isinstance(item, Item)))
+
+    @staticmethod
+    def from_dicts(receipts: Iterable[Dict[str, Any]]) -> "LoweredReceipts":
+        """Lowers receipt dictionaries as stored in `data/receipts/`, skipping Item / Receipt
+        construction entirely.
+
+        Args:
+            receipts (Iterable[Dict[str, Any]]): the receipt dictionaries to lower.
+
+        Returns:
+            LoweredReceipts: the lowered batch.
+        """
+
+        receipts = list(receipts)
+        default_tax: float = get_conf()["defaultTax"]
+        return LoweredReceipts([receipt["name"] for receipt in receipts],
+                               ((r, item["cost"],
+                                 item["tax"] if item.get("tax") is not None else default_tax,
+                                 item["tip"] if item.get("tip") is not None else 0.0,
+                                 item["shouldTax"], item["users"])
+                                for r, receipt in enumerate(receipts) for item in receipt["items"]))
+
+    def item_totals(self) -> Any:
+        """Returns each item's cost including tax (if it is taxed) and tip."""
+        return self.costs * np.where(self.should_tax, 1 + self.taxes + self.tips, 1 + self.tips)
+
+    def receipt_totals(self) -> Any:
+        """Returns each receipt's total including tax + tip."""
+        return np.bincount(self.item_receipt, weights=self.item_totals(),
+                           minlength=len(self.names))
+
+    def per_person(self) -> List[Dict[str, float]]:
+        """Returns how much each person owes on each receipt, computed in one vectorised pass.
+
+        Raises:
+            ValueError: if a receipt has no people on it.
+
+        Returns:
+            List[Dict[str, float]]: a dictionary of each user and how much they owe, per receipt.
+        """
+
+        shares: Any = self.item_totals()[self.share_item] / self.share_count
+        # one bucket per (receipt, person) pair that actually occurs, so the result stays sparse
+        pairs: Any = self.item_receipt[self.share_item] * max(len(self.people), 1) + \
+            self.share_person
+        keys, inverse = np.unique(pairs, return_inverse=True)
+        sums: Any = np.bincount(inverse, weights=shares, minlength=len(keys))
+
+        debts: List[Dict[str, float]] = [{} for _ in self.names]
+        receipt_of, person_of = np.divmod(keys, max(len(self.people), 1))
+        for r, p, owed in zip(receipt_of.tolist(), person_of.tolist(), sums.tolist()):
+            debts[r][self.people[p]] = owed
+        for name, owed in zip(self.names, debts):
+            if not owed:
+                raise ValueError(f"Cannot calculate average with no people on '{name}'!")
+        return debts
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def total_per_person(receipt: Receipt) -> Dict[str, float]:
+    """Calculates the total amount of money owed per person on the receipt based on what they
+    purchased, vectorised with NumPy when it is available.
+
+    Args:
+        receipt (Receipt): The receipt object to calculate.
+
+    Returns:
+        Dict[str, float]: A dictionary of each user and how much they owe as the values.
+    """
+
+    return total_per_person_batch([receipt])[0]
+
+
+def total_per_person_batch(receipts: Iterable[Receipt]) -> List[Dict[str, float]]:
+    """Calculates `total_per_person` for many receipts at once, lowering the whole batch into one
+    set of arrays when NumPy is available.
+
+    Args:
+        receipts (Iterable[Receipt]): The receipt objects to calculate.
+
+    Returns:
+        List[Dict[str, float]]: A dictionary of each user and how much they owe, per receipt.
+    """
+
+    if np is None:
+        return [calculator.total_per_person(receipt) for receipt in receipts]
+    return LoweredReceipts.from_receipts(receipts).per_person()
+
+
+def total_with_tax_batch(receipts: Iterable[Receipt]) -> List[float]:
+    """Calculates `total_with_tax` for many receipts at once.
+
+    Args:
+        receipts (Iterable[Receipt]): The receipt objects to calculate.
+
+    Returns:
+        List[float]: the total amount of money owed on each receipt including tax + tip.
+    """
+
+    if np is None:
+        return [calculator.total_with_tax(receipt) for receipt in receipts]
+    return LoweredReceipts.from_receipts(receipts).receipt_totals().tolist()
+
+
+def total_per_person_dicts(receipts: Iterable[Dict[str, Any]]) -> List[Dict[str, float]]:
+    """Calculates `total_per_person` straight from receipt dictionaries as stored in
+    `data/receipts/`, which is the fast path for bulk settlement jobs.
+
+    Args:
+        receipts (Iterable[Dict[str, Any]]): The receipt dictionaries to calculate.
+
+    Returns:
+        List[Dict[str, float]]: A dictionary of each user and how much they owe, per receipt.
+    """
+
+    if np is None:
+        return [calculator.total_per_person(Receipt.from_dict(receipt))  # type: ignore
+                for receipt in receipts]
+    return LoweredReceipts.from_dicts(receipts).per_person()
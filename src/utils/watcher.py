@@ -0,0 +1,276 @@
+"""Keeps the receipt index, the hydrated receipt cache and the GUI in sync with `data/receipts/` as
+files are added, edited or removed outside the app.
+
+Every check is incremental: `receipt_index.sync()` only parses files whose stat changed, and
+reports the headers that were added, changed or removed. Changed and removed receipts are evicted
+from the repository's cache and every change is applied to its date index, then the changes are handed to every subscriber (e.g. the Overview).
+On Linux, the directory is watched with inotify, so a check does nothing until the kernel reports
+an event, and then only stats the files named in it. Elsewhere, or if inotify can't be set up,
+each check is one `os.scandir` of the directory's stat data.
+
+In the GUI, `start()` runs the checks on the shared background executor (see `tasks.py`) every
+`interval` milliseconds, and subscribers are called on the Tk main thread. Headless callers can
+call `check()` themselves, or watch from the command line:
+    PYTHONPATH=src python -m utils.watcher [--interval 1.0]
+
+Returns:
+    None: N/A
+"""
+#src/utils/watcher.py
+# imports
+import os
+import sys
+import time
+import ctypes
+import struct
+import argparse
+from typing import Any, Callable, List, Set
+from . import receipt_index
+from .receipt_index import Changes
+from .receipts import repository
+from .tasks import runner
+
+# vars
+Subscriber = Callable[[Changes], None]
+_event: struct.Struct = struct.Struct("iIII")   # struct inotify_event: wd, mask, cookie, len
+IN_ATTRIB: int = 0x00000004
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_FROM: int = 0x00000040
+IN_MOVED_TO: int = 0x00000080
+IN_DELETE: int = 0x00000200
+IN_DELETE_SELF: int = 0x00000400
+IN_MOVE_SELF: int = 0x00000800
+IN_Q_OVERFLOW: int = 0x00004000
+IN_IGNORED: int = 0x00008000
+_watch_mask: int = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | \
+    IN_DELETE_SELF | IN_MOVE_SELF   # not IN_MODIFY, so half-written files aren't parsed
+_rescan_mask: int = IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF
+
+
+# ********************
+# CLASSES
+# ********************
+
+class Inotify:
+    """A minimal, non-blocking inotify watch on one directory, through libc with ctypes.
+
+    Args:
+        path (str): the directory to watch.
+
+    Raises:
+        OSError: if inotify isn't available or the watch can't be added.
+    """
+
+    def __init__(self, path: str):
+        libc: Any = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify isn't available on this platform")
+        self.fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), _watch_mask) < 0:
+            errno: int = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+        self.alive: bool = True
+
+    def read(self) -> Set[str] | None:
+        """Returns the names of the files with events since the last read, without blocking.
+
+        Returns:
+            Set[str] | None: the file names (empty if nothing happened), or None if the events
+            can't be trusted to be complete (the queue overflowed or the directory itself was
+            moved or deleted), so the whole directory must be checked.
+        """
+
+        names: Set[str] = set()
+        rescan: bool = False
+        while True:
+            try:
+                buffer: bytes = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset: int = 0
+            while offset + _event.size <= len(buffer):
+                _, mask, _, length = _event.unpack_from(buffer, offset)
+                offset += _event.size
+                name: bytes = buffer[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & _rescan_mask:
+                    rescan = True
+                    self.alive = not mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF)
+                elif name:
+                    names.add(os.fsdecode(name))
+        return None if rescan else names
+
+    def close(self) -> None:
+        """Stops watching."""
+
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self.alive = False
+
+
+class DirectoryWatcher:
+    """Checks `data/receipts/` for changes and pushes them to the index, the receipt cache and the
+    subscribers.
+
+    Args:
+        interval (int, optional): how often `start()` checks, in milliseconds. Defaults to 1000.
+        use_inotify (bool, optional): whether to use inotify where it is available. Defaults to
+        True.
+    """
+
+    def __init__(self, interval: int = 1000, use_inotify: bool = True):
+        self.interval: int = interval
+        self.use_inotify: bool = use_inotify
+        self.subscribers: List[Subscriber] = []
+        self._inotify: Inotify | None = None
+        self._synced: bool = False  # whether the first full check has been done
+        self._widget: Any = None    # the widget whose `after()` schedules the checks
+        self._after_id: str | None = None
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Calls `callback` with the changes every time a check finds any."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        """Stops calling `callback`."""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def check(self) -> Changes:
+        """Brings the receipt index up to date and evicts changed or removed receipts from the
+        cache. Safe to run off the Tk main thread; subscribers are not called, see `publish()`.
+
+        Returns:
+            Changes: what was added, changed or removed since the last check.
+        """
+
+        names: Set[str] | None = None
+        if self.use_inotify and self._inotify is None:
+            try:
+                self._inotify = Inotify(_directory())
+                self._synced = False    # anything before the watch began needs a full check
+            except OSError as e:
+                print(f"Watching receipts by polling, as inotify isn't available: {e}")
+                self.use_inotify = False
+        if self._inotify is not None and self._synced:
+            names = self._inotify.read()
+            if names is not None and not names:
+                return Changes([], [], [])
+            if not self._inotify.alive:     # the directory was replaced, watch the new one next time
+                self._inotify.close()
+                self._inotify = None
+
+        changes: Changes = receipt_index.sync(names)
+        self._synced = True
+        for header in changes.changed + changes.removed:
+            repository.evict(header["id"])
+        for header in changes.added + changes.changed + changes.removed:
+            repository.reindex(header["id"])
+        return changes
+
+    def publish(self, changes: Changes) -> None:
+        """Hands changes to every subscriber, unless there are none."""
+
+        if not changes:
+            return
+        for callback in list(self.subscribers):
+            try:
+                callback(changes)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Receipt watcher subscriber failed: {e}")
+
+    def poll(self) -> Changes:
+        """Checks for changes and publishes them, on the calling thread."""
+
+        changes: Changes = self.check()
+        self.publish(changes)
+        return changes
+
+    def start(self, widget: Any) -> None:
+        """Starts checking every `interval` milliseconds on the shared background executor, with
+        subscribers called on the Tk main thread.
+
+        Args:
+            widget (Any): a Tk widget to schedule the checks with, e.g. the root window.
+        """
+
+        self._widget = widget
+        if self._after_id is None:
+            self._after_id = widget.after(0, self._tick)
+
+    def _tick(self) -> None:
+        self._after_id = None
+        if self._widget is None:
+            return
+        runner.submit(("watch", _directory()), self.check, owner=self._widget,
+                      on_done=self.publish)
+        self._after_id = self._widget.after(self.interval, self._tick)
+
+    def stop(self) -> None:
+        """Stops checking, see `start()`."""
+
+        if self._widget is not None and self._after_id is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except Exception:   # pylint: disable=broad-exception-caught
+                pass    # the window is already gone
+        self._widget = self._after_id = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._synced = False
+
+
+# ********************
+# FUNCTIONS
+# ********************
+
+def _directory() -> str:
+    return receipt_index._receipts_dir  # pylint: disable=protected-access
+
+
+def describe(changes: Changes) -> List[str]:
+    """Returns one line per changed receipt, e.g. `+ 12 Pet Smart (receipt_12.json)`."""
+
+    lines: List[str] = []
+    for sign, headers in (("+", changes.added), ("~", changes.changed), ("-", changes.removed)):
+        lines.extend(f"{sign} {header['id']} {header['name']} ({header['filename']})"
+                     for header in headers)
+    return lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Prints changes to `data/receipts/` as they happen, until interrupted.
+
+    Args:
+        argv (List[str] | None, optional): the arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: the exit code.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m utils.watcher", description="Print changes to data/receipts/.")
+    parser.add_argument("-i", "--interval", type=float, default=1.0, help="seconds between checks")
+    parser.add_argument("--poll", action="store_true", help="don't use inotify")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    directory_watcher: DirectoryWatcher = DirectoryWatcher(use_inotify=not args.poll)
+    directory_watcher.subscribe(lambda changes: print("\n".join(describe(changes)), flush=True))
+    print(f"Watching {_directory()} ({len(receipt_index.get_index())} receipts)", flush=True)
+    try:
+        while True:
+            directory_watcher.poll()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        directory_watcher.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
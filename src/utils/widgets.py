@@ -2,45 +2,128 @@
 # imports
 import platform
 import tkinter as tk
-from typing import Any, Union, Callable
-from .models import Receipt # type: ignore
+from typing import Any, Dict, List, Tuple, Union, Callable
+from .models import Receipt, Item # type: ignore
 
 
 class ReceiptPreview(tk.Frame):
     """A horizontal tk.Frame widget showing a preview of a receipt
 
     Args:
-        receipt (Union[Receipt, object]): The receipt object to preview.
-        edit_func (Callable): The function to run if the user clicks "edit".
+        receipt (Union[Receipt, Dict[str, Any], object]): The receipt object, or its header from
+        the receipt index, to preview.
+        calc_func (Callable): The function to run if the user clicks "calculate".
         del_func (Callable): The function to run if the user clicks "delete".
 
     Raises:
-        TypeError: _description_
+        TypeError: if receipt is neither a Receipt nor a receipt header.
     """
 
-    def __init__(self, receipt: Union[Receipt, object], calc_func: Callable, del_func: Callable,
-                 *args, **kwargs):
+    def __init__(self, receipt: Union[Receipt, Dict[str, Any], object], calc_func: Callable,
+                 del_func: Callable, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # vars
-        if not isinstance(receipt, Receipt):
-            raise TypeError("receipt must be of type Receipt!")
-        self.receipt: Receipt = receipt
-
         # layout
         info_frame: tk.Frame = tk.Frame(self)
         info_frame.pack(padx=5, pady=5, side=tk.LEFT)
-        title_label: tk.Label = tk.Label(info_frame, text=self.receipt.name, font=("Arial", 18))
-        title_label.pack(padx=5, pady=5, side=tk.TOP, anchor=tk.NW) # top left
-        date_label: tk.Label = tk.Label(info_frame, text=str(self.receipt.date), font=("Arial", 10))
-        date_label.pack(padx=5, pady=5, side=tk.BOTTOM, anchor=tk.SW)   # top left subheader
+        self.title_label: tk.Label = tk.Label(info_frame, font=("Arial", 18))
+        self.title_label.pack(padx=5, pady=5, side=tk.TOP, anchor=tk.NW) # top left
+        self.date_label: tk.Label = tk.Label(info_frame, font=("Arial", 10))
+        self.date_label.pack(padx=5, pady=5, side=tk.BOTTOM, anchor=tk.SW)   # top left subheader
 
         control_frame: tk.Frame = tk.Frame(self)
         control_frame.pack(padx=5, pady=5, side=tk.RIGHT)
-        delete_button: tk.Button = tk.Button(control_frame, text="🗑", command=del_func)
-        delete_button.pack(padx=5, pady=5, side=tk.RIGHT, anchor=tk.E)
-        calc_button: tk.Button = tk.Button(control_frame, text="🖩", command=calc_func)
-        calc_button.pack(padx=5, pady=5, side=tk.RIGHT, anchor=tk.E)
+        self.delete_button: tk.Button = tk.Button(control_frame, text="🗑")
+        self.delete_button.pack(padx=5, pady=5, side=tk.RIGHT, anchor=tk.E)
+        self.calc_button: tk.Button = tk.Button(control_frame, text="🖩")
+        self.calc_button.pack(padx=5, pady=5, side=tk.RIGHT, anchor=tk.E)
+
+        self.receipt: Union[Receipt, Dict[str, Any]]
+        self.set_receipt(receipt, calc_func, del_func)
+
+    def set_receipt(self, receipt: Union[Receipt, Dict[str, Any], object], calc_func: Callable,
+                    del_func: Callable) -> None:
+        """Shows a different receipt in this preview, reusing its widgets. Used to recycle previews
+        in a virtualised `ScrollableFrame`.
+
+        Args:
+            receipt (Union[Receipt, Dict[str, Any], object]): The receipt object, or its header,
+            to preview.
+            calc_func (Callable): The function to run if the user clicks "calculate".
+            del_func (Callable): The function to run if the user clicks "delete".
+
+        Raises:
+            TypeError: if receipt is neither a Receipt nor a receipt header.
+        """
+
+        if isinstance(receipt, Receipt):
+            name, date = receipt.name, receipt.date
+        elif isinstance(receipt, dict):
+            name, date = receipt["name"], receipt["date"]
+        else:
+            raise TypeError("receipt must be of type Receipt or a receipt header!")
+        self.receipt = receipt
+
+        self.title_label.config(text=name)
+        self.date_label.config(text=str(date))
+        self.delete_button.config(command=del_func)
+        self.calc_button.config(command=calc_func)
+
+
+class ItemRow(tk.Frame):
+    """A horizontal tk.Frame widget showing one item of a receipt in the Editor. Rows are recycled
+    between items, and only the labels whose text actually changes are reconfigured.
+
+    Args:
+        item (Item | None, optional): The item to show. Defaults to None.
+    """
+
+    def __init__(self, *args, item: Item | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.cost_label: tk.Label = tk.Label(self, font=("Arial", 12), anchor=tk.E)
+        self.cost_label.pack(padx=5, pady=2, side=tk.RIGHT)
+        self.name_label: tk.Label = tk.Label(self, font=("Arial", 12), anchor=tk.W)
+        self.name_label.pack(padx=5, pady=2, side=tk.TOP, fill=tk.X)
+        self.users_label: tk.Label = tk.Label(self, font=("Arial", 9), anchor=tk.W)
+        self.users_label.pack(padx=5, pady=2, side=tk.BOTTOM, fill=tk.X)
+
+        self.shown: Tuple[str, str, str] | None = None
+        if item is not None:
+            self.set_item(item)
+
+    @staticmethod
+    def describe(item: Item) -> Tuple[str, str, str]:
+        """Returns the (name, users, cost) texts an item is shown with, so changes can be found by
+        comparing them without touching any widgets."""
+
+        cost: str = f"${item.cost:.2f}"
+        if item.should_tax and item.tax:
+            cost += f" +{item.tax:.0%} tax"
+        if item.tip:
+            cost += f" +{item.tip:.0%} tip"
+        return item.name, ", ".join(item.users), cost
+
+    def set_item(self, item: Item) -> bool:
+        """Shows a different (or changed) item, reconfiguring only the labels that differ.
+
+        Args:
+            item (Item): The item to show.
+
+        Returns:
+            bool: whether anything had to be reconfigured.
+        """
+
+        texts: Tuple[str, str, str] = self.describe(item)
+        if texts == self.shown:
+            return False
+        shown: Tuple[str | None, ...] = self.shown or (None, None, None)
+        for label, old, new in zip((self.name_label, self.users_label, self.cost_label), shown,
+                                   texts):
+            if old != new:
+                label.config(text=new)
+        self.shown = texts
+        return True
 
 
 class PlaceholderEntry(tk.Entry):
@@ -136,6 +219,9 @@ class PopupEntry(tk.Toplevel):
 class ScrollableFrame(tk.Frame):
     """A customized tkinter Frame that allows for vertical scrolling. Made by mp035 on GitHub.
 
+    Child widgets are normally packed into `viewport`. For long lists, `set_rows()` switches to a
+    virtualised list mode instead, where only the rows in view exist as widgets, see `set_rows()`.
+
     Args:
         tk (tk.Frame): _description_
     """
@@ -149,6 +235,17 @@ class ScrollableFrame(tk.Frame):
 
         self.event: Any = None
 
+        # virtualised list mode, see `set_rows()`
+        self.virtual: bool = False
+        self.row_count: int = 0
+        self.row_height: int = 0
+        self.row_padding: int = 10
+        self._create_row: Callable[[tk.Widget, int], tk.Widget] | None = None
+        self._bind_row: Callable[[tk.Widget, int], None] | None = None
+        self._pool: List[tk.Widget] = []    # recycled row widgets
+        self._pool_items: List[int] = []    # the canvas window item of each pooled widget
+        self._shown: List[int] = []         # the row each pooled widget shows, or -1 if hidden
+
         self.vsb.pack(side="right", fill="y")                                       #pack scrollbar to right of self
         self.canvas.pack(side="left", fill="both", expand=True)                     #pack canvas to left of self and expand to fil
         self.canvas_window = self.canvas.create_window((4,4), window=self.viewport, anchor="nw",
@@ -170,9 +267,105 @@ class ScrollableFrame(tk.Frame):
     def on_frame_configure(self, event: Any = None) -> None:
         '''Reset the scroll region to encompass the inner frame'''
         self.event = event
+        if self.virtual:    # the rows' size is known, so there is nothing to measure
+            width: int = self.canvas.winfo_width()
+            self.canvas.configure(scrollregion=(0, 0, width, self.row_count * self.row_height))
+            for item in self._pool_items:
+                self.canvas.itemconfig(item, width=max(width - 2 * self.row_padding, 1))
+            self.layout_rows()
+            return
         self.canvas.configure(scrollregion=self.canvas.bbox("all")) # whenever the size of the frame
         # changes, alter the scroll region respectively.
 
+    def set_rows(self, count: int, create: Callable[[tk.Widget, int], tk.Widget],
+                 bind: Callable[[tk.Widget, int], None], row_height: int | None = None) -> None:
+        """Switches to (or updates) virtualised list mode: a list of `count` rows of equal height,
+        where only a small pool of row widgets exists, enough to fill the view. As the list is
+        scrolled, widgets that leave the view are recycled for the rows entering it, so showing
+        thousands of rows costs no more than showing a screenful. Call again whenever the rows
+        change; every row in view is bound again.
+
+        Args:
+            count (int): how many rows there are.
+            create (Callable[[tk.Widget, int], tk.Widget]): creates a row widget in a master,
+            showing the row at an index. Only called while the pool grows.
+            bind (Callable[[tk.Widget, int], None]): makes an existing row widget show the row at
+            an index instead.
+            row_height (int | None, optional): the height of every row in pixels, padding
+            excluded. Defaults to the requested height of the first row widget.
+        """
+
+        if not self.virtual:
+            self.virtual = True
+            self.canvas.itemconfig(self.canvas_window, state="hidden")  # rows go on the canvas
+            self.canvas.configure(yscrollcommand=self.on_scroll)
+            self.canvas.bind("<Enter>", self.on_enter)
+            self.canvas.bind("<Leave>", self.on_leave)
+        self.row_count = count
+        self._create_row, self._bind_row = create, bind
+        self._shown = [-1] * len(self._pool)   # every row must be bound again
+        if row_height is not None:
+            self.row_height = row_height + self.row_padding
+        elif not self.row_height and count:
+            self._grow_pool(0)
+            self._pool[0].update_idletasks()
+            self.row_height = self._pool[0].winfo_reqheight() + self.row_padding
+        if self.row_count * self.row_height < self.canvas.canvasy(0):   # scrolled past the end
+            self.canvas.yview_moveto(0)
+        self.on_frame_configure()
+
+    def refresh_row(self, index: int) -> None:
+        """Binds the row at an index again if it is in view, e.g. after it was edited."""
+
+        if self._bind_row is not None and index in self._shown:
+            self._bind_row(self._pool[self._shown.index(index)], index)
+
+    def _grow_pool(self, index: int) -> None:
+        """Adds a row widget showing the row at an index to the pool."""
+
+        widget: tk.Widget = self._create_row(self.canvas, index)   # type: ignore
+        self._pool.append(widget)
+        self._pool_items.append(self.canvas.create_window(
+            self.row_padding, 0, window=widget, anchor="nw", state="hidden",
+            width=max(self.canvas.winfo_width() - 2 * self.row_padding, 1)))
+        self._shown.append(-1)
+
+    def layout_rows(self) -> None:
+        """Shows the rows in view, recycling row widgets from rows that have left the view. Row
+        `index` always goes to pooled widget `index % pool size`, so scrolling by a row only
+        rebinds the one widget that wrapped around."""
+
+        if not self.virtual or not self.row_height:
+            return
+        top: int = int(self.canvas.canvasy(0))
+        first: int = max(top // self.row_height, 0)
+        last: int = min((top + max(self.canvas.winfo_height(), 1)) // self.row_height + 1,
+                        self.row_count)
+        while len(self._pool) < last - first:
+            self._grow_pool(first + len(self._pool))
+            self._shown = [-1] * len(self._pool)    # the modulus changed, so rebind everything
+
+        visible: set[int] = set()
+        for index in range(first, last):
+            slot: int = index % len(self._pool)
+            visible.add(slot)
+            if self._shown[slot] != index:
+                self._bind_row(self._pool[slot], index)  # type: ignore
+                self._shown[slot] = index
+                self.canvas.coords(self._pool_items[slot], self.row_padding,
+                                   index * self.row_height + self.row_padding // 2)
+                self.canvas.itemconfig(self._pool_items[slot], state="normal")
+        for slot, item in enumerate(self._pool_items):
+            if slot not in visible:
+                self.canvas.itemconfig(item, state="hidden")
+                self._shown[slot] = -1
+
+    def on_scroll(self, first: str, last: str) -> None:
+        """Moves the scrollbar and, in virtualised list mode, lays out the rows now in view."""
+
+        self.vsb.set(first, last)
+        self.layout_rows()
+
     def on_canvas_configure(self, event: Any = None) -> None:
         '''Reset the canvas window to encompass inner frame when required'''
         canvas_width = event.width
@@ -220,6 +413,9 @@ class ScrollableFrame(tk.Frame):
         """
 
         self.event = event
+        if event is not None and str(self.winfo_containing(event.x_root, event.y_root)) \
+                .startswith(str(self.canvas)):    # only moved onto one of the rows
+            return
         if platform.system() == 'Linux':
             self.canvas.unbind_all("<Button-4>")
             self.canvas.unbind_all("<Button-5>")
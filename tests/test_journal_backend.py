@@ -0,0 +1,51 @@
+"""Regression checks for the journal storage backend.
+
+Run from the project root:
+    PYTHONPATH=src python -m unittest discover -s tests
+
+Returns:
+    None: N/A
+"""
+#tests/test_journal_backend.py
+# imports
+import os
+import tempfile
+import unittest
+from typing import Any, Dict
+from utils.models import Receipt  # type: ignore
+from utils.storage import JournalBackend  # type: ignore
+
+
+def _receipt(rid: int, name: str) -> Receipt:
+    data: Dict[str, Any] = {"name": name, "id": rid, "buyer": "A", "payee": None, "date": None,
+                            "items": [{"name": "Item", "users": ["A", "B"], "cost": 1.0,
+                                       "tax": 0.13, "tip": 0.0, "shouldTax": True}]}
+    return Receipt.from_dict(data)  # type: ignore
+
+
+class JournalBackendTest(unittest.TestCase):
+    """Checks `JournalBackend`'s cached headers against the journal."""
+
+    def setUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.backend: JournalBackend = JournalBackend(os.path.join(self.directory.name, "r.jsonl"))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_headers_after_compaction(self) -> None:
+        """Saving one receipt over and over compacts the journal, moving the other receipt's record
+        to the offset the saved receipt's first record was cached at."""
+
+        self.backend.save(_receipt(2, "Second"))
+        self.backend.save(_receipt(1, "First"))
+        self.assertEqual([header["id"] for header in self.backend.headers()], [2, 1])
+        for _ in range(20):
+            self.backend.save(_receipt(2, "Second"))
+        self.assertGreater(self.backend.journal.generation, 0)  # it was compacted
+        self.assertEqual(sorted(header["id"] for header in self.backend.headers()), [1, 2])
+        self.assertEqual(self.backend.header(1)["name"], "First")   # type: ignore
+        self.assertEqual(self.backend.header(2)["name"], "Second")  # type: ignore
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Regression checks for the cached config.
+
+Run from the project root:
+    PYTHONPATH=src python -m unittest discover -s tests
+
+Returns:
+    None: N/A
+"""
+#tests/test_platform_specific.py
+# imports
+import os
+import json
+import tempfile
+import unittest
+from utils import platform_specific  # type: ignore
+from utils.persistence import writer  # type: ignore
+
+
+class ConfigCacheTest(unittest.TestCase):
+    """Checks `get_conf()` against `etc/conf.json` after updates, in a temporary project root."""
+
+    def setUp(self) -> None:
+        self.cwd: str = os.getcwd()
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.mkdir("etc")
+        self.write({"defaultTax": 0.13})
+        platform_specific._cache.clear()  # pylint: disable=protected-access
+
+    def tearDown(self) -> None:
+        writer.flush()
+        platform_specific._cache.clear()  # pylint: disable=protected-access
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def write(self, conf: dict) -> None:
+        with open("etc/conf.json", "w", encoding="utf-8") as f:
+            json.dump(conf, f)
+
+    def test_update_written(self) -> None:
+        platform_specific.update_conf("lastReceipt", 7)
+        self.assertTrue(writer.flush(timeout=5))
+        with open("etc/conf.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["lastReceipt"], 7)
+        self.write({"defaultTax": 0.05})    # edited by another program
+        self.assertEqual(platform_specific.get_conf()["defaultTax"], 0.05)
+
+    def test_failed_write(self) -> None:
+        """An update whose write fails is dropped, and the file is read again rather than the
+        cache waiting on the write forever."""
+
+        platform_specific.update_conf("lastReceipt", object())   # can't be written as JSON
+        self.assertIn("lastReceipt", platform_specific.get_conf())
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertNotIn("lastReceipt", platform_specific.get_conf())
+        self.write({"defaultTax": 0.075})   # a different size, as mtimes can be coarse
+        self.assertEqual(platform_specific.get_conf()["defaultTax"], 0.075)
+
+
+if __name__ == "__main__":
+    unittest.main()